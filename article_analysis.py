@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章内容分析
+分词、词频和段落统计按正文内容哈希缓存，结果为结构化数据；
+同一篇文章在一次流程中（分析、生成笔记、一句话总结）只分词和统计一次。
+语料库中的文章足够多时，关键词按 TF-IDF 排序（文档频率见 tfidf_index）
+"""
+
+import hashlib
+import heapq
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from segmenter import get_segmenter
+from tfidf_index import DocumentFrequencyIndex, get_document_index
+
+logger = logging.getLogger(__name__)
+
+# 语料库文章数达到该值后关键词才按 TF-IDF 排序，文章太少时文档频率没有区分度
+TFIDF_MIN_DOCUMENTS = int(os.getenv("TFIDF_MIN_DOCUMENTS", "5"))
+
+# 停用词
+STOP_WORDS = frozenset(['的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少', '可以', '能够', '应该', '必须', '如果', '因为', '所以', '但是', '然后', '现在', '已经', '还是', '只是', '或者', '以及', '并且', '而且', '不过', '虽然', '尽管', '除了', '通过', '关于', '对于', '由于', '为了', '根据', '按照', '依据', '基于'])
+
+# 以这些字结尾的片段不作为关键词
+STOP_SUFFIXES = frozenset(['的', '了', '在', '是', '有', '和', '就', '不', '都', '也', '很', '到', '说', '要', '去', '会', '着', '没', '看', '好', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少'])
+
+# 分词后仍不适合作为关键词的常见虚词、代词
+FUNCTION_WORDS = frozenset(['我们', '你们', '他们', '她们', '它们', '这个', '那个', '这些', '那些', '这样', '那样', '这种', '那种', '什么', '怎么', '怎样', '为什么', '一些', '一种', '一样', '一下', '非常', '就是', '还有', '这里', '那里', '其中', '之后', '之前', '以后', '以前', '时候', '进行', '不是', '不会', '不能', '的话', '可能', '需要', '大家', '其实', '甚至', '比如', '例如', '而是', '同时', '另外', '最后', '首先', '其次', '一直', '开始', '出现', '成为', '觉得', '知道', '所有', '很多', '更多', '一定', '特别', '真的', '当然', '如何', '之间', '之一', '方面', '正在'])
+
+# 连续的汉字。候选词只能是纯汉字片段，所以只需在汉字串内部提取
+_HAN_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]{2,}')
+
+
+def count_terms(content: str, segmenter=None) -> Counter:
+    """
+    统计候选关键词的出现次数：汉字串交给分词后端切出候选词，去掉单字、停用词和虚词
+    :param content: 正文
+    :param segmenter: 分词后端（见 segmenter.get_segmenter），默认由 KEYWORD_SEGMENTER 环境变量决定
+    :return: 词 -> 次数（按首次出现的顺序）
+    """
+    segmenter = segmenter or get_segmenter()
+
+    # 用正则一次切出所有汉字串，候选词按出现顺序计数（决定同频词的先后顺序）
+    word_freq = Counter()
+    for run in _HAN_RUN_PATTERN.findall(content):
+        word_freq.update(segmenter.cut_run(run))
+
+    # 停用词过滤只需检查去重后的候选词
+    if segmenter.filter_suffixes:
+        rejected = [word for word in word_freq if word in STOP_WORDS or word[-1] in STOP_SUFFIXES]
+    else:
+        rejected = [word for word in word_freq if len(word) < 2 or word in STOP_WORDS or word in FUNCTION_WORDS]
+    for word in rejected:
+        del word_freq[word]
+    return word_freq
+
+
+def rank_keywords(term_counts: Counter, index: Optional[DocumentFrequencyIndex] = None,
+                  top_n=10, min_count=2) -> List[Dict[str, Any]]:
+    """
+    对候选词排序
+    :param term_counts: count_terms 的结果
+    :param index: 文档频率索引；为None或收录的文章少于 TFIDF_MIN_DOCUMENTS 时按词频排序
+    :param top_n: 最多返回的关键词数
+    :param min_count: 最低出现次数
+    :return: [{"word": 词, "count": 次数}]，按 TF-IDF 排序时另有 "tfidf" 分数
+    """
+    if index is None or index.doc_count < TFIDF_MIN_DOCUMENTS:
+        # 过滤掉频次太低的词
+        return [{"word": word, "count": count}
+                for word, count in term_counts.most_common(15) if count >= min_count][:top_n]
+
+    total = sum(term_counts.values()) or 1
+    scored = [(count / total * index.idf(word), word, count)
+              for word, count in term_counts.items() if count >= min_count]
+    return [{"word": word, "count": count, "tfidf": round(score, 4)}
+            for score, word, count in heapq.nlargest(top_n, scored, key=lambda item: item[0])]
+
+
+def extract_keywords(content: str, top_n=10, min_count=2, segmenter=None) -> List[Dict[str, Any]]:
+    """
+    基于词频提取关键词（不使用语料库）
+    :return: [{"word": 词, "count": 次数}]
+    """
+    return rank_keywords(count_terms(content, segmenter), top_n=top_n, min_count=min_count)
+
+
+def content_hash(content: str) -> str:
+    """正文内容哈希，作为分析缓存的键"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, max_entries=64):
+        """
+        初始化分析缓存（线程安全）
+        :param max_entries: 最多缓存的文章数，超出时淘汰最久未使用的
+        """
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, content: str) -> Dict[str, Any]:
+        """
+        分析正文，同样的内容直接返回缓存的结果（调用方不应修改返回值）
+        :return: {"content_hash", "word_count", "paragraphs", "paragraph_count", "term_counts"}
+        """
+        key = content_hash(content)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return analysis
+            self.misses += 1
+
+        paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
+        analysis = {
+            "content_hash": key,
+            "word_count": len(content),
+            "paragraphs": paragraphs,
+            "paragraph_count": len(paragraphs),
+            "term_counts": count_terms(content)
+        }
+
+        with self._lock:
+            self._entries[key] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+
+_default_cache = AnalysisCache()
+
+
+def analyze_content(content: str) -> Dict[str, Any]:
+    """
+    使用进程内共享的缓存分析正文，关键词按当前语料库排序
+    :return: 缓存的分析结果，另加 "keywords"
+    """
+    analysis = _default_cache.analyze(content)
+    return dict(analysis, keywords=rank_keywords(analysis["term_counts"], get_document_index()))
+
+
+def index_article(article_data: Dict[str, Any], index: Optional[DocumentFrequencyIndex] = None) -> bool:
+    """
+    把文章的词登记到文档频率索引（保存文章后调用）
+    :return: 是否为新收录的文章
+    """
+    index = index or get_document_index()
+    analysis = _default_cache.analyze(article_data.get("content", ""))
+    try:
+        return index.add_document(analysis["content_hash"], analysis["term_counts"])
+    except OSError as e:
+        logger.warning(f"更新TF-IDF索引失败: {e}")
+        return False
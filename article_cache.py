@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按URL索引的文章缓存
+以规范化后的文章URL为键，记录已保存文章的JSON文件路径、内容哈希和缓存时间；
+重复请求同一篇文章时直接读取已保存的文件，不再启动浏览器爬取，也不会再写一个新的时间戳目录
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# 文章链接 https://mp.weixin.qq.com/s?__biz=..&mid=..&idx=..&sn=.. 中唯一确定一篇文章的参数
+ARTICLE_ID_PARAMS = ('__biz', 'mid', 'idx', 'sn')
+
+# 分享、转发时附加的跟踪参数，与文章内容无关
+TRACKING_PARAMS = frozenset([
+    'chksm', 'scene', 'subscene', 'ascene', 'srcid', 'sharer_sharetime', 'sharer_shareid',
+    'sharer_shareinfo', 'sharer_shareinfo_first', 'clicktime', 'enterid', 'sessionid',
+    'devicetype', 'version', 'nettype', 'lang', 'abtest_cookie', 'exportkey', 'pass_ticket',
+    'wx_header', 'from', 'isappinstalled', 'key', 'uin', 'rd2werd', 'mpshare', 'poc_token',
+])
+
+
+def normalize_article_url(url: str) -> str:
+    """
+    规范化文章URL：统一协议和主机名，去掉锚点和跟踪参数
+    长链接只保留 __biz/mid/idx/sn，短链接 /s/xxx 去掉全部查询参数
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    path = parts.path.rstrip('/') or '/'
+    params = parse_qsl(parts.query)
+
+    if path == '/s' and any(name in ARTICLE_ID_PARAMS for name, _ in params):
+        values = dict(params)
+        kept = [(name, values[name]) for name in ARTICLE_ID_PARAMS if name in values]
+    elif path.startswith('/s/'):
+        kept = []
+    else:
+        kept = sorted((name, value) for name, value in params
+                      if name not in TRACKING_PARAMS and not name.startswith('utm_'))
+
+    return urlunsplit(('https', host, path, urlencode(kept), ''))
+
+
+def article_content_hash(article_data: Dict[str, Any]) -> str:
+    """计算文章内容的哈希，用于判断缓存过期后文章是否有变化"""
+    digest = hashlib.sha256()
+    for field in ('title', 'author', 'content'):
+        digest.update(str(article_data.get(field, '')).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArticleCache:
+    def __init__(self, root="articles/.article_cache", ttl=86400, max_entries=500):
+        """
+        初始化文章缓存
+        :param root: 缓存索引目录，每篇文章一个小的JSON记录（文章本身仍保存在文章目录中）
+        :param ttl: 缓存有效期（秒），过期后需重新爬取并比较内容哈希
+        :param max_entries: 最多缓存的文章数，超出时淘汰最久未使用的记录
+        """
+        self.root = root
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def lookup(self, url, download_images=True) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        查找文章的缓存记录
+        :param url: 文章URL（会先规范化）
+        :param download_images: 本次是否需要图片，缓存时未下载图片的记录不能满足需要图片的请求
+        :return: (缓存记录, 是否仍在有效期内)；没有可用记录时返回 (None, False)
+        """
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None, False
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取文章缓存失败，忽略该记录: {e}")
+            return None, False
+
+        if download_images and not entry.get('download_images'):
+            return None, False
+
+        # 文章目录被删除时缓存失效
+        if not all(os.path.exists(item['path']) for item in entry.get('saved_files', [])):
+            self._remove(entry_path)
+            return None, False
+
+        # 更新修改时间，作为LRU淘汰的依据
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        fresh = time.time() - entry.get('cached_at', 0) < self.ttl
+        return entry, fresh
+
+    def load_article(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """从缓存记录指向的文章JSON文件中读取文章数据"""
+        try:
+            with open(entry['json_path'], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取缓存的文章失败: {e}")
+            return None
+
+    def put(self, url, article_data: Dict[str, Any], saved_files: List[Dict[str, str]], download_images=True):
+        """记录刚保存的文章"""
+        json_path = next((item['path'] for item in saved_files if item.get('type') == 'json'), None)
+        if not json_path:
+            return
+
+        entry = {
+            'url': normalize_article_url(url),
+            'json_path': json_path,
+            'saved_files': saved_files,
+            'content_hash': article_content_hash(article_data),
+            'download_images': bool(download_images),
+            'cached_at': time.time()
+        }
+        self._write_entry(self._entry_path(url), entry)
+        self._evict()
+
+    def touch(self, url, entry: Dict[str, Any]):
+        """重新验证后文章内容未变，刷新缓存时间"""
+        entry['cached_at'] = time.time()
+        self._write_entry(self._entry_path(url), entry)
+
+    def invalidate(self, url):
+        """删除某篇文章的缓存记录"""
+        self._remove(self._entry_path(url))
+
+    def _entry_path(self, url):
+        key = hashlib.sha1(normalize_article_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, f"{key}.json")
+
+    def _write_entry(self, path, entry):
+        atomic_write(path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+    def _evict(self):
+        """记录数超过上限时，按修改时间淘汰最久未使用的记录"""
+        with self._lock:
+            entries = []
+            with os.scandir(self.root) as it:
+                for item in it:
+                    if item.name.endswith('.json'):
+                        try:
+                            entries.append((item.stat().st_mtime, item.path))
+                        except FileNotFoundError:
+                            continue
+
+            excess = len(entries) - self.max_entries
+            if excess <= 0:
+                return
+            entries.sort()
+            for _, path in entries[:excess]:
+                self._remove(path)
+            logger.info(f"文章缓存超出上限 {self.max_entries}，淘汰 {excess} 条记录")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已爬取文章的目录数据库（SQLite，WAL模式）
+WeixinSpider.save_article_to_file 每保存一篇文章写入一行（URL、标题、作者、发布时间、爬取时间和各文件路径），
+“是否爬过某个URL”“某作者的文章”“本周爬取的总字数”这类查询走索引，不必遍历解析 articles/ 下的每个JSON文件。
+文章正文和读书笔记同时写入全文检索索引（见 article_search），正文的 SimHash 指纹按段建索引，用于查找转载的近似重复文章（见 simhash）。
+
+用法:
+    python article_catalog.py backfill [articles目录] [笔记目录]  # 把已保存的文章和笔记补录进目录和检索索引（并清除文件已删除的记录）
+    python article_catalog.py stats                              # 查看统计
+    python article_catalog.py search 关键词                      # 全文检索
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from article_cache import normalize_article_url
+from article_search import DOC_KINDS, SEARCH_RANK, SEARCH_SCHEMA, build_match_query, cjk_tokens, make_snippet, notes_title
+from article_store import make_article_id
+from simhash import (NEAR_DUPLICATE_DISTANCE, SIMHASH_BANDS, from_sqlite_int, hamming_distance, has_fingerprint,
+                     parse_simhash, simhash, simhash_bands, to_sqlite_int)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.getenv("ARTICLE_CATALOG_PATH", "articles/.catalog.db")
+
+SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    json_path      TEXT PRIMARY KEY,
+    article_id     TEXT NOT NULL,
+    url            TEXT NOT NULL DEFAULT '',
+    normalized_url TEXT NOT NULL DEFAULT '',
+    title          TEXT NOT NULL DEFAULT '',
+    author         TEXT NOT NULL DEFAULT '',
+    publish_time   TEXT NOT NULL DEFAULT '',
+    crawl_time     TEXT NOT NULL DEFAULT '',
+    word_count     INTEGER NOT NULL DEFAULT 0,
+    image_count    INTEGER NOT NULL DEFAULT 0,
+    save_dir       TEXT NOT NULL,
+    txt_path       TEXT,
+    html_path      TEXT,
+    images_dir     TEXT,
+    saved_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_normalized_url ON articles(normalized_url);
+CREATE INDEX IF NOT EXISTS idx_articles_article_id ON articles(article_id);
+CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
+CREATE INDEX IF NOT EXISTS idx_articles_author ON articles(author, crawl_time);
+CREATE INDEX IF NOT EXISTS idx_articles_publish_time ON articles(publish_time);
+CREATE INDEX IF NOT EXISTS idx_articles_crawl_time ON articles(crawl_time);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    json_path TEXT PRIMARY KEY,
+    simhash   INTEGER NOT NULL,
+    band0     INTEGER NOT NULL,
+    band1     INTEGER NOT NULL,
+    band2     INTEGER NOT NULL,
+    band3     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band0 ON fingerprints(band0);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band1 ON fingerprints(band1);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band2 ON fingerprints(band2);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band3 ON fingerprints(band3);
+"""
+
+_COLUMNS = ('json_path', 'article_id', 'url', 'normalized_url', 'title', 'author', 'publish_time', 'crawl_time',
+            'word_count', 'image_count', 'save_dir', 'txt_path', 'html_path', 'images_dir', 'saved_at')
+
+# 查询结果返回的字段
+_RESULT_COLUMNS = ('article_id', 'title', 'author', 'publish_time', 'crawl_time', 'url',
+                   'word_count', 'image_count', 'save_dir', 'json_path', 'txt_path', 'html_path', 'images_dir')
+
+_SAVED_FILE_COLUMNS = (('json', 'json_path'), ('txt', 'txt_path'), ('html', 'html_path'), ('images_dir', 'images_dir'))
+
+
+class ArticleCatalog:
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        """
+        打开（或创建）目录数据库
+        :param path: 数据库文件路径；WAL模式下读取不会被写入阻塞，多个进程可同时打开
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # 爬取线程写入、工具调用读取共用一个连接，由锁串行化
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.executescript(SEARCH_SCHEMA)
+            self._conn.execute("INSERT INTO search_index(search_index, rank) VALUES('rank', ?)", (SEARCH_RANK,))
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._rebuild_search_index()
+
+    def record(self, article_data: Dict[str, Any], saved_files: List[Dict[str, str]]) -> Optional[str]:
+        """
+        登记一次保存（同一个JSON文件重复登记时覆盖）
+        :param article_data: 文章数据
+        :param saved_files: 已保存的文件列表（get_saved_files_info 的返回值）
+        :return: 文章ID，没有JSON文件时返回None
+        """
+        row = self._make_row(article_data, saved_files)
+        if row is None:
+            return None
+        with self._transaction() as conn:
+            self._insert_row(conn, row)
+            self._index_document(conn, row['article_id'], 'article', row['json_path'],
+                                 row['title'], article_data.get('content', ''))
+            self._insert_fingerprint(conn, row['json_path'], article_data)
+        return row['article_id']
+
+    def find_near_duplicates(self, fingerprint: int, max_distance=NEAR_DUPLICATE_DISTANCE, limit=5) -> List[Dict[str, Any]]:
+        """
+        按 SimHash 指纹查找近似重复的已保存文章（同一篇文章只返回最近一次保存）
+        :param fingerprint: 正文的 SimHash（无符号64位）
+        :param max_distance: 最大汉明距离，不超过 NEAR_DUPLICATE_DISTANCE（分段查找只能保证找全这个距离以内的文章）
+        :param limit: 最多返回的条数
+        :return: [{"article_id", "title", "url", "json_path", "image_count", "images_dir", "saved_files", "distance"}]，按距离排序
+        """
+        max_distance = min(max_distance, NEAR_DUPLICATE_DISTANCE)
+        bands = simhash_bands(fingerprint)
+        rows = self._query(
+            "SELECT a.*, f.simhash FROM fingerprints f JOIN articles a ON a.json_path = f.json_path "
+            f"WHERE {' OR '.join(f'f.band{i} = ?' for i in range(SIMHASH_BANDS))} ORDER BY a.saved_at DESC",
+            tuple(bands))
+
+        matches = {}
+        for row in rows:
+            distance = hamming_distance(fingerprint, from_sqlite_int(row['simhash']))
+            if distance <= max_distance and row['article_id'] not in matches:
+                matches[row['article_id']] = {
+                    **{column: row[column] for column in ('article_id', 'title', 'url', 'json_path', 'image_count', 'images_dir')},
+                    "saved_files": self._saved_files(row),
+                    "distance": distance
+                }
+        return sorted(matches.values(), key=lambda match: match['distance'])[:limit]
+
+    def index_notes(self, article_data: Dict[str, Any], notes_path, notes_content: str):
+        """把保存的读书笔记加入全文检索索引"""
+        with self._transaction() as conn:
+            self._index_document(conn, make_article_id(article_data), 'notes', notes_path,
+                                 article_data.get('title', '') or '', notes_content)
+
+    def find_notes(self, article_id) -> List[str]:
+        """文章已保存的读书笔记文件（最近保存的在前）"""
+        rows = self._query("SELECT path FROM search_docs WHERE article_id = ? AND kind = 'notes' ORDER BY rowid DESC",
+                           (article_id,))
+        return [row['path'] for row in rows]
+
+    def search(self, query: str, limit=10, kind=None) -> List[Dict[str, Any]]:
+        """
+        全文检索文章正文和读书笔记（按 bm25 相关度排序，标题命中的权重更高）
+        :param query: 查询词，空格分隔的多个词须同时出现
+        :param limit: 最多返回的条数
+        :param kind: 只检索 article（正文）或 notes（读书笔记），默认都检索
+        :return: [{"article_id", "kind", "title", "path", "score", "snippet"}]，文件已删除的结果会被跳过
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        if kind is not None and kind not in DOC_KINDS:
+            raise ValueError(f"不支持的检索类型: {kind}，可选值: {', '.join(DOC_KINDS)}")
+
+        limit = max(1, int(limit))
+        kind_clause = " AND d.kind = ?" if kind else ""
+        # 多取一些，跳过文件已被删除的结果后仍能凑够 limit 条
+        rows = self._query(
+            "SELECT d.article_id, d.kind, d.title, d.path, s.rank AS score "
+            "FROM search_index s JOIN search_docs d ON d.rowid = s.rowid "
+            f"WHERE search_index MATCH ?{kind_clause} ORDER BY s.rank LIMIT ?",
+            (match, *((kind,) if kind else ()), limit * 2))
+
+        results = []
+        for row in rows:
+            text = self._load_document_text(row['kind'], row['path'])
+            if text is None:
+                continue
+            results.append({**dict(row), "score": round(-row['score'], 4), "snippet": make_snippet(text, query)})
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_record(self, article_id) -> Optional[Dict[str, Any]]:
+        """文章ID对应的最近一次保存，格式与 ArticleStore 的索引记录相同"""
+        rows = self._query("SELECT * FROM articles WHERE article_id = ? ORDER BY saved_at DESC LIMIT 1",
+                           (article_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            'id': row['article_id'],
+            'title': row['title'],
+            'url': row['url'],
+            'json_path': row['json_path'],
+            'saved_files': self._saved_files(row)
+        }
+
+    def find(self, url=None, title=None, author=None, since=None, until=None, limit=20) -> List[Dict[str, Any]]:
+        """
+        按条件查询已保存的文章（按爬取时间倒序），条件之间为“且”
+        :param url: 文章URL（规范化后精确匹配）
+        :param title: 标题包含的文字
+        :param author: 作者（精确匹配）
+        :param since: 爬取时间下限（含），如 2025-07-01 或 2025-07-01 08:00:00
+        :param until: 爬取时间上限（不含）
+        :param limit: 最多返回的条数
+        """
+        where, params = self._conditions(url=url, title=title, author=author, since=since, until=until)
+        rows = self._query(f"SELECT {', '.join(_RESULT_COLUMNS)} FROM articles{where} "
+                           f"ORDER BY crawl_time DESC, saved_at DESC LIMIT ?", (*params, max(1, int(limit))))
+        return [dict(row) for row in rows]
+
+    def statistics(self, since=None, until=None, top_authors=10) -> Dict[str, Any]:
+        """
+        汇总统计：文章数、不同URL数、总字数、总图片数，以及文章最多的作者
+        :param since: 爬取时间下限（含）
+        :param until: 爬取时间上限（不含）
+        """
+        where, params = self._conditions(since=since, until=until)
+        totals = self._query(
+            "SELECT COUNT(*) AS saves, COUNT(DISTINCT normalized_url) AS urls, "
+            "COALESCE(SUM(word_count), 0) AS total_words, COALESCE(SUM(image_count), 0) AS total_images, "
+            f"MIN(crawl_time) AS first_crawl, MAX(crawl_time) AS last_crawl FROM articles{where}", params)[0]
+        authors = self._query(
+            f"SELECT author, COUNT(*) AS articles, SUM(word_count) AS words FROM articles{where} "
+            "GROUP BY author ORDER BY articles DESC, words DESC LIMIT ?", (*params, top_authors))
+        return {
+            **dict(totals),
+            "top_authors": [dict(row) for row in authors]
+        }
+
+    def backfill(self, articles_dir="articles", notes_dir="reading_notes") -> Tuple[int, int]:
+        """
+        把目录中已保存的文章（以及读书笔记目录中的笔记）补录进数据库和检索索引，并删除文件已不存在的记录
+        :return: (新增条数, 删除条数)
+        """
+        known = {row['json_path'] for row in self._query("SELECT json_path FROM articles")}
+        indexed = {row['path'] for row in self._query("SELECT path FROM search_docs")}
+        fingerprinted = {row['json_path'] for row in self._query("SELECT json_path FROM fingerprints")}
+        added = 0
+        with self._transaction() as conn:
+            for json_path, article_data in iter_saved_articles(articles_dir):
+                row = self._make_row(article_data, saved_files_for(json_path))
+                if json_path not in known:
+                    if not row['crawl_time']:
+                        row['crawl_time'] = datetime.fromtimestamp(os.path.getmtime(json_path)).strftime('%Y-%m-%d %H:%M:%S')
+                    self._insert_row(conn, row)
+                    added += 1
+                if json_path not in indexed:
+                    self._index_document(conn, row['article_id'], 'article', json_path,
+                                         row['title'], article_data.get('content', ''))
+                if json_path not in fingerprinted:
+                    self._insert_fingerprint(conn, json_path, article_data)
+
+            if notes_dir and os.path.isdir(notes_dir):
+                for name in sorted(os.listdir(notes_dir)):
+                    path = os.path.join(notes_dir, name)
+                    if name.endswith('.md') and path not in indexed:
+                        notes_content = self._load_document_text('notes', path) or ''
+                        # 笔记文件没有记录对应的文章，按文件名登记
+                        self._index_document(conn, '', 'notes', path,
+                                             notes_title(notes_content, name[:-len('.md')]), notes_content)
+
+            missing = [(path,) for path in known if not os.path.exists(path)]
+            conn.executemany("DELETE FROM articles WHERE json_path = ?", missing)
+            conn.executemany("DELETE FROM fingerprints WHERE json_path = ?",
+                             [(path,) for path in fingerprinted if not os.path.exists(path)])
+            for path in indexed:
+                if not os.path.exists(path):
+                    self._delete_document(conn, path)
+        return added, len(missing)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @contextmanager
+    def _transaction(self):
+        """持有连接锁执行一个写事务，异常时回滚"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _rebuild_search_index(self):
+        """
+        升级旧版本的数据库：旧的 search_docs 没有保存入库原文，无法删除倒排表中的旧条目，
+        因此清空倒排表，按已保存的文件重新建立索引（文件已删除的文档一并移除）；已是新版本时不做任何事
+        """
+        with self._transaction() as conn:
+            # 在写事务中检查，多个进程同时打开旧数据库时只有一个执行升级
+            if 'body' in {row['name'] for row in conn.execute("PRAGMA table_info(search_docs)")}:
+                return
+            logger.info(f"正在重建全文检索索引: {self.path}")
+            conn.execute("ALTER TABLE search_docs ADD COLUMN body BLOB")
+            conn.execute("INSERT INTO search_index(search_index) VALUES('delete-all')")
+            for row in conn.execute("SELECT rowid, kind, path, title FROM search_docs").fetchall():
+                text = self._load_document_text(row['kind'], row['path'])
+                if text is None:
+                    conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row['rowid'],))
+                    continue
+                conn.execute("UPDATE search_docs SET content_hash = ?, body = ? WHERE rowid = ?",
+                             (self._document_hash(row['title'], text), zlib.compress(text.encode('utf-8')), row['rowid']))
+                conn.execute("INSERT INTO search_index (rowid, title, body) VALUES (?, ?, ?)",
+                             (row['rowid'], cjk_tokens(row['title']), cjk_tokens(text)))
+
+    @staticmethod
+    def _insert_row(conn, row: Dict[str, Any]):
+        conn.execute(f"INSERT OR REPLACE INTO articles ({', '.join(_COLUMNS)}) "
+                     f"VALUES ({', '.join(':' + column for column in _COLUMNS)})", row)
+
+    @staticmethod
+    def _index_document(conn, article_id, kind, path, title, text):
+        """
+        写入检索索引。同一文章的同样内容只索引一次（再次保存时只更新文件路径）；
+        同一路径的文件被覆盖时，先删除旧的文档（倒排条目和登记行）
+        """
+        digest = ArticleCatalog._document_hash(title, text)
+        existing = conn.execute("SELECT rowid, path FROM search_docs WHERE article_id = ? AND kind = ? AND content_hash = ?",
+                                (article_id, kind, digest)).fetchone()
+        if existing and existing['path'] == path:
+            return
+        ArticleCatalog._delete_document(conn, path)
+        if existing:
+            conn.execute("UPDATE search_docs SET path = ? WHERE rowid = ?", (path, existing['rowid']))
+            return
+
+        rowid = conn.execute("INSERT INTO search_docs (article_id, kind, path, title, content_hash, body) VALUES (?, ?, ?, ?, ?, ?)",
+                             (article_id, kind, path, title, digest, zlib.compress(text.encode('utf-8')))).lastrowid
+        conn.execute("INSERT INTO search_index (rowid, title, body) VALUES (?, ?, ?)",
+                     (rowid, cjk_tokens(title), cjk_tokens(text)))
+
+    @staticmethod
+    def _delete_document(conn, path):
+        """删除路径对应的检索文档：contentless 表要用入库时的词序列才能删除倒排条目，再删除登记行"""
+        row = conn.execute("SELECT rowid, title, body FROM search_docs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        conn.execute("INSERT INTO search_index (search_index, rowid, title, body) VALUES ('delete', ?, ?, ?)",
+                     (row['rowid'], cjk_tokens(row['title']), cjk_tokens(zlib.decompress(row['body']).decode('utf-8'))))
+        conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row['rowid'],))
+
+    @staticmethod
+    def _document_hash(title, text) -> str:
+        return hashlib.sha1(f"{title}\n{text}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _insert_fingerprint(conn, json_path, article_data: Dict[str, Any]):
+        """写入正文指纹：优先使用爬取时算好的 simhash 字段，旧文章没有时现算；正文太短的文章不登记指纹"""
+        content = article_data.get('content', '')
+        if not has_fingerprint(content):
+            conn.execute("DELETE FROM fingerprints WHERE json_path = ?", (json_path,))
+            return
+        value = article_data.get('simhash')
+        fingerprint = parse_simhash(value) if value else simhash(content)
+        conn.execute(f"INSERT OR REPLACE INTO fingerprints (json_path, simhash, "
+                     f"{', '.join(f'band{i}' for i in range(SIMHASH_BANDS))}) VALUES ({', '.join('?' * (SIMHASH_BANDS + 2))})",
+                     (json_path, to_sqlite_int(fingerprint), *simhash_bands(fingerprint)))
+
+    @staticmethod
+    def _saved_files(row) -> List[Dict[str, str]]:
+        return [{"type": file_type, "path": row[column]} for file_type, column in _SAVED_FILE_COLUMNS if row[column]]
+
+    @staticmethod
+    def _load_document_text(kind, path) -> Optional[str]:
+        """读取检索结果的原文（用于截取摘要片段），文件不存在时返回None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('content', '') if kind == 'article' else f.read()
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _conditions(url=None, title=None, author=None, since=None, until=None) -> Tuple[str, tuple]:
+        clauses, params = [], []
+        if url:
+            clauses.append("normalized_url = ?")
+            params.append(normalize_article_url(url))
+        if title:
+            clauses.append("title LIKE ? ESCAPE '\\'")
+            params.append('%' + title.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if author:
+            clauses.append("author = ?")
+            params.append(author)
+        if since:
+            clauses.append("crawl_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("crawl_time < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+    @staticmethod
+    def _make_row(article_data: Dict[str, Any], saved_files: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        paths = {item.get('type'): item.get('path') for item in saved_files or []}
+        json_path = paths.get('json')
+        if not json_path:
+            return None
+        url = article_data.get('url', '') or ''
+        return {
+            'json_path': json_path,
+            'article_id': make_article_id(article_data),
+            'url': url,
+            'normalized_url': normalize_article_url(url) if url else '',
+            'title': article_data.get('title', '') or '',
+            'author': article_data.get('author', '') or '',
+            'publish_time': article_data.get('publish_time', '') or '',
+            'crawl_time': article_data.get('crawl_time', '') or '',
+            'word_count': int(article_data.get('word_count') or len(article_data.get('content', ''))),
+            'image_count': int(article_data.get('image_count') or len(article_data.get('images', []))),
+            'save_dir': os.path.dirname(json_path),
+            'txt_path': paths.get('txt'),
+            'html_path': paths.get('html'),
+            'images_dir': paths.get('images_dir'),
+            'saved_at': time.time()
+        }
+
+
+_default_catalog: Optional[ArticleCatalog] = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_article_catalog() -> ArticleCatalog:
+    """获取默认目录数据库（单例模式）"""
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = ArticleCatalog()
+    return _default_catalog
+
+
+def iter_saved_articles(articles_dir="articles") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """遍历 articles/ 下各文章目录中保存的JSON文件（跳过 . 开头的内部目录）"""
+    for entry in sorted(os.scandir(articles_dir), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        for name in os.listdir(entry.path):
+            if name.endswith('.json'):
+                path = os.path.join(entry.path, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        yield path, json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"跳过无法读取的文章 {path}: {e}")
+
+
+def saved_files_for(json_path) -> List[Dict[str, str]]:
+    """根据文章目录中的JSON文件推出同一次保存的其他文件（与 save_article_to_file 的命名一致）"""
+    base_path = json_path[:-len('.json')]
+    saved_files = [{"type": "json", "path": json_path}]
+    for file_type, path in (('txt', base_path + '.txt'), ('html', base_path + '.html'),
+                            ('images_dir', os.path.join(os.path.dirname(json_path), 'images'))):
+        if os.path.exists(path):
+            saved_files.append({"type": file_type, "path": path})
+    return saved_files
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    catalog = get_article_catalog()
+
+    if command == "backfill":
+        articles_dir = sys.argv[2] if len(sys.argv) > 2 else "articles"
+        notes_dir = sys.argv[3] if len(sys.argv) > 3 else "reading_notes"
+        added, removed = catalog.backfill(articles_dir, notes_dir)
+        print(f"新增 {added} 篇文章，删除 {removed} 条失效记录")
+    elif command == "search" and len(sys.argv) > 2:
+        for result in catalog.search(' '.join(sys.argv[2:])):
+            print(f"[{result['kind']}] {result['title']} ({result['score']})\n    {result['snippet']}\n    {result['path']}")
+        return
+    elif command != "stats":
+        print(__doc__)
+        return
+    print(json.dumps(catalog.statistics(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 lxml 的文章提取器
+一次遍历页面树定位标题、作者、发布时间和正文，再遍历一次正文子树收集纯文本和图片；
+图片地址替换使用 URL -> 图片信息 的字典，不再逐个图片嵌套查找
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List
+
+from lxml import etree
+from lxml import html as lxml_html
+
+
+# 各字段的选择器，按优先级排列（支持 #id、.class 和标签名三种形式）
+TITLE_SELECTORS = ['#activity-name', '.rich_media_title', 'h1', '.title']
+AUTHOR_SELECTORS = ['#js_author_name', '.rich_media_meta_text', '.author', '.by']
+TIME_SELECTORS = ['#publish_time', '.rich_media_meta_text', '.time', '.date']
+CONTENT_SELECTORS = ['#js_content', '.rich_media_content', '.content', 'article']
+
+FIELD_SELECTORS = {
+    'title': TITLE_SELECTORS,
+    'author': AUTHOR_SELECTORS,
+    'publish_time': TIME_SELECTORS,
+    'content': CONTENT_SELECTORS,
+}
+
+# 提取文本时跳过这些标签的内容
+_SKIP_TEXT_TAGS = frozenset(['script', 'style'])
+
+_PUBLISH_TIMESTAMP_PATTERN = re.compile(r'var\s+ct\s*=\s*"(\d{10})"')
+
+
+def _build_selector_index():
+    """把选择器列表转换为 (类型, 值) -> [(字段, 优先级)] 的索引，遍历时每个元素只需查几次字典"""
+    index: Dict[tuple, List[tuple]] = {}
+    for field, selectors in FIELD_SELECTORS.items():
+        for priority, selector in enumerate(selectors):
+            if selector.startswith('#'):
+                key = ('id', selector[1:])
+            elif selector.startswith('.'):
+                key = ('class', selector[1:])
+            else:
+                key = ('tag', selector)
+            index.setdefault(key, []).append((field, priority))
+    return index
+
+
+_SELECTOR_INDEX = _build_selector_index()
+
+
+def extract_article(page_source: str) -> Dict[str, Any]:
+    """
+    从页面HTML中提取文章内容
+    :param page_source: 页面HTML
+    :return: 文章数据字典（title, author, publish_time, content, content_html, images, word_count, image_count）
+    """
+    root = _parse_document(page_source)
+
+    # 单遍遍历：记录每个选择器在文档中的第一个匹配元素
+    first_matches = {field: [None] * len(selectors) for field, selectors in FIELD_SELECTORS.items()}
+    for element in root.iter(etree.Element):
+        keys = [('tag', element.tag)]
+        element_id = element.get('id')
+        if element_id:
+            keys.append(('id', element_id))
+        class_attr = element.get('class')
+        if class_attr:
+            keys.extend(('class', name) for name in class_attr.split())
+
+        for key in keys:
+            for field, priority in _SELECTOR_INDEX.get(key, ()):
+                if first_matches[field][priority] is None:
+                    first_matches[field][priority] = element
+
+    title = _first_text(first_matches['title'], "未知标题")
+    author = _first_text(first_matches['author'], "未知作者")
+
+    # 静态HTML中的 #publish_time 为空（由页面脚本填充），此时从脚本变量中读取
+    publish_time = (
+        _first_text(first_matches['publish_time'][:1], "")
+        or publish_time_from_script(page_source)
+        or _first_text(first_matches['publish_time'][1:], "未知时间")
+    )
+
+    content_element = next((el for el in first_matches['content'] if el is not None), None)
+    if content_element is not None:
+        strings, img_elements = _collect_strings_and_images(content_element)
+        content_text = '\n'.join(strings)
+        content_html = lxml_html.tostring(content_element, encoding='unicode', with_tail=False)
+        images = _build_images_info(img_elements)
+    else:
+        content_text = "无法提取内容"
+        content_html = ""
+        images = []
+
+    return {
+        'title': title,
+        'author': author,
+        'publish_time': publish_time,
+        'content': content_text,
+        'content_html': content_html,
+        'images': images,
+        'word_count': len(content_text),
+        'image_count': len(images)
+    }
+
+
+def publish_time_from_script(page_source: str) -> str:
+    """从页面脚本的 ct 变量（发布时间戳）中解析发布时间"""
+    match = _PUBLISH_TIMESTAMP_PATTERN.search(page_source)
+    if not match:
+        return ""
+    return datetime.fromtimestamp(int(match.group(1))).strftime('%Y-%m-%d %H:%M')
+
+
+def rewrite_image_urls(content_html: str, images: List[Dict[str, Any]]) -> str:
+    """
+    把正文HTML中的图片地址替换为本地相对路径，下载失败的图片替换为占位块
+    :param content_html: 正文HTML
+    :param images: 图片信息列表（已填写下载结果）
+    :return: 替换后的HTML
+    """
+    url_to_image: Dict[str, Dict[str, Any]] = {}
+    for img_info in images:
+        if img_info.get('download_success') and img_info.get('filename'):
+            for key in (img_info.get('url'), img_info.get('data_src'), img_info.get('original_src')):
+                if key:
+                    url_to_image.setdefault(key, img_info)
+
+    root = lxml_html.fragment_fromstring(content_html, create_parent='div')
+    for img_tag in list(root.iter('img')):
+        img_info = url_to_image.get(img_tag.get('src', '')) or url_to_image.get(img_tag.get('data-src', ''))
+        if img_info:
+            # 替换为相对路径
+            img_tag.set('src', f"images/{img_info['filename']}")
+            img_tag.attrib.pop('data-src', None)
+            if not img_tag.get('alt'):
+                img_tag.set('alt', f"图片 {img_info.get('index', '')}")
+        else:
+            # 如果图片下载失败，显示占位符
+            placeholder = root.makeelement('div', {'class': 'image-placeholder'})
+            placeholder.text = f"图片加载失败: {img_tag.get('alt', '未知图片')}"
+            placeholder.tail = img_tag.tail
+            img_tag.getparent().replace(img_tag, placeholder)
+
+    return ''.join(lxml_html.tostring(child, encoding='unicode') for child in root)
+
+
+def _parse_document(page_source: str):
+    try:
+        return lxml_html.document_fromstring(page_source)
+    except ValueError:
+        # 带编码声明的字符串无法直接解析，转为字节后交给lxml处理
+        return lxml_html.document_fromstring(page_source.encode('utf-8'))
+
+
+def _first_text(candidates, default) -> str:
+    """按优先级返回第一个有文本的候选元素的文本"""
+    for element in candidates:
+        if element is None:
+            continue
+        strings, _ = _collect_strings_and_images(element)
+        text = ''.join(strings)
+        if text:
+            return text
+    return default
+
+
+def _collect_strings_and_images(element):
+    """
+    遍历元素子树，收集去除首尾空白后的非空文本片段和所有img元素
+    （跳过脚本、样式和注释的内容，与 BeautifulSoup 的 get_text(strip=True) 行为一致）
+    """
+    strings: List[str] = []
+    images = []
+    # 栈中既有元素也有字符串（元素之后的tail文本），用显式栈避免深层嵌套时递归过深
+    stack = [element]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            text = node.strip()
+            if text:
+                strings.append(text)
+            continue
+
+        # tail属于节点之后的文本，先压栈，待整个子树处理完后再输出
+        if node is not element and node.tail:
+            stack.append(node.tail)
+
+        tag = node.tag
+        if not isinstance(tag, str) or tag in _SKIP_TEXT_TAGS:
+            # 注释、处理指令、脚本和样式的内容不计入文本
+            continue
+        if tag == 'img':
+            images.append(node)
+        if node.text:
+            text = node.text.strip()
+            if text:
+                strings.append(text)
+        stack.extend(reversed(node))
+
+    return strings, images
+
+
+def _build_images_info(img_elements) -> List[Dict[str, Any]]:
+    """根据img元素构建图片信息列表"""
+    images = []
+    for i, img in enumerate(img_elements):
+        img_info = {
+            'index': i + 1,
+            'alt': img.get('alt', ''),
+            'title': img.get('title', ''),
+            'original_src': img.get('src', ''),
+            'data_src': img.get('data-src', ''),
+            'download_success': False,
+            'local_path': '',
+            'filename': ''
+        }
+
+        # 确定实际的图片URL
+        img_url = img_info['data_src'] or img_info['original_src']
+
+        if img_url:
+            # 处理相对URL
+            if img_url.startswith('//'):
+                img_url = 'https:' + img_url
+            elif img_url.startswith('/'):
+                img_url = 'https://mp.weixin.qq.com' + img_url
+
+            img_info['url'] = img_url
+            images.append(img_info)
+
+    return images
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章全文检索
+倒排索引使用 SQLite FTS5（与文章目录同一个数据库）。FTS5 自带的分词器把连续的汉字当作一个词，
+所以入库前先把汉字串切成重叠的二元组（“大模型” -> “大模 模型”），查询词按同样方式切分后作为短语匹配，
+不依赖中文分词词典，任意位置的子串都能检索到。
+
+索引是 contentless 表，只存倒排表不存原文，摘要片段从命中文章的已保存文件中截取。
+contentless 表删除文档时必须提供当初入库的词序列，否则倒排表中的旧条目不会被删除，
+因此 search_docs 另存一份压缩的入库原文（body），更新或删除文档时据此重新切分并删除旧条目。
+"""
+
+import re
+from typing import Optional
+
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    rowid        INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_id   TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    path         TEXT NOT NULL UNIQUE,
+    title        TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL,
+    body         BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_article ON search_docs(article_id, kind, content_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    title, body, content='', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# 标题命中的权重（bm25 按列加权：title, body）
+SEARCH_RANK = "bm25(5.0, 1.0)"
+
+# 文档类型：文章正文 / 读书笔记
+DOC_KINDS = ('article', 'notes')
+
+_TOKEN_PATTERN = re.compile(r'[\u4e00-\u9fff]+|[^\W_\u4e00-\u9fff]+')
+_HAN_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+def cjk_tokens(text: str) -> str:
+    """把文本转换为入库的词序列：汉字串切成二元组，其他单词（英文、数字）原样保留，以空格分隔"""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        word = match.group()
+        if len(word) > 1 and _HAN_PATTERN.match(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return ' '.join(tokens)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    把用户输入转换为 FTS5 查询：空格分隔的每个词都必须出现（AND），
+    词内的二元组作为短语匹配（必须相邻出现）；单个汉字按前缀匹配
+    :return: MATCH 表达式，没有可检索的字符时返回None
+    """
+    phrases = []
+    for term in query.split():
+        tokens = cjk_tokens(term).split()
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(tokens) + '"'
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _HAN_PATTERN.match(tokens[0]):
+            phrase += '*'
+        phrases.append(phrase)
+    return ' AND '.join(phrases) or None
+
+
+def make_snippet(text: str, query: str, width=120) -> str:
+    """
+    截取包含查询词的片段，命中的词用 ** 标出
+    :param text: 原文
+    :param query: 用户输入的查询
+    :param width: 片段长度（字符）
+    """
+    terms = sorted({term for term in query.split() if term}, key=len, reverse=True)
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term.lower()) for term in terms) if pos >= 0]
+
+    first = min(positions) if positions else 0
+    start = max(0, first - width // 3)
+    end = min(len(text), start + width)
+    snippet = ' '.join(text[start:end].split())
+    if terms:
+        snippet = re.sub('|'.join(re.escape(term) for term in terms), lambda m: f"**{m.group()}**",
+                         snippet, flags=re.IGNORECASE).replace('****', '')
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+def notes_title(notes_content: str, fallback: str) -> str:
+    """读书笔记的标题：第一个 Markdown 标题行，没有时使用 fallback"""
+    for line in notes_content.splitlines():
+        if line.startswith('#'):
+            return line.lstrip('#').strip()
+    return fallback
+
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章句柄存储
+爬取后为每篇文章分配一个短ID，服务器端记录ID对应的已保存文件；
+分析类工具只需传入ID，客户端不必把整篇文章（正文HTML、图片列表）再经由模型上下文传回服务器
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from atomic_file import atomic_write
+from article_cache import article_content_hash, normalize_article_url
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_ID_LENGTH = 12
+_ARTICLE_ID_PATTERN = re.compile(r'^[0-9a-f]{%d}$' % ARTICLE_ID_LENGTH)
+
+
+def make_article_id(article_data: Dict[str, Any]) -> str:
+    """生成文章ID：有URL时按规范化URL生成（同一篇文章ID不变），否则按内容哈希生成"""
+    url = article_data.get('url')
+    if url:
+        return hashlib.sha1(normalize_article_url(url).encode('utf-8')).hexdigest()[:ARTICLE_ID_LENGTH]
+    return article_content_hash(article_data)[:ARTICLE_ID_LENGTH]
+
+
+def is_article_id(value) -> bool:
+    """判断字符串是否是合法的文章ID（也用于防止路径穿越）"""
+    return isinstance(value, str) and bool(_ARTICLE_ID_PATTERN.match(value))
+
+
+class ArticleStore:
+    def __init__(self, root="articles/.article_index", memory_size=32, catalog=None):
+        """
+        初始化文章存储
+        :param root: 索引目录，每个ID一个记录，指向文章目录中保存的JSON文件，服务器重启后ID仍然有效
+        :param memory_size: 内存中缓存的文章数，最近使用的文章不必重新读取JSON文件
+        :param catalog: 文章目录数据库（ArticleCatalog，可选），索引目录中没有的ID再到目录数据库中查找
+        """
+        self.root = root
+        self.catalog = catalog
+        self.memory_size = max(1, int(memory_size))
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, article_data: Dict[str, Any], saved_files: Optional[List[Dict[str, str]]] = None) -> str:
+        """
+        登记文章并返回其ID
+        :param article_data: 文章数据
+        :param saved_files: 已保存的文件列表（get_saved_files_info 的返回值），提供时写入索引
+        """
+        article_id = make_article_id(article_data)
+        self._remember(article_id, article_data)
+
+        json_path = next((item['path'] for item in saved_files or [] if item.get('type') == 'json'), None)
+        if json_path:
+            record = {
+                'id': article_id,
+                'title': article_data.get('title', ''),
+                'url': article_data.get('url', ''),
+                'json_path': json_path,
+                'saved_files': saved_files
+            }
+            self._write_record(article_id, record)
+        return article_id
+
+    def get(self, article_id) -> Optional[Dict[str, Any]]:
+        """按ID获取文章数据，内存中没有时从保存的JSON文件读取"""
+        if not is_article_id(article_id):
+            return None
+
+        with self._lock:
+            article_data = self._memory.get(article_id)
+            if article_data is not None:
+                self._memory.move_to_end(article_id)
+                return article_data
+
+        record = self.get_record(article_id)
+        if not record:
+            return None
+        try:
+            with open(record['json_path'], 'r', encoding='utf-8') as f:
+                article_data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取文章 {article_id} 失败: {e}")
+            return None
+
+        self._remember(article_id, article_data)
+        return article_data
+
+    def get_record(self, article_id) -> Optional[Dict[str, Any]]:
+        """获取ID的索引记录（标题、URL和已保存的文件）"""
+        if not is_article_id(article_id):
+            return None
+        try:
+            with open(self._record_path(article_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self.catalog.get_record(article_id) if self.catalog else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取文章索引 {article_id} 失败: {e}")
+            return None
+
+    def list_records(self, limit=100) -> List[Dict[str, Any]]:
+        """列出最近登记的文章索引记录（按登记时间倒序）"""
+        entries = []
+        with os.scandir(self.root) as it:
+            for item in it:
+                if item.name.endswith('.json'):
+                    try:
+                        entries.append((item.stat().st_mtime, item.name[:-len('.json')]))
+                    except FileNotFoundError:
+                        continue
+
+        records = []
+        for _, article_id in sorted(entries, reverse=True)[:limit]:
+            record = self.get_record(article_id)
+            if record:
+                records.append(record)
+        return records
+
+    def _remember(self, article_id, article_data):
+        with self._lock:
+            self._memory[article_id] = article_data
+            self._memory.move_to_end(article_id)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _record_path(self, article_id):
+        return os.path.join(self.root, f"{article_id}.json")
+
+    def _write_record(self, article_id, record):
+        atomic_write(self._record_path(article_id), json.dumps(record, ensure_ascii=False).encode('utf-8'))
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原子写文件
+先写同目录下的临时文件再用 os.replace 替换目标文件：多个线程或进程同时写同一文件时，
+读取方看到的总是某一次完整的写入，不会读到半个文件
+"""
+
+import os
+import uuid
+
+
+def atomic_write(path, data: bytes):
+    """
+    原子地写入文件，所在目录不存在时先创建
+    :param path: 目标文件路径
+    :param data: 文件内容
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
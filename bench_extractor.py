@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章提取器微基准
+在保存的页面上对比原先基于 BeautifulSoup 的提取流程（四组选择器级联 + find_all('img')
++ 重新解析HTML、逐个图片嵌套查找的地址替换）与 article_extractor 的 lxml 单遍提取
+
+用法:
+    python bench_extractor.py [页面.html ...] [--repeat 20]
+    不指定页面时使用 bench_fixtures/ 下的示例页面
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from article_extractor import extract_article, rewrite_image_urls
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+# =============================
+# 原先的 BeautifulSoup 实现（仅用于对比）
+# =============================
+def _legacy_text_by_selectors(soup, selectors, default=""):
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element:
+            text = element.get_text(strip=True)
+            if text:
+                return text
+    return default
+
+
+def _legacy_element_by_selectors(soup, selectors):
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element:
+            return element
+    return None
+
+
+def legacy_extract(page_source):
+    soup = BeautifulSoup(page_source, 'html.parser')
+    title = _legacy_text_by_selectors(soup, ['#activity-name', '.rich_media_title', 'h1', '.title'], "未知标题")
+    author = _legacy_text_by_selectors(soup, ['#js_author_name', '.rich_media_meta_text', '.author', '.by'], "未知作者")
+    publish_time = _legacy_text_by_selectors(soup, ['#publish_time', '.rich_media_meta_text', '.time', '.date'], "未知时间")
+    content_element = _legacy_element_by_selectors(soup, ['#js_content', '.rich_media_content', '.content', 'article'])
+
+    images = []
+    for i, img in enumerate(content_element.find_all('img')):
+        img_url = img.get('data-src', '') or img.get('src', '')
+        if img_url:
+            images.append({'index': i + 1, 'url': img_url, 'data_src': img.get('data-src', ''),
+                           'original_src': img.get('src', '')})
+
+    return {
+        'title': title,
+        'author': author,
+        'publish_time': publish_time,
+        'content': content_element.get_text(strip=True, separator='\n'),
+        'content_html': str(content_element),
+        'images': images
+    }
+
+
+def legacy_rewrite(content_html, images):
+    soup = BeautifulSoup(content_html, 'html.parser')
+    for img_tag in soup.find_all('img'):
+        original_src = img_tag.get('src', '')
+        data_src = img_tag.get('data-src', '')
+        for img_info in images:
+            img_url = img_info.get('url', '')
+            if (img_url == original_src or img_url == data_src) and img_info.get('download_success'):
+                img_tag['src'] = f"images/{img_info.get('filename', '')}"
+                if img_tag.get('data-src'):
+                    del img_tag['data-src']
+                break
+        else:
+            placeholder_div = soup.new_tag('div', **{'class': 'image-placeholder'})
+            placeholder_div.string = f"图片加载失败: {img_tag.get('alt', '未知图片')}"
+            img_tag.replace_with(placeholder_div)
+    return str(soup)
+
+
+# =============================
+# 基准测试
+# =============================
+def mark_downloaded(images):
+    """模拟图片全部下载成功，供地址替换使用"""
+    for img_info in images:
+        img_info['download_success'] = True
+        img_info['filename'] = f"img_{img_info['index']}.png"
+    return images
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_page(path, repeat):
+    with open(path, 'r', encoding='utf-8') as f:
+        page_source = f.read()
+
+    legacy = legacy_extract(page_source)
+    current = extract_article(page_source)
+
+    # 两种实现的提取结果应一致（发布时间：新实现会从脚本变量中补全）
+    for field in ('title', 'author', 'content'):
+        if legacy[field] != current[field]:
+            print(f"  ⚠️  {field} 不一致")
+    if [img['url'] for img in legacy['images']] != [img['url'] for img in current['images']]:
+        print("  ⚠️  图片列表不一致")
+
+    legacy_images = mark_downloaded(legacy['images'])
+    current_images = mark_downloaded(current['images'])
+
+    def run_legacy():
+        data = legacy_extract(page_source)
+        legacy_rewrite(data['content_html'], legacy_images)
+
+    def run_current():
+        data = extract_article(page_source)
+        rewrite_image_urls(data['content_html'], current_images)
+
+    legacy_ms = timed(run_legacy, repeat)
+    current_ms = timed(run_current, repeat)
+    print(f"{os.path.basename(path):<32}{len(page_source) / 1024:>10.1f}{len(current['images']):>8}"
+          f"{legacy_ms:>14.2f}{current_ms:>12.2f}{legacy_ms / current_ms:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章提取器微基准")
+    parser.add_argument('pages', nargs='*', help="保存的文章页面HTML")
+    parser.add_argument('--repeat', type=int, default=20, help="每个页面的重复次数")
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    print(f"{'页面':<30}{'大小KB':>10}{'图片':>8}{'BS4(ms)':>14}{'lxml(ms)':>12}{'加速':>9}")
+    for path in pages:
+        bench_page(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
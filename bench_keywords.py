@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词提取基准
+在约10万字的正文上对比原先逐窗口正则匹配的实现与 article_analysis 中的提取器（ngram 和 dag 两种分词后端）：
+ngram 后端须与原实现输出一致；同时统计各实现的耗时和内存峰值，并列出 dag 分词得到的关键词
+
+用法:
+    python bench_keywords.py [正文.txt ...] [--chars 100000] [--repeat 5]
+    不指定文件时用 bench_fixtures/ 下示例页面的正文拼接成指定长度
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+import tracemalloc
+from collections import Counter
+
+from article_analysis import extract_keywords
+from article_extractor import extract_article
+from segmenter import get_segmenter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+# =============================
+# 原先的实现（仅用于对比）
+# =============================
+def legacy_extract_keywords(content):
+    cleaned_text = re.sub(r'[^\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]', ' ', content)
+    stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少', '可以', '能够', '应该', '必须', '如果', '因为', '所以', '但是', '然后', '现在', '已经', '还是', '只是', '或者', '以及', '并且', '而且', '不过', '虽然', '尽管', '除了', '通过', '关于', '对于', '由于', '为了', '根据', '按照', '依据', '基于'}
+
+    words = []
+    text_parts = re.split(r'[，。！？；：\s]+', cleaned_text)
+    for part in text_parts:
+        if len(part) >= 2:
+            for i in range(len(part)):
+                for length in [4, 3, 2]:
+                    if i + length <= len(part):
+                        word = part[i:i+length]
+                        if (len(word) == length and
+                            word not in stop_words and
+                            re.match(r'^[\u4e00-\u9fff]+$', word) and
+                            not any(word.endswith(suffix) for suffix in ['的', '了', '在', '是', '有', '和', '就', '不', '都', '也', '很', '到', '说', '要', '去', '会', '着', '没', '看', '好', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少'])):
+                            words.append(word)
+
+    word_freq = Counter(words)
+    top_keywords = word_freq.most_common(15)
+    filtered_keywords = [(word, count) for word, count in top_keywords if count >= 2]
+    return [{"word": word, "count": count} for word, count in filtered_keywords[:10]]
+
+
+# =============================
+# 基准测试
+# =============================
+def fixture_text(chars):
+    """把示例页面的正文拼接到指定长度"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(extract_article(f.read())['content'])
+    corpus = '\n'.join(texts)
+    return (corpus * (chars // len(corpus) + 1))[:chars]
+
+
+def timed(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def peak_memory(func, text):
+    """单次调用的内存分配峰值（KB）"""
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_text(name, text, repeat):
+    ngram = get_segmenter("ngram")
+    dag = get_segmenter("dag")
+    implementations = [
+        ("原实现", legacy_extract_keywords),
+        ("ngram", lambda t: extract_keywords(t, segmenter=ngram)),
+        ("dag", lambda t: extract_keywords(t, segmenter=dag)),
+    ]
+
+    print(f"\n{name}（{len(text)} 字符）")
+    if legacy_extract_keywords(text) != implementations[1][1](text):
+        print("  ⚠️  ngram 后端与原实现的关键词不一致")
+
+    legacy_ms = None
+    print(f"  {'实现':<10}{'耗时(ms)':>12}{'加速':>9}{'内存峰值(KB)':>16}")
+    for label, func in implementations:
+        func(text)  # 预热（加载词典、填充查询缓存）
+        elapsed_ms = timed(func, text, repeat)
+        legacy_ms = legacy_ms or elapsed_ms
+        print(f"  {label:<10}{elapsed_ms:>12.1f}{legacy_ms / elapsed_ms:>8.1f}x{peak_memory(func, text):>16.0f}")
+
+    for label, func in implementations[1:]:
+        print(f"  {label} 关键词: {', '.join(kw['word'] for kw in func(text))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词提取基准")
+    parser.add_argument('files', nargs='*', help="UTF-8 正文文件")
+    parser.add_argument('--chars', type=int, default=100000, help="未指定文件时示例正文的长度")
+    parser.add_argument('--repeat', type=int, default=5, help="每段正文的重复次数")
+    args = parser.parse_args()
+
+    if args.files:
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8') as f:
+                bench_text(os.path.basename(path), f.read(), args.repeat)
+    else:
+        bench_text("bench_fixtures", fixture_text(args.chars), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
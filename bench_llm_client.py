@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大模型客户端基准（离线，使用 mock_llm_server 模拟的 OpenAI 兼容接口）
+对比在 async 代码中调用同步 OpenAI 客户端（原先的实现）与 qwen3_mcp.LLMClient 的异步客户端：
+- 事件循环卡顿：请求期间每 10ms 唤醒一次的心跳任务的最大延迟（MCP 会话靠事件循环收发消息）
+- 顺序请求的延迟，以及并发请求的吞吐
+- 流式请求的首字延迟（非流式要等完整的回答生成完）
+- 使用的 TCP 连接数（连接复用）
+
+用法:
+    python bench_llm_client.py [--requests 20] [--latency 0.1] [--token-delay 0.01] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from openai import OpenAI
+
+from mock_llm_server import start_mock_server
+from qwen3_mcp import LLMClient
+
+HEARTBEAT_INTERVAL = 0.01
+MESSAGES = [{"role": "user", "content": "你好"}]
+
+
+async def heartbeat(lags, stop):
+    """记录事件循环每次唤醒比预期晚了多久"""
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(time.perf_counter() - expected)
+
+
+async def run_scenario(name, server, requests, make_request):
+    """
+    在心跳任务运行期间发出请求，统计延迟、吞吐、事件循环最大卡顿和连接数
+    :param make_request: 协程函数，参数为请求数，返回各请求的耗时
+    """
+    server.connections.clear()
+    lags, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    latencies = await make_request(requests)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    latencies.sort()
+    print(f"{name:<28} {elapsed:>7.2f}s {requests / elapsed:>8.1f} {statistics.median(latencies) * 1000:>8.1f} "
+          f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>8.1f} {max(lags, default=0) * 1000:>9.1f} "
+          f"{len(server.connections):>6}")
+
+
+def timed_sync(client, model):
+    started = time.perf_counter()
+    client.chat.completions.create(model=model, messages=MESSAGES)
+    return time.perf_counter() - started
+
+
+async def timed_async(client):
+    started = time.perf_counter()
+    await client.get_response(MESSAGES)
+    return time.perf_counter() - started
+
+
+async def timed_first_text(client):
+    """流式请求：到收到第一段文本为止的耗时"""
+    started = time.perf_counter()
+    first_text = None
+    stream = await client.stream_response(MESSAGES)
+    async for chunk in stream:
+        if first_text is None and chunk.choices and chunk.choices[0].delta.content:
+            first_text = time.perf_counter() - started
+    await stream.close()
+    return first_text
+
+
+async def bench(args):
+    server = start_mock_server(latency=args.latency, token_delay=args.token_delay)
+    model = "mock"
+    print(f"模拟接口 {server.base_url}，首字耗时 {args.latency}s，每块间隔 {args.token_delay}s，{args.requests} 个请求\n")
+    print(f"{'方式':<26} {'总耗时':>7} {'请求/秒':>7} {'p50(ms)':>8} {'p95(ms)':>8} {'最大卡顿(ms)':>9} {'连接数':>4}")
+
+    sync_client = OpenAI(api_key="mock", base_url=server.base_url)
+
+    async def sync_in_loop(n):
+        # 原先的实现：async 函数里直接调用同步客户端，请求期间事件循环完全停住，
+        # 两次请求之间（如执行工具调用时）事件循环才有机会运行
+        latencies = []
+        for _ in range(n):
+            latencies.append(timed_sync(sync_client, model))
+            await asyncio.sleep(0)
+        return latencies
+
+    await run_scenario("同步客户端（阻塞事件循环）", server, args.requests, sync_in_loop)
+    sync_client.close()
+
+    llm = LLMClient(api_key="mock", base_url=server.base_url, model=model)
+
+    async def async_sequential(n):
+        return [await timed_async(llm) for _ in range(n)]
+
+    async def async_concurrent(n):
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one():
+            async with semaphore:
+                return await timed_async(llm)
+
+        return list(await asyncio.gather(*(one() for _ in range(n))))
+
+    await run_scenario("异步客户端（顺序）", server, args.requests, async_sequential)
+    await run_scenario(f"异步客户端（并发{args.concurrency}）", server, args.requests, async_concurrent)
+
+    async def stream_first_text(n):
+        return [await timed_first_text(llm) for _ in range(n)]
+
+    # 延迟列为首字延迟
+    await run_scenario("异步客户端（流式，首字）", server, args.requests, stream_first_text)
+    await llm.close()
+    server.shutdown()
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大模型客户端基准")
+    parser.add_argument("--requests", type=int, default=20, help="每种方式的请求数")
+    parser.add_argument("--latency", type=float, default=0.1, help="模拟接口返回第一块内容前的耗时（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="模拟接口生成每块内容的耗时（秒）")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发方式的并发数")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器资源拦截基准测试
+对比不同资源拦截策略下文章页面的加载时间、请求数和传输字节数
+
+用法:
+    python bench_resource_blocking.py URL [URL ...] [--runs 3] [--policies none standard no_images]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from weixin_spider import BLOCK_POLICIES, WeixinSpider
+
+
+class BenchSpider(WeixinSpider):
+    """开启Chrome性能日志的爬虫，用于统计网络请求"""
+
+    def _build_chrome_options(self, headless=True):
+        options = super()._build_chrome_options(headless)
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return options
+
+
+def collect_network_stats(driver):
+    """从性能日志中统计请求数、被拦截数和实际传输字节数"""
+    requests_sent = 0
+    blocked = 0
+    bytes_transferred = 0
+
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            requests_sent += 1
+        elif method == 'Network.loadingFinished':
+            bytes_transferred += params.get('encodedDataLength', 0)
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            blocked += 1
+
+    return requests_sent, blocked, bytes_transferred
+
+
+def bench_policy(policy, urls, runs):
+    """在指定拦截策略下依次加载所有URL，返回每次加载的统计结果"""
+    # download_images=True：否则Chrome按偏好设置对所有策略（包括 none 基线）都不加载图片，拦截策略不再是唯一变量
+    spider = BenchSpider(fetch_mode='browser', block_policy=policy, download_images=True)
+    results = []
+    try:
+        for url in urls:
+            for _ in range(runs):
+                # 每次加载前清空缓存和已有日志，保证是冷启动加载
+                spider.driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+                spider.driver.get_log('performance')
+
+                start = time.perf_counter()
+                spider.driver.get(url)
+                spider._wait_for_page_ready()
+                elapsed = time.perf_counter() - start
+
+                requests_sent, blocked, bytes_transferred = collect_network_stats(spider.driver)
+                results.append({
+                    'seconds': elapsed,
+                    'requests': requests_sent,
+                    'blocked': blocked,
+                    'bytes': bytes_transferred
+                })
+    finally:
+        spider.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="浏览器资源拦截基准测试")
+    parser.add_argument('urls', nargs='+', help="微信文章URL")
+    parser.add_argument('--runs', type=int, default=3, help="每个URL每种策略的加载次数")
+    parser.add_argument('--policies', nargs='+', default=list(BLOCK_POLICIES), choices=list(BLOCK_POLICIES))
+    args = parser.parse_args()
+
+    summary = {}
+    for policy in args.policies:
+        print(f"测试策略: {policy} ...")
+        results = bench_policy(policy, args.urls, args.runs)
+        summary[policy] = {
+            'seconds': statistics.median(r['seconds'] for r in results),
+            'requests': statistics.median(r['requests'] for r in results),
+            'blocked': statistics.median(r['blocked'] for r in results),
+            'bytes': statistics.median(r['bytes'] for r in results)
+        }
+
+    baseline = summary.get('none')
+    print()
+    print(f"{'策略':<12}{'加载时间(s)':>12}{'请求数':>10}{'拦截数':>10}{'传输KB':>12}{'时间降幅':>10}{'流量降幅':>10}")
+    for policy, stats in summary.items():
+        time_cut = bytes_cut = "-"
+        if baseline and policy != 'none':
+            if baseline['seconds']:
+                time_cut = f"{1 - stats['seconds'] / baseline['seconds']:.0%}"
+            if baseline['bytes']:
+                bytes_cut = f"{1 - stats['bytes'] / baseline['bytes']:.0%}"
+        print(f"{policy:<12}{stats['seconds']:>12.2f}{stats['requests']:>10.0f}{stats['blocked']:>10.0f}"
+              f"{stats['bytes'] / 1024:>12.1f}{time_cut:>10}{bytes_cut:>10}")
+
+
+if __name__ == "__main__":
+    main()
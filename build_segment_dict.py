@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成分词词典文件
+从 jieba 格式的词典（每行“词 词频 [词性]”，如 jieba 自带的 dict.txt，MIT 许可）中
+取词频最高的若干词，写成 segmenter.DictSegmenter 使用的内存映射词典。
+分发生成的词典时需附带源词典的许可声明（jieba 词典见 dicts/LICENSE-jieba.txt）
+
+用法:
+    python build_segment_dict.py dict.txt [--top 50000] [-o dicts/segment_dict.bin]
+"""
+
+import argparse
+import os
+
+from segmenter import DEFAULT_DICT_PATH, write_dictionary
+
+
+def read_word_freqs(path):
+    """读取 jieba 格式的词典"""
+    word_freqs = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                word_freqs[parts[0]] = int(parts[1])
+    return word_freqs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成分词词典文件")
+    parser.add_argument('source', help="jieba 格式的词典文件")
+    parser.add_argument('--top', type=int, default=50000, help="保留词频最高的词数，0 表示全部保留")
+    parser.add_argument('-o', '--output', default=DEFAULT_DICT_PATH, help="输出文件")
+    args = parser.parse_args()
+
+    word_freqs = read_word_freqs(args.source)
+    if args.top:
+        top_words = sorted(word_freqs.items(), key=lambda item: (-item[1], item[0]))[:args.top]
+        word_freqs = dict(top_words)
+
+    write_dictionary(word_freqs, args.output)
+    print(f"已写入 {len(word_freqs)} 个词: {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
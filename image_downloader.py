@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发图片下载引擎
+共享连接池、按主机限制并发、单张图片失败时退避重试，并限制一篇文章图片下载的总时长
+"""
+
+import base64
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from image_store import ImageStore
+
+logger = logging.getLogger(__name__)
+
+
+def guess_image_extension(content_type, img_url):
+    """根据响应的内容类型（或URL）确定图片扩展名"""
+    if 'jpeg' in content_type or 'jpg' in content_type:
+        return '.jpg'
+    if 'png' in content_type:
+        return '.png'
+    if 'gif' in content_type:
+        return '.gif'
+    if 'webp' in content_type:
+        return '.webp'
+
+    # 从URL推断扩展名
+    path = urlparse(img_url).path.lower()
+    if path.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
+        return os.path.splitext(path)[1]
+    return '.jpg'  # 默认为jpg
+
+
+class _DownloadBatch:
+    """
+    一篇文章的一次图片下载：记录截止时间和已写入文章目录的图片。
+    超出截止时间后标记为放弃，仍在运行的下载线程不再向文章目录写入文件
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.abandoned = False
+        self.saved: Dict[str, Dict[str, Any]] = {}
+
+
+class ImageDownloader:
+    def __init__(self, headers=None, max_workers=8, per_host_limit=4, retries=2,
+                 backoff=0.5, timeout=30, total_timeout=120, store: Optional[ImageStore] = None):
+        """
+        初始化下载器（线程安全，可在多个爬虫实例之间共享）
+        :param headers: 请求头，通常取自爬虫的 requests 会话
+        :param max_workers: 下载线程数，同时也是连接池大小
+        :param per_host_limit: 同一主机的最大并发请求数
+        :param retries: 单张图片失败后的重试次数
+        :param backoff: 重试退避基数（秒），第 n 次重试等待 backoff * 2^(n-1)
+        :param timeout: 单次请求超时（秒）
+        :param total_timeout: 一篇文章所有图片下载的总时长上限（秒）
+        :param store: 内容寻址图片存储，提供时已下载过的图片直接从存储中引用
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.store = store
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def download_all(self, images_info: List[Dict[str, Any]], save_dir, filename_prefix="img",
+                     deadline: Optional[float] = None):
+        """
+        并发下载图片，并在 images_info 中填写 download_success / local_path / filename / error
+        :param images_info: 图片信息列表（来自 _extract_images_from_content）
+        :param save_dir: 保存目录
+        :param filename_prefix: 文件名前缀
+        :param deadline: 截止时间（time.monotonic() 的值），与 total_timeout 取较早者；
+                         到期时仍未完成的图片记为失败，之后也不会再写入保存目录
+        :return: 下载成功的图片数量
+        """
+        os.makedirs(save_dir, exist_ok=True)
+        budget_deadline = time.monotonic() + self.total_timeout
+        batch = _DownloadBatch(budget_deadline if deadline is None else min(deadline, budget_deadline))
+
+        futures = {}
+        for i, img_info in enumerate(images_info):
+            img_url = img_info.get('url')
+            if not img_url:
+                continue
+            prefix = f"{filename_prefix}_{i + 1}"
+            future = self._get_executor().submit(self._download_one, img_url, save_dir, prefix, batch)
+            futures[future] = (img_info, prefix)
+
+        done, not_done = wait(futures, timeout=max(0.0, batch.deadline - time.monotonic()))
+        if not_done:
+            # 之后完成的下载不再写文件；在此之前已写入的图片仍然算作成功
+            with batch.lock:
+                batch.abandoned = True
+
+        success_count = 0
+        for future, (img_info, prefix) in futures.items():
+            if future in not_done:
+                future.cancel()
+                result = batch.saved.get(prefix) or {'success': False, 'error': '超出图片下载总时长'}
+            else:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+
+            if result['success']:
+                img_info['download_success'] = True
+                img_info['local_path'] = result['filepath']
+                img_info['filename'] = result['filename']
+                success_count += 1
+            else:
+                img_info['download_success'] = False
+                img_info['error'] = result.get('error', '未知错误')
+
+        if not_done:
+            logger.warning(f"{len(not_done)} 张图片因超出下载截止时间未完成下载")
+        return success_count
+
+    def close(self):
+        """关闭下载线程和连接池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="image-download"
+                )
+            return self._executor
+
+    def _host_semaphore(self, host) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def _download_one(self, img_url, save_dir, filename_prefix, batch: _DownloadBatch):
+        """下载单张图片（在下载线程中执行），失败时按退避策略重试"""
+        if img_url.startswith('data:'):
+            return self._save_data_url_image(img_url, save_dir, filename_prefix, batch)
+
+        # 之前下载过的图片直接从存储中引用，不再请求网络
+        if self.store:
+            blob_path = self.store.lookup_url(img_url)
+            if blob_path:
+                return self._link_stored_image(blob_path, save_dir, filename_prefix, batch)
+
+        deadline = batch.deadline
+        semaphore = self._host_semaphore(urlparse(img_url).netloc)
+        last_error = '未知错误'
+
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                last_error = '超出图片下载总时长'
+                break
+
+            if not semaphore.acquire(timeout=remaining):
+                last_error = '等待下载名额超时'
+                break
+            try:
+                response = self.session.get(img_url, timeout=min(self.timeout, remaining))
+                # 4xx（限流除外）重试也不会成功，直接放弃
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    logger.error(f"下载图片失败 {img_url}: HTTP {response.status_code}")
+                    return {'success': False, 'error': f"HTTP {response.status_code}"}
+                response.raise_for_status()
+                content = response.content
+                content_type = response.headers.get('content-type', '')
+            except Exception as e:
+                last_error = str(e)
+            else:
+                return self._save_image(content, guess_image_extension(content_type, img_url),
+                                        save_dir, filename_prefix, img_url, batch)
+            finally:
+                semaphore.release()
+
+            if attempt < self.retries:
+                delay = self.backoff * (2 ** attempt)
+                logger.info(f"图片下载失败，{delay:.1f}s 后重试 ({attempt + 1}/{self.retries}): {img_url}")
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+
+        logger.error(f"下载图片失败 {img_url}: {last_error}")
+        return {'success': False, 'error': last_error}
+
+    def _save_data_url_image(self, data_url, save_dir, filename_prefix, batch):
+        """保存data URL格式的图片为PNG"""
+        try:
+            header, data = data_url.split(',', 1)
+            return self._save_image(base64.b64decode(data), '.png', save_dir, filename_prefix, data_url, batch)
+        except Exception as e:
+            logger.error(f"保存Data URL图片失败: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def _save_image(self, content, ext, save_dir, filename_prefix, img_url, batch):
+        """将图片写入文章目录，文件名由内容哈希决定；启用存储时写入存储并硬链接到文章目录"""
+        digest = ImageStore.content_digest(content)
+        filename = f"{filename_prefix}_{digest[:12]}{ext}"
+        filepath = os.path.join(save_dir, filename)
+
+        # 存储按内容寻址、与文章无关，超时后写入也无妨；文章目录只在批次未放弃时写入
+        blob_path = self.store.put(content, ext, url=img_url) if self.store else None
+        with batch.lock:
+            if batch.abandoned:
+                return {'success': False, 'error': '超出图片下载总时长'}
+            if blob_path:
+                self.store.link(blob_path, filepath)
+            else:
+                with open(filepath, 'wb') as f:
+                    f.write(content)
+            result = batch.saved[filename_prefix] = {
+                'success': True,
+                'filename': filename,
+                'filepath': filepath,
+                'size': len(content)
+            }
+
+        logger.info(f"图片下载成功: {filename}")
+        return result
+
+    def _link_stored_image(self, blob_path, save_dir, filename_prefix, batch):
+        """引用存储中已有的图片"""
+        blob_name = os.path.basename(blob_path)
+        digest, ext = os.path.splitext(blob_name)
+        filename = f"{filename_prefix}_{digest[:12]}{ext}"
+        filepath = os.path.join(save_dir, filename)
+
+        with batch.lock:
+            if batch.abandoned:
+                return {'success': False, 'error': '超出图片下载总时长'}
+            self.store.link(blob_path, filepath)
+            result = batch.saved[filename_prefix] = {
+                'success': True,
+                'filename': filename,
+                'filepath': filepath,
+                'size': os.path.getsize(blob_path)
+            }
+        logger.info(f"图片已存在于存储中，直接引用: {filename}")
+        return result
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址的图片存储
+图片按内容哈希只保存一份，另按URL哈希记录已下载过的图片；
+各篇文章的 images/ 目录通过硬链接引用同一份文件，重复出现的图片既不重复下载也不重复占用磁盘
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from typing import Optional
+
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class ImageStore:
+    def __init__(self, root="articles/.image_store"):
+        """
+        初始化图片存储
+        :param root: 存储根目录，需与文章目录位于同一文件系统才能使用硬链接
+        """
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.urls_dir = os.path.join(root, "urls")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.urls_dir, exist_ok=True)
+
+    @staticmethod
+    def content_digest(content: bytes) -> str:
+        """计算图片内容的哈希"""
+        return hashlib.sha256(content).hexdigest()
+
+    def lookup_url(self, url) -> Optional[str]:
+        """
+        查找某个URL之前下载过的图片
+        :return: 存储中的文件路径，未下载过（或文件已丢失）时返回None
+        """
+        ref_path = self._url_ref_path(url)
+        try:
+            with open(ref_path, 'r', encoding='utf-8') as f:
+                blob_name = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+        blob_path = self._blob_path(blob_name)
+        return blob_path if os.path.exists(blob_path) else None
+
+    def put(self, content: bytes, ext, url=None) -> str:
+        """
+        保存图片内容（内容相同则只保存一份），并记录URL到内容的映射
+        :param content: 图片内容
+        :param ext: 文件扩展名（如 .png）
+        :param url: 图片URL（可选）
+        :return: 存储中的文件路径
+        """
+        blob_name = f"{self.content_digest(content)}{ext}"
+        blob_path = self._blob_path(blob_name)
+
+        if not os.path.exists(blob_path):
+            atomic_write(blob_path, content)
+
+        if url:
+            atomic_write(self._url_ref_path(url), blob_name.encode('utf-8'))
+        return blob_path
+
+    @staticmethod
+    def link(blob_path, dest_path):
+        """在文章目录中引用存储的图片：优先硬链接，不支持时退化为复制"""
+        if os.path.exists(dest_path):
+            return
+        try:
+            os.link(blob_path, dest_path)
+        except OSError as e:
+            logger.debug(f"硬链接失败，改为复制: {e}")
+            shutil.copyfile(blob_path, dest_path)
+
+    def _blob_path(self, blob_name):
+        return os.path.join(self.blobs_dir, blob_name[:2], blob_name)
+
+    def _url_ref_path(self, url):
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.urls_dir, url_hash[:2], url_hash)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟的 OpenAI 兼容接口（/v1/chat/completions），用于离线测试 MCP 客户端和测量大模型调用的延迟、吞吐
+
+- 每个请求先等待 --latency 秒（模拟模型耗时），HTTP/1.1 长连接，可观察客户端的连接复用
+- 请求带 stream=true 时按 SSE 分块返回（chunked 编码），文本每块 STREAM_TEXT_CHUNK 个字符，
+  工具调用先返回 id 和名称、再分块返回参数，块之间间隔 --token-delay 秒；
+  非流式请求等待同样的总时长后一次返回，两种方式的生成耗时一致
+- 指定 --tool-calls N 时，最后一条是用户消息且请求带有工具的情况下返回 N 个工具调用
+  （依次使用前 N 个工具，必填参数按类型填入占位值），收到工具结果后返回普通回答
+
+用法:
+    python mock_llm_server.py [--port 8765] [--latency 0.2] [--token-delay 0.02] [--tool-calls 0]
+    客户端设置 BASE_URL=http://127.0.0.1:8765/v1 即可连接
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Tuple
+
+# 流式响应中每块文本的字符数和每块工具参数的字符数
+STREAM_TEXT_CHUNK = 4
+STREAM_ARGUMENTS_CHUNK = 8
+
+# 必填参数的占位值
+_PLACEHOLDER_VALUES = {"string": "test", "integer": 1, "number": 1, "boolean": True, "array": [], "object": {}}
+
+
+def _placeholder_arguments(tool: Dict[str, Any]) -> Dict[str, Any]:
+    parameters = tool.get("function", {}).get("parameters", {})
+    properties = parameters.get("properties", {})
+    return {name: _PLACEHOLDER_VALUES.get(properties.get(name, {}).get("type"), "test")
+            for name in parameters.get("required", [])}
+
+
+def mock_completion(request: Dict[str, Any], tool_calls: int = 0) -> Dict[str, Any]:
+    """
+    根据请求构造模拟的 chat.completion 响应
+    :param request: 请求体
+    :param tool_calls: 用户消息后返回的工具调用数（0 表示只返回文本）
+    """
+    messages = request.get("messages") or [{}]
+    last = messages[-1]
+    tools = request.get("tools") or []
+
+    if tool_calls and tools and last.get("role") == "user":
+        calls = [{
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": tool["function"]["name"],
+                         "arguments": json.dumps(_placeholder_arguments(tool), ensure_ascii=False)}
+        } for tool in tools[:tool_calls]]
+        message = {"role": "assistant", "content": None, "tool_calls": calls}
+        finish_reason = "tool_calls"
+    else:
+        if last.get("role") == "tool":
+            tool_results = sum(1 for m in messages if m.get("role") == "tool")
+            content = f"已完成 {tool_results} 个工具调用"
+        else:
+            content = f"模拟回答: {str(last.get('content', ''))[:50]}"
+        message = {"role": "assistant", "content": content}
+        finish_reason = "stop"
+
+    prompt_chars = sum(len(str(m.get("content") or "")) for m in messages)
+    completion_chars = len(message.get("content") or "")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": prompt_chars, "completion_tokens": completion_chars,
+                  "total_tokens": prompt_chars + completion_chars}
+    }
+
+
+def stream_chunks(completion: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """把 mock_completion 的响应拆成 chat.completion.chunk 序列"""
+    choice = completion["choices"][0]
+    message = choice["message"]
+
+    def chunk(delta, finish_reason=None):
+        return {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"],
+                "model": completion["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    yield chunk({"role": "assistant", "content": ""})
+    content = message.get("content") or ""
+    for start in range(0, len(content), STREAM_TEXT_CHUNK):
+        yield chunk({"content": content[start:start + STREAM_TEXT_CHUNK]})
+    for index, call in enumerate(message.get("tool_calls") or []):
+        yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                     "function": {"name": call["function"]["name"], "arguments": ""}}]})
+        arguments = call["function"]["arguments"]
+        for start in range(0, len(arguments), STREAM_ARGUMENTS_CHUNK):
+            yield chunk({"tool_calls": [{"index": index,
+                                         "function": {"arguments": arguments[start:start + STREAM_ARGUMENTS_CHUNK]}}]})
+    yield chunk({}, choice["finish_reason"])
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    # 长连接：客户端可以复用同一个 TCP 连接
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，开启 Nagle 算法时第二次写要等客户端的延迟确认（约40ms）
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        time.sleep(self.server.latency)
+        self.server.record_request(self.client_address)
+        completion = mock_completion(request, self.server.tool_calls)
+        if request.get("stream"):
+            self._send_stream(completion)
+        else:
+            time.sleep(self.server.token_delay * sum(1 for _ in stream_chunks(completion)))
+            self._send_json(200, completion)
+
+    def _send_stream(self, completion: Dict[str, Any]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n" for chunk in stream_chunks(completion)]
+        events.append("data: [DONE]\n\n")
+        for position, event in enumerate(events):
+            if position:
+                time.sleep(self.server.token_delay)
+            data = event.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 基准测试时不逐条打印请求日志
+        pass
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 并发基准会同时建立多个连接，默认的监听队列（5）太短时多余的连接要等 SYN 重传（1秒）
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.2, tool_calls: int = 0,
+                 token_delay: float = 0.02):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tool_calls = tool_calls
+        self.request_count = 0
+        # 客户端使用过的连接（来源地址），用于观察连接复用
+        self.connections = set()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def handle_error(self, request, client_address):
+        # 客户端取消请求时连接被提前关闭，属于正常情况
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def record_request(self, client_address):
+        with self._stats_lock:
+            self.request_count += 1
+            self.connections.add(client_address)
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                      tool_calls: int = 0, token_delay: float = 0.02) -> MockLLMServer:
+    """
+    在后台线程中启动模拟服务器（port 为 0 时自动分配端口），用完后调用 shutdown()
+    :return: 服务器对象，base_url 属性为客户端使用的地址
+    """
+    server = MockLLMServer((host, port), latency=latency, tool_calls=tool_calls, token_delay=token_delay)
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 OpenAI 兼容接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="每个请求的模拟耗时（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="流式响应每块之间的间隔（秒）")
+    parser.add_argument("--tool-calls", type=int, default=0, help="用户消息后返回的工具调用数")
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), latency=args.latency, tool_calls=args.tool_calls,
+                           token_delay=args.token_delay)
+    print(f"模拟大模型接口已启动: {server.base_url}（延迟 {args.latency} 秒，工具调用 {args.tool_calls} 个）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
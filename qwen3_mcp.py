@@ -2,11 +2,14 @@ import asyncio
 import json
 import logging
 import os
+import re
+import signal
+import time
 from contextlib import AsyncExitStack
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # from dotenv import load_dotenv  # 不再需要.env文件
-from openai import OpenAI  # OpenAI Python SDK
+from openai import AsyncOpenAI  # OpenAI Python SDK（异步客户端）
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
@@ -14,6 +17,38 @@ from mcp.client.stdio import stdio_client
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
+# httpx 为每个请求输出一行 INFO 日志，会插进流式输出的回答中间
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# 单个服务器启动（建立连接并获取工具列表）的超时秒数，可在服务器配置中用 startup_timeout 单独设置
+SERVER_START_TIMEOUT = float(os.getenv("MCP_SERVER_START_TIMEOUT", "30"))
+
+# 单个服务器同时执行的工具调用数上限，可在服务器配置中用 max_concurrency 单独设置
+SERVER_MAX_CONCURRENCY = int(os.getenv("MCP_SERVER_MAX_CONCURRENCY", "4"))
+
+# 大模型请求的超时秒数和失败重试次数
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# 聊天循环发送给模型的历史消息的 token 预算（估算值）
+CHAT_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "16000"))
+# 较早轮次中的工具结果（如整篇文章）被截断到的 token 数
+CHAT_CONTEXT_TOOL_RESULT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOOL_RESULT_TOKENS", "200"))
+# 每条消息的格式开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 聊天循环是否使用流式响应（文本边生成边输出，工具调用参数一完整就开始执行）
+LLM_STREAM = os.getenv("LLM_STREAM", "true").lower() == "true"
+
+
+def _is_complete_arguments(arguments: str) -> bool:
+    """流式拼接中的工具参数是否已是完整的 JSON 对象"""
+    if not arguments.rstrip().endswith("}"):
+        return False
+    try:
+        return isinstance(json.loads(arguments), dict)
+    except ValueError:
+        return False
 
 
 # =============================
@@ -23,10 +58,10 @@ class Configuration:
     """管理 MCP 客户端的配置"""
 
     def __init__(self) -> None:
-        # 直接在代码中配置 API key, base_url 和 model
-        self.api_key = "sk-a6aaf8beba18425e9942c4a33ae58caf"
-        self.base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
-        self.model = "qwen-plus"
+        # 直接在代码中配置 API key, base_url 和 model，可用环境变量覆盖（如连接 mock_llm_server.py 离线测试）
+        self.api_key = os.getenv("LLM_API_KEY", "sk-a6aaf8beba18425e9942c4a33ae58caf")
+        self.base_url = os.getenv("BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+        self.model = os.getenv("MODEL", "qwen-plus")
         if not self.api_key:
             raise ValueError("❌ 未找到 API 密钥配置")
 
@@ -57,6 +92,41 @@ class Server:
         self.session: Optional[ClientSession] = None
         self.exit_stack: AsyncExitStack = AsyncExitStack()
         self._cleanup_lock = asyncio.Lock()
+        # start() 启动的后台任务及其退出信号
+        self._task: Optional[asyncio.Task] = None
+        self._shutdown: Optional[asyncio.Event] = None
+        # 限制同时发往该服务器的工具调用数
+        self._call_semaphore = asyncio.Semaphore(max(1, int(config.get("max_concurrency", SERVER_MAX_CONCURRENCY))))
+
+    async def start(self) -> None:
+        """在独立的后台任务中初始化连接，多个服务器可以并发启动
+
+        stdio 连接的上下文（anyio cancel scope）必须在进入它的任务中退出，
+        所以连接由后台任务建立并一直持有，cleanup() 通知该任务关闭连接。
+        启动失败或被取消（如超时）时抛出异常，后台任务随之结束并关闭已打开的资源，
+        调用 cleanup() 可等待关闭完成。
+        """
+        ready = asyncio.get_running_loop().create_future()
+        self._shutdown = asyncio.Event()
+        self._task = asyncio.create_task(self._run(ready), name=f"mcp-server-{self.name}")
+        try:
+            await asyncio.shield(ready)
+        except BaseException:
+            # 不在这里等待关闭：终止子进程可能需要数秒
+            self._request_shutdown()
+            raise
+
+    async def _run(self, ready: asyncio.Future) -> None:
+        """后台任务：初始化连接，等待退出信号后在同一任务中关闭连接"""
+        try:
+            await self.initialize()
+            ready.set_result(None)
+            await self._shutdown.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            await self._close()
 
     async def initialize(self) -> None:
         """初始化与 MCP 服务器的连接"""
@@ -84,7 +154,7 @@ class Server:
             self.session = session
         except Exception as e:
             logging.error(f"Error initializing server {self.name}: {e}")
-            await self.cleanup()
+            await self._close()
             raise
 
     async def list_tools(self) -> List[Any]:
@@ -122,8 +192,9 @@ class Server:
         attempt = 0
         while attempt < retries:
             try:
-                logging.info(f"Executing {tool_name} on server {self.name}...")
-                result = await self.session.call_tool(tool_name, arguments)
+                async with self._call_semaphore:
+                    logging.info(f"Executing {tool_name} on server {self.name}...")
+                    result = await self.session.call_tool(tool_name, arguments)
                 return result
             except Exception as e:
                 attempt += 1
@@ -139,6 +210,23 @@ class Server:
 
     async def cleanup(self) -> None:
         """清理服务器资源"""
+        if self._task is None:
+            await self._close()
+            return
+        self._request_shutdown()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def _request_shutdown(self) -> None:
+        """通知后台任务关闭连接（只通知一次，重复取消会打断正在进行的关闭）"""
+        if self._task.done() or self._shutdown.is_set():
+            return
+        self._shutdown.set()
+        if self.session is None:
+            # 仍在启动中，直接取消
+            self._task.cancel()
+
+    async def _close(self) -> None:
+        """关闭连接（必须在建立连接的任务中调用）"""
         async with self._cleanup_lock:
             try:
                 await self.exit_stack.aclose()
@@ -175,32 +263,194 @@ Arguments:
 """
 
 
+# =============================
+# 对话上下文管理类（按 token 预算保留历史）
+# =============================
+_HAN_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数：汉字每字按1个计，其他字符每4个按1个计（对通义千问等模型的分词器偏保守）"""
+    han = len(_HAN_PATTERN.findall(text))
+    return han + (len(text) - han + 3) // 4
+
+
+def _content_text(content: Any) -> str:
+    """消息内容的文本（MCP 工具结果是 TextContent 等对象的列表）"""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            text = item.get("text") if isinstance(item, dict) else getattr(item, "text", None)
+            parts.append(text if isinstance(text, str) else str(item))
+        return "\n".join(parts)
+    return str(content)
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """估算单条消息的 token 数（内容 + 工具调用的名称和参数）"""
+    text = _content_text(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        text += (function.get("name") or "") + (function.get("arguments") or "")
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(text)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """截取文本开头不超过 max_tokens 的部分（与 estimate_tokens 的估算方式一致）"""
+    cost = 0.0
+    for position, char in enumerate(text):
+        cost += 1 if _HAN_PATTERN.match(char) else 0.25
+        if cost > max_tokens:
+            return text[:position]
+    return text
+
+
+class ChatTurn:
+    """一轮对话：用户消息及其后的 assistant、tool 消息
+
+    历史按整轮保留、压缩或省略，assistant 的 tool_calls 消息与对应的 tool 结果不会被拆开。
+    每条消息的 token 数在加入时计算一次。
+    """
+
+    def __init__(self, user_message: Dict[str, Any]) -> None:
+        self.messages: List[Dict[str, Any]] = [user_message]
+        self.tokens: List[int] = [message_tokens(user_message)]
+        self._compact_forms: Optional[List[Tuple[List[Dict[str, Any]], int]]] = None
+
+    def add(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+        self.tokens.append(message_tokens(message))
+        self._compact_forms = None
+
+    def forms(self) -> List[Tuple[List[Dict[str, Any]], int]]:
+        """
+        由完整到精简的几种形式及其 token 数：
+        完整 / 工具结果截断到 CHAT_CONTEXT_TOOL_RESULT_TOKENS / 只保留提问和最终回答
+        """
+        if self._compact_forms is None:
+            self._compact_forms = self._build_compact_forms()
+        return [(self.messages, sum(self.tokens))] + self._compact_forms
+
+    def _build_compact_forms(self) -> List[Tuple[List[Dict[str, Any]], int]]:
+        forms = []
+        limit = CHAT_CONTEXT_TOOL_RESULT_TOKENS
+        truncated, truncated_tokens, changed = [], 0, False
+        for message, tokens in zip(self.messages, self.tokens):
+            if message.get("role") == "tool" and tokens > limit + MESSAGE_OVERHEAD_TOKENS:
+                text = _truncate_to_tokens(_content_text(message.get("content")), limit)
+                message = dict(message, content=f"{text}\n…（工具结果已截断，原长约 {tokens} tokens）")
+                tokens = message_tokens(message)
+                changed = True
+            truncated.append(message)
+            truncated_tokens += tokens
+        if changed:
+            forms.append((truncated, truncated_tokens))
+
+        if len(self.messages) > 2:
+            brief, brief_tokens = self.messages[:1], self.tokens[0]
+            last = self.messages[-1]
+            if last.get("role") == "assistant" and not last.get("tool_calls"):
+                brief = brief + [last]
+                brief_tokens += self.tokens[-1]
+            forms.append((brief, brief_tokens))
+        return forms
+
+
+class ChatContext:
+    """按 token 预算管理聊天历史"""
+
+    def __init__(self, max_tokens: int = CHAT_CONTEXT_MAX_TOKENS) -> None:
+        self.max_tokens = max_tokens
+        self.turns: List[ChatTurn] = []
+
+    def add(self, message: Dict[str, Any]) -> None:
+        """追加消息：用户消息开始新的一轮，其他消息归入当前轮"""
+        if message.get("role") == "user" or not self.turns:
+            self.turns.append(ChatTurn(message))
+        else:
+            self.turns[-1].add(message)
+
+    def discard_turn(self) -> None:
+        """撤回当前轮（如本轮被取消）"""
+        if self.turns:
+            self.turns.pop()
+
+    def build(self) -> List[Dict[str, Any]]:
+        """
+        生成发送给模型的消息：最新一轮总是完整保留，较早的轮次从新到旧依次加入，
+        放不下时依次尝试截断其中的工具结果、只保留提问和最终回答，仍放不下则本次省略该轮及更早的轮次。
+        历史本身不删除：省略与否取决于最新一轮的大小，下一轮较短时较早的轮次可能重新放得下
+        """
+        if not self.turns:
+            return []
+        latest_messages, used = self.turns[-1].forms()[0]
+        if used > self.max_tokens:
+            logging.warning(f"当前一轮对话约 {used} tokens，超过上下文预算 {self.max_tokens}")
+        selected = [latest_messages]
+        for position in range(len(self.turns) - 2, -1, -1):
+            fitting = next(((messages, tokens) for messages, tokens in self.turns[position].forms()
+                            if used + tokens <= self.max_tokens), None)
+            if fitting is None:
+                logging.debug(f"上下文超出预算，本次省略最早的 {position + 1} 轮对话")
+                break
+            selected.append(fitting[0])
+            used += fitting[1]
+        logging.debug(f"上下文: {len(selected)} 轮，约 {used} tokens")
+        return [message for messages in reversed(selected) for message in messages]
+
+
 # =============================
 # LLM 客户端封装类（使用 OpenAI SDK）
 # =============================
 class LLMClient:
-    """使用 OpenAI SDK 与大模型交互"""
+    """使用 OpenAI SDK 与大模型交互
+
+    使用异步客户端：等待模型响应期间事件循环继续处理 MCP 会话和并发的工具调用。
+    整个客户端共用一个实例，底层 HTTP 连接池复用连接；请求有超时，
+    取消等待中的协程（如 Ctrl+C 取消本轮对话）会中止对应的 HTTP 请求。
+    """
 
-    def __init__(self, api_key: str, base_url: Optional[str], model: str) -> None:
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+    def __init__(self, api_key: str, base_url: Optional[str], model: str,
+                 timeout: float = LLM_REQUEST_TIMEOUT, max_retries: int = LLM_MAX_RETRIES) -> None:
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries)
         self.model = model
 
-    def get_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Any:
+    async def get_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Any:
         """
         发送消息给大模型 API，支持传入工具参数（function calling 格式）
         """
+        return await self._create(messages, tools)
+
+    async def stream_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Any:
+        """
+        流式请求，返回按到达顺序产出 chunk 的异步迭代器（用完或中途放弃时调用其 close()）
+        """
+        return await self._create(messages, tools, stream=True)
+
+    async def _create(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]],
+                      **options: Any) -> Any:
         payload = {
             "model": self.model,
             "messages": messages,
-            "tools": tools,
+            **options,
         }
+        if tools:
+            payload["tools"] = tools
         try:
-            response = self.client.chat.completions.create(**payload)
+            response = await self.client.chat.completions.create(**payload)
             return response
         except Exception as e:
             logging.error(f"Error during LLM call: {e}")
             raise
 
+    async def close(self) -> None:
+        """关闭 HTTP 连接池"""
+        await self.client.close()
+
 
 # =============================
 # 多服务器 MCP 客户端类（集成配置文件、工具格式转换与 OpenAI SDK 调用）
@@ -220,6 +470,10 @@ class MultiServerMCPClient:
         self.servers: Dict[str, Server] = {}
         # 各个 server 的工具列表
         self.tools_by_server: Dict[str, List[Any]] = {}
+        # 启动失败或超时而被跳过的服务器 (server_name -> 原因)
+        self.failed_servers: Dict[str, str] = {}
+        # 被跳过的服务器在后台关闭（终止子进程可能需要数秒），不拖慢启动
+        self._pending_cleanups: List[asyncio.Task] = []
         self.all_tools: List[Dict[str, Any]] = []
 
     async def connect_to_servers(self, servers_config: Dict[str, Any]) -> None:
@@ -235,11 +489,16 @@ class MultiServerMCPClient:
         }
         """
         mcp_servers = servers_config.get("mcpServers", {})
-        for server_name, srv_config in mcp_servers.items():
-            server = Server(server_name, srv_config)
-            await server.initialize()
+        # 各服务器并发启动，总耗时取决于最慢的一个；启动失败或超时的服务器被跳过，不影响其他服务器
+        servers = [Server(server_name, srv_config) for server_name, srv_config in mcp_servers.items()]
+        results = await asyncio.gather(*(self._start_server(server) for server in servers))
+
+        # 按配置文件中的顺序汇总工具，保证工具列表的顺序固定
+        for server, tools in zip(servers, results):
+            if tools is None:
+                continue
+            server_name = server.name
             self.servers[server_name] = server
-            tools = await server.list_tools()
             self.tools_by_server[server_name] = tools
 
             for tool in tools:
@@ -261,10 +520,42 @@ class MultiServerMCPClient:
         for name in self.servers:
             srv_cfg = mcp_servers[name]
             logging.info(f"  - {name}: command={srv_cfg['command']}, args={srv_cfg['args']}")
+        if self.failed_servers:
+            logging.warning("\n⚠️  未能启动的服务器:")
+            for name, reason in self.failed_servers.items():
+                logging.warning(f"  - {name}: {reason}")
         logging.info("\n汇总的工具:")
         for t in self.all_tools:
             logging.info(f"  - {t['function']['name']}")
 
+    async def _start_server(self, server: Server) -> Optional[List[Any]]:
+        """
+        启动单个服务器并获取工具列表，超过 startup_timeout（默认 SERVER_START_TIMEOUT）秒视为失败
+
+        Returns:
+            工具列表；启动失败或超时时返回 None，原因记录在 failed_servers 中
+        """
+        timeout = float(server.config.get("startup_timeout", SERVER_START_TIMEOUT))
+        started = time.perf_counter()
+        try:
+            tools = await asyncio.wait_for(self._connect_server(server), timeout)
+        except asyncio.TimeoutError:
+            self.failed_servers[server.name] = f"启动超时（{timeout:g} 秒）"
+        except Exception as e:
+            self.failed_servers[server.name] = f"启动失败: {e}"
+        else:
+            logging.info(f"服务器 {server.name} 启动完成，用时 {time.perf_counter() - started:.2f} 秒，工具 {len(tools)} 个")
+            return tools
+
+        logging.error(f"服务器 {server.name} 已跳过: {self.failed_servers[server.name]}")
+        self._pending_cleanups.append(asyncio.create_task(server.cleanup()))
+        return None
+
+    @staticmethod
+    async def _connect_server(server: Server) -> List[Any]:
+        await server.start()
+        return await server.list_tools()
+
     async def transform_json(self, json_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         将工具的 input_schema 转换为 OpenAI 所需的 parameters 格式，并删除多余字段
@@ -298,12 +589,12 @@ class MultiServerMCPClient:
         使用 OpenAI 接口进行对话，并支持多次工具调用（Function Calling）。
         如果返回 finish_reason 为 "tool_calls"，则进行工具调用后再发起请求。
         """
-        response = self.client.get_response(messages, tools=self.all_tools)
+        response = await self.client.get_response(messages, tools=self.all_tools)
         # 如果模型返回工具调用
         if response.choices[0].finish_reason == "tool_calls":
             while True:
                 messages = await self.create_function_response_messages(messages, response)
-                response = self.client.get_response(messages, tools=self.all_tools)
+                response = await self.client.get_response(messages, tools=self.all_tools)
                 if response.choices[0].finish_reason != "tool_calls":
                     break
         return response
@@ -312,14 +603,16 @@ class MultiServerMCPClient:
         Dict[str, Any]]:
         """
         将模型返回的工具调用解析执行，并将结果追加到消息队列中
+        同一轮的多个工具调用并发执行（各服务器的并发数受 max_concurrency 限制），
+        结果消息按模型给出的调用顺序追加
         """
         function_call_messages = response.choices[0].message.tool_calls
         messages.append(response.choices[0].message.model_dump())
-        for function_call_message in function_call_messages:
-            tool_name = function_call_message.function.name
-            tool_args = json.loads(function_call_message.function.arguments)
-            # 调用 MCP 工具
-            function_response = await self._call_mcp_tool(tool_name, tool_args)
+        function_responses = await asyncio.gather(
+            *(self._run_tool_call(function_call_message.function.name, function_call_message.function.arguments)
+              for function_call_message in function_call_messages)
+        )
+        for function_call_message, function_response in zip(function_call_messages, function_responses):
             messages.append({
                 "role": "tool",
                 "content": function_response,
@@ -327,6 +620,100 @@ class MultiServerMCPClient:
             })
         return messages
 
+    async def _run_tool_call(self, tool_name: str, arguments: Optional[str]) -> Any:
+        """
+        执行单个工具调用，出错时返回错误信息而不是抛出异常，
+        同一轮的其他调用照常完成，模型可以根据错误信息调整
+        """
+        try:
+            tool_args = json.loads(arguments or "{}")
+            # 调用 MCP 工具
+            return await self._call_mcp_tool(tool_name, tool_args)
+        except Exception as e:
+            logging.error(f"Error calling tool {tool_name}: {e}")
+            return f"工具调用失败: {tool_name}: {e}"
+
+    async def chat_stream(self, messages: List[Dict[str, Any]],
+                          on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        流式版本的 chat_base：文本增量一到达就交给 on_text 输出；
+        工具调用的片段逐步拼接，某个调用一完整就立即开始执行，与模型继续生成后面的调用重叠。
+        工具调用消息和结果按调用顺序追加到 messages 中（与 create_function_response_messages 相同）
+
+        Returns:
+            最后一轮的 assistant 消息（不含工具调用，未追加到 messages）
+        """
+        while True:
+            assistant_message, tool_tasks = await self._stream_turn(messages, on_text)
+            if not tool_tasks:
+                return assistant_message
+            messages.append(assistant_message)
+            function_responses = await asyncio.gather(*tool_tasks)
+            for tool_call, function_response in zip(assistant_message["tool_calls"], function_responses):
+                messages.append({
+                    "role": "tool",
+                    "content": function_response,
+                    "tool_call_id": tool_call["id"],
+                })
+
+    async def _stream_turn(self, messages: List[Dict[str, Any]],
+                           on_text: Optional[Callable[[str], None]]) -> Tuple[Dict[str, Any], List[asyncio.Task]]:
+        """
+        接收一次流式响应，边接收边执行已完整的工具调用
+
+        一个工具调用在参数已拼成完整的 JSON 对象（JSON 对象后不会再有内容）或响应结束时视为完整。
+        不能以后一个调用的片段开始到达为准：有的接口会交替发送多个调用的片段。
+        调用按 index 依次启动，前面的调用未完整时后面的调用等它完整后再启动
+
+        Returns:
+            (assistant 消息, 按调用顺序排列的工具执行任务)
+        """
+        content_parts: List[str] = []
+        tool_calls: List[Dict[str, Any]] = []
+        tool_tasks: List[asyncio.Task] = []
+
+        def dispatch(finished: bool = False) -> None:
+            # 按顺序启动已完整的调用；响应结束时启动剩下的所有调用
+            while len(tool_tasks) < len(tool_calls):
+                function = tool_calls[len(tool_tasks)]["function"]
+                if not finished and not _is_complete_arguments(function["arguments"]):
+                    break
+                tool_tasks.append(asyncio.create_task(self._run_tool_call(function["name"], function["arguments"])))
+
+        stream = await self.client.stream_response(messages, tools=self.all_tools)
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                    if on_text:
+                        on_text(delta.content)
+                for fragment in delta.tool_calls or []:
+                    while len(tool_calls) <= fragment.index:
+                        tool_calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+                    tool_call = tool_calls[fragment.index]
+                    if fragment.id:
+                        tool_call["id"] = fragment.id
+                    if fragment.function:
+                        tool_call["function"]["name"] += fragment.function.name or ""
+                        tool_call["function"]["arguments"] += fragment.function.arguments or ""
+                    dispatch()
+            dispatch(finished=True)
+        except BaseException:
+            # 流中断或本轮被取消：已启动的工具调用一并取消
+            for task in tool_tasks:
+                task.cancel()
+            raise
+        finally:
+            await stream.close()
+
+        assistant_message: Dict[str, Any] = {"role": "assistant", "content": "".join(content_parts) or None}
+        if tool_calls:
+            assistant_message["tool_calls"] = tool_calls
+        return assistant_message, tool_tasks
+
     async def process_query(self, user_query: str) -> str:
         """
         OpenAI Function Calling 流程：
@@ -335,7 +722,7 @@ class MultiServerMCPClient:
          3. 将工具调用结果返回给模型，获得最终回答
         """
         messages = [{"role": "user", "content": user_query}]
-        response = self.client.get_response(messages, tools=self.all_tools)
+        response = await self.client.get_response(messages, tools=self.all_tools)
         content = response.choices[0]
         logging.info(content)
         if content.finish_reason == "tool_calls":
@@ -350,7 +737,7 @@ class MultiServerMCPClient:
                 "content": result,
                 "tool_call_id": tool_call.id,
             })
-            response = self.client.get_response(messages, tools=self.all_tools)
+            response = await self.client.get_response(messages, tools=self.all_tools)
             return response.choices[0].message.content
         return content.message.content
 
@@ -364,34 +751,90 @@ class MultiServerMCPClient:
         server_name, tool_name = parts
         server = self.servers.get(server_name)
         if not server:
+            if server_name in self.failed_servers:
+                return f"服务器 {server_name} 不可用: {self.failed_servers[server_name]}"
             return f"找不到服务器: {server_name}"
         resp = await server.execute_tool(tool_name, tool_args)
         return resp.content if resp.content else "工具执行无输出"
 
     async def chat_loop(self) -> None:
         """多服务器 MCP + OpenAI Function Calling 客户端主循环"""
-        logging.info("\n🤖 多服务器 MCP + Function Calling 客户端已启动！输入 'quit' 退出。")
-        messages: List[Dict[str, Any]] = []
+        logging.info("\n🤖 多服务器 MCP + Function Calling 客户端已启动！输入 'quit' 退出，请求进行中按 Ctrl+C 取消本轮。")
+        context = ChatContext()
         while True:
             query = input("\n你: ").strip()
             if query.lower() == "quit":
                 break
             try:
-                messages.append({"role": "user", "content": query})
-                messages = messages[-20:]  # 保持最新 20 条上下文
-                response = await self.chat_base(messages)
-                messages.append(response.choices[0].message.model_dump())
-                result = response.choices[0].message.content
-                # logging.info(f"\nAI: {result}")
-                print(f"\nAI: {result}")
+                context.add({"role": "user", "content": query})
+                # 按 token 预算选取历史，工具调用与结果成对保留
+                messages = context.build()
+                history_size = len(messages)
+                if LLM_STREAM:
+                    print("\nAI: ", end="", flush=True)
+                    reply = await self._run_cancellable(self.chat_stream(messages, on_text=_print_delta))
+                else:
+                    response = await self._run_cancellable(self.chat_base(messages))
+                    reply = response.choices[0].message.model_dump() if response is not None else None
+                if reply is None:
+                    # 本轮被取消：撤回用户消息，已追加的工具调用不计入历史
+                    context.discard_turn()
+                    print("\n⏹️  已取消本轮请求")
+                    continue
+                # 本轮产生的工具调用、结果和最终回答计入历史
+                for message in messages[history_size:] + [reply]:
+                    context.add(message)
+                if LLM_STREAM:
+                    print()
+                else:
+                    # logging.info(f"\nAI: {reply['content']}")
+                    print(f"\nAI: {reply['content']}")
             except Exception as e:
+                # 出错的一轮同样撤回，否则之后的每次请求都会带上这条没有回答的用户消息
+                context.discard_turn()
                 print(f"\n⚠️  调用过程出错: {e}")
 
+    @staticmethod
+    async def _run_cancellable(coro: Any) -> Any:
+        """
+        执行一轮对话，期间按 Ctrl+C 只取消这一轮（中止进行中的模型请求和工具调用），不退出客户端
+
+        Returns:
+            协程的结果；被 Ctrl+C 取消时返回 None
+        """
+        loop = asyncio.get_running_loop()
+        turn = asyncio.ensure_future(coro)
+        interrupted = False
+
+        def cancel_turn(signum, frame):
+            nonlocal interrupted
+            interrupted = True
+            loop.call_soon_threadsafe(turn.cancel)
+
+        previous_handler = signal.signal(signal.SIGINT, cancel_turn)
+        try:
+            return await turn
+        except asyncio.CancelledError:
+            # 只吞掉 Ctrl+C 引起的取消，外部的取消照常传播
+            if interrupted and turn.cancelled():
+                return None
+            raise
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+
     async def cleanup(self) -> None:
         """关闭所有资源"""
+        await asyncio.gather(*(server.cleanup() for server in self.servers.values()), *self._pending_cleanups,
+                             return_exceptions=True)
+        await self.client.close()
         await self.exit_stack.aclose()
 
 
+def _print_delta(text: str) -> None:
+    """流式输出文本增量"""
+    print(text, end="", flush=True)
+
+
 # =============================
 # 主函数
 # =============================
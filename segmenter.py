@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可插拔的中文分词后端
+- ngram: 原先的2-4字滑动窗口（不分词），候选词重叠较多；默认后端
+- dag:   基于词典的最大概率分词（前缀词典构建DAG + 动态规划），词典文件以内存映射方式加载，可叠加用户词典；
+         候选词更干净（不会出现“工程 程师”这类半截词），但比 ngram 慢约一倍（见 bench_keywords.py），需显式选用
+- jieba: 已安装 jieba 时可选用
+
+关键词提取只把汉字串交给分词后端，由 KEYWORD_SEGMENTER 环境变量选择后端
+"""
+
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DICTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dicts")
+DEFAULT_DICT_PATH = os.path.join(DICTS_DIR, "segment_dict.bin")
+DEFAULT_USER_DICT_PATH = os.path.join(DICTS_DIR, "user_dict.txt")
+
+# 词典文件格式（小端）：
+#   头部    magic(8) 词条数(u32) 槽位数(u32) 总词频(u64) 最长词长(u32) 保留(u32)
+#   offsets u32[词条数 + 1]   每个词条在 blob 中的起止位置
+#   freqs   u32[词条数]       词频，0 表示只是某个词的前缀
+#   slots   u32[槽位数]       开放寻址哈希表（crc32），存 词条序号 + 1，0 为空槽
+#   blob    所有词条的UTF-8编码
+DICT_MAGIC = b"WXSEG1\0\0"
+_HEADER = struct.Struct('<8sIIQII')
+_U32 = struct.Struct('<I')
+_U32_PAIR = struct.Struct('<II')
+
+# 只是某个词的前缀（不是完整的词）时 _log_prob 的返回值；真实词的对数概率总是小于0
+_PREFIX_ONLY = 1.0
+
+_HAN_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+
+
+def write_dictionary(word_freqs: Dict[str, int], path):
+    """
+    把 词 -> 词频 写成可内存映射的词典文件（自动补充前缀词条）
+    :param word_freqs: 词频表
+    :param path: 输出路径
+    """
+    entries = {word: int(freq) for word, freq in word_freqs.items() if word and int(freq) > 0}
+    for word in list(entries):
+        for end in range(1, len(word)):
+            entries.setdefault(word[:end], 0)
+
+    words = sorted(entries)
+    encoded = [word.encode('utf-8') for word in words]
+    slot_count = max(8, int(len(words) * 1.5) | 1)
+
+    slots = [0] * slot_count
+    for index, data in enumerate(encoded):
+        slot = zlib.crc32(data) % slot_count
+        while slots[slot]:
+            slot = (slot + 1) % slot_count
+        slots[slot] = index + 1
+
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(DICT_MAGIC, len(words), slot_count, sum(entries.values()),
+                             max((len(word) for word in words), default=0), 0))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(struct.pack(f'<{len(words)}I', *(entries[word] for word in words)))
+        f.write(struct.pack(f'<{slot_count}I', *slots))
+        f.write(b''.join(encoded))
+
+
+def load_user_dictionary(path) -> Dict[str, Optional[int]]:
+    """
+    读取用户词典：每行“词 [词频]”，#开头为注释；未写词频时为None（由分词器按需计算）
+    """
+    words: Dict[str, Optional[int]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            words[parts[0]] = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    return words
+
+
+class NgramSegmenter:
+    """原先的关键词候选：汉字串中所有2-4字窗口（按位置、长词优先的顺序）"""
+    name = "ngram"
+    # 窗口不是真正的词，需要去掉以虚词结尾的片段
+    filter_suffixes = True
+
+    def cut_run(self, run: str) -> List[str]:
+        n = len(run)
+        return [run[i:i + length] for i in range(n) for length in (4, 3, 2) if i + length <= n]
+
+
+class DictSegmenter:
+    """基于前缀词典的最大概率分词"""
+    name = "dag"
+    filter_suffixes = False
+
+    def __init__(self, dict_path=DEFAULT_DICT_PATH, user_dict_path=None, cache_size=65536):
+        """
+        初始化分词器
+        :param dict_path: 词典文件（由 build_segment_dict.py 生成），以只读内存映射方式打开，多个进程共享页缓存
+        :param user_dict_path: 用户词典（可选），词条优先于主词典
+        :param cache_size: 词频查询的缓存条目数
+        """
+        self.dict_path = dict_path
+        with open(dict_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.entry_count, self.slot_count, self.total, self.max_word_len, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != DICT_MAGIC:
+            raise ValueError(f"不是有效的分词词典文件: {dict_path}")
+
+        self._offsets_pos = _HEADER.size
+        self._freqs_pos = self._offsets_pos + 4 * (self.entry_count + 1)
+        self._slots_pos = self._freqs_pos + 4 * self.entry_count
+        self._blob_pos = self._slots_pos + 4 * self.slot_count
+
+        # 用户词典放在内存中，查询时优先于主词典
+        self._user_words: Dict[str, int] = {}
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        self._log_prob = lru_cache(maxsize=cache_size)(self._compute_log_prob)
+        if user_dict_path:
+            self.add_user_words(load_user_dictionary(user_dict_path))
+
+    def add_user_words(self, words: Dict[str, Optional[int]]):
+        """添加用户词条；未指定词频时取刚好能让该词不被切开的词频"""
+        for word, freq in words.items():
+            if freq is None:
+                freq = self.suggest_freq(word)
+            self._user_words[word] = freq
+            self.total += freq
+            self.max_word_len = max(self.max_word_len, len(word))
+            for end in range(1, len(word)):
+                prefix = word[:end]
+                if prefix not in self._user_words and self._lookup_dict(prefix) is None:
+                    self._user_words[prefix] = 0
+        self.lookup.cache_clear()
+        self._log_prob.cache_clear()
+
+    def suggest_freq(self, word: str) -> int:
+        """计算使该词作为整体切分所需的最小词频"""
+        probability = 1.0
+        for part in self.cut_run(word):
+            probability *= (self._lookup(part) or 1) / self.total
+        return max(int(probability * self.total) + 1, self._lookup(word) or 1)
+
+    def _lookup(self, word: str) -> Optional[int]:
+        """查询词频：None 表示不是任何词的前缀，0 表示只是前缀"""
+        freq = self._user_words.get(word)
+        if freq is not None:
+            return freq
+        return self._lookup_dict(word)
+
+    def _compute_log_prob(self, word: str) -> Optional[float]:
+        """词的对数概率；不是任何词的前缀时为None，只是前缀时为 _PREFIX_ONLY"""
+        freq = self._lookup(word)
+        if freq is None:
+            return None
+        return math.log(freq / self.total) if freq else _PREFIX_ONLY
+
+    def _lookup_dict(self, word: str) -> Optional[int]:
+        data = word.encode('utf-8')
+        mm = self._mm
+        slot = zlib.crc32(data) % self.slot_count
+        while True:
+            index = _U32.unpack_from(mm, self._slots_pos + 4 * slot)[0]
+            if not index:
+                return None
+            index -= 1
+            start, end = _U32_PAIR.unpack_from(mm, self._offsets_pos + 4 * index)
+            if mm[self._blob_pos + start:self._blob_pos + end] == data:
+                return _U32.unpack_from(mm, self._freqs_pos + 4 * index)[0]
+            slot = (slot + 1) % self.slot_count
+
+    def cut(self, text: str) -> List[str]:
+        """分词：汉字串按词典切分，其他字符原样保留为片段"""
+        words = []
+        position = 0
+        for match in _HAN_RUN_PATTERN.finditer(text):
+            if match.start() > position:
+                words.append(text[position:match.start()])
+            words.extend(self.cut_run(match.group()))
+            position = match.end()
+        if position < len(text):
+            words.append(text[position:])
+        return words
+
+    def cut_run(self, run: str) -> List[str]:
+        """切分一个纯汉字串"""
+        n = len(run)
+        log_prob = self._log_prob
+        unknown = -math.log(self.total)  # 词典中没有的字按词频1处理
+        max_word_len = self.max_word_len
+
+        # 从后向前一趟完成：枚举从 start 开始的词（即DAG的边）时直接做动态规划，不单独构建DAG
+        best = [0.0] * (n + 1)
+        route = [0] * n
+        for start in range(n - 1, -1, -1):
+            best_score = None
+            for end in range(start + 1, min(n, start + max_word_len) + 1):
+                logp = log_prob(run[start:end])
+                if logp is None:
+                    break
+                if logp != _PREFIX_ONLY:
+                    score = logp + best[end]
+                    if best_score is None or score >= best_score:
+                        best_score, best_end = score, end
+            if best_score is None:
+                best_score, best_end = unknown + best[start + 1], start + 1
+            best[start] = best_score
+            route[start] = best_end
+
+        words = []
+        start = 0
+        while start < n:
+            end = route[start]
+            words.append(run[start:end])
+            start = end
+        return words
+
+    def close(self):
+        self._mm.close()
+
+
+class JiebaSegmenter:
+    """jieba 分词（需要安装 jieba）"""
+    name = "jieba"
+    filter_suffixes = False
+
+    def __init__(self, user_dict_path=None):
+        import jieba
+        self._jieba = jieba
+        if user_dict_path:
+            jieba.load_userdict(user_dict_path)
+
+    def cut_run(self, run: str) -> List[str]:
+        return self._jieba.lcut(run, HMM=False)
+
+
+_SEGMENTERS = {
+    "ngram": NgramSegmenter,
+    "dag": DictSegmenter,
+    "jieba": JiebaSegmenter,
+}
+_instances: Dict[str, object] = {}
+_instances_lock = threading.Lock()
+
+
+def available_segmenters() -> Iterable[str]:
+    return _SEGMENTERS.keys()
+
+
+def _user_dict_path() -> Optional[str]:
+    """用户词典路径：SEGMENT_USER_DICT 环境变量，未设置时使用 dicts/user_dict.txt（存在时）"""
+    path = os.getenv("SEGMENT_USER_DICT")
+    if path is None and os.path.exists(DEFAULT_USER_DICT_PATH):
+        path = DEFAULT_USER_DICT_PATH
+    return path or None
+
+
+def get_segmenter(name: Optional[str] = None):
+    """
+    获取分词后端（单例）
+    :param name: ngram / dag / jieba，默认取 KEYWORD_SEGMENTER 环境变量（默认 ngram）；
+                 后端无法加载（缺少词典或 jieba）时退回 ngram
+    """
+    name = name or os.getenv("KEYWORD_SEGMENTER", "ngram")
+    if name not in _SEGMENTERS:
+        raise ValueError(f"未知的分词后端: {name}，可选: {', '.join(_SEGMENTERS)}")
+
+    with _instances_lock:
+        if name not in _instances:
+            try:
+                if name == "ngram":
+                    _instances[name] = NgramSegmenter()
+                elif name == "dag":
+                    _instances[name] = DictSegmenter(
+                        os.getenv("SEGMENT_DICT", DEFAULT_DICT_PATH),
+                        user_dict_path=_user_dict_path()
+                    )
+                else:
+                    _instances[name] = JiebaSegmenter(user_dict_path=_user_dict_path())
+            except (OSError, ValueError, ImportError) as e:
+                logger.warning(f"分词后端 {name} 加载失败，改用 ngram: {e}")
+                _instances[name] = _instances.get("ngram") or NgramSegmenter()
+        return _instances[name]
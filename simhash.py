@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SimHash 文章指纹
+公众号文章经常被其他账号转载（不同URL，正文只多了开头的转载说明或结尾的推广），
+按正文的3字片段计算64位 SimHash，汉明距离不超过 NEAR_DUPLICATE_DISTANCE 的两篇文章视为近似重复。
+
+查找时把指纹分成 NEAR_DUPLICATE_DISTANCE + 1 段：距离不超过该值的两个指纹至少有一段完全相同（抽屉原理），
+所以只需按段做等值查询取候选，再逐个核对汉明距离，不必与所有文章比较。
+
+正文太短时不计算指纹（见 has_fingerprint）：空正文、纯图片或视频文章、提取失败的占位文字得到的指纹都相同，
+按指纹比较会把互不相关的文章误判为转载。
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import List
+
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3
+SIMHASH_BANDS = NEAR_DUPLICATE_DISTANCE + 1
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+# 片段长度（字符）
+SHINGLE_SIZE = 3
+
+# 只保留文字和数字，空白、标点和排版符号的差异不影响指纹
+_NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+# 归一化后的正文少于这个字数时不计算指纹
+MIN_FINGERPRINT_CHARS = 50
+
+# 正文提取失败时的占位文字（见 article_extractor 和 weixin_spider）
+_PLACEHOLDER_CONTENTS = frozenset({'无法提取内容', '内容提取失败'})
+
+# 每个比特位为1的字节值
+_BYTES_WITH_BIT = [[value for value in range(256) if value >> bit & 1] for bit in range(8)]
+
+
+def has_fingerprint(text: str) -> bool:
+    """
+    正文是否足够长、可以用指纹查找近似重复
+    :param text: 正文
+    :return: 正文为占位文字或归一化后少于 MIN_FINGERPRINT_CHARS 个字时返回 False
+    """
+    if not text or text.strip() in _PLACEHOLDER_CONTENTS:
+        return False
+    return len(_NON_WORD_PATTERN.sub('', text)) >= MIN_FINGERPRINT_CHARS
+
+
+def simhash(text: str) -> int:
+    """
+    计算正文的64位 SimHash
+    :param text: 正文
+    :return: 无符号64位整数
+    """
+    normalized = _NON_WORD_PATTERN.sub('', text).lower()
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = Counter([normalized])
+    else:
+        shingles = Counter(normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1))
+
+    # 按“第几个字节、字节值”累计权重，最后再展开到64个比特位，避免逐位循环每个片段
+    tallies = [0] * (8 * 256)
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest()
+        for position, value in enumerate(digest):
+            tallies[position << 8 | value] += weight
+
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position in range(8):
+        row = tallies[position << 8:(position + 1) << 8]
+        for bit in range(8):
+            if 2 * sum(row[value] for value in _BYTES_WITH_BIT[bit]) > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    """把指纹切成 SIMHASH_BANDS 段（每段16位）"""
+    mask = (1 << _BAND_BITS) - 1
+    return [fingerprint >> (band * _BAND_BITS) & mask for band in range(SIMHASH_BANDS)]
+
+
+def format_simhash(fingerprint: int) -> str:
+    """指纹的十六进制表示（保存在文章JSON中）"""
+    return format(fingerprint, '016x')
+
+
+def parse_simhash(value) -> int:
+    return int(value, 16)
+
+
+def to_sqlite_int(fingerprint: int) -> int:
+    """SQLite 的整数是有符号64位，存储前转换"""
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >= 1 << (SIMHASH_BITS - 1) else fingerprint
+
+
+def from_sqlite_int(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+微信爬虫实例池
+维护一组常驻的 WeixinSpider（每个实例持有独立的 Chrome 驱动），
+支持借出/归还、健康检查和容量上限，让多篇文章可以在多个预热好的浏览器上并行爬取
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from weixin_spider import WeixinSpider
+
+logger = logging.getLogger(__name__)
+
+
+class SpiderPool:
+    def __init__(self, size=2, checkout_timeout=300, spider_kwargs=None):
+        """
+        初始化爬虫池
+        :param size: 池中最多同时存在的爬虫（浏览器）数量
+        :param checkout_timeout: 借出实例时等待空闲实例的最长秒数
+        :param spider_kwargs: 创建 WeixinSpider 时使用的参数
+        """
+        self.size = max(1, int(size))
+        self.checkout_timeout = checkout_timeout
+        self.spider_kwargs: Dict[str, Any] = dict(spider_kwargs or {})
+        self._idle: List[WeixinSpider] = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def checkout(self, timeout=None) -> WeixinSpider:
+        """
+        借出一个爬虫实例，没有空闲实例且已达上限时阻塞等待
+        :param timeout: 等待秒数，默认使用 checkout_timeout
+        :return: 独占使用的 WeixinSpider
+        """
+        wait_seconds = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait_seconds
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("爬虫池已关闭")
+                if self._idle:
+                    # 后进先出：优先复用最近用过的浏览器
+                    spider = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    # 预占一个名额，在锁外创建浏览器
+                    self._created += 1
+                    spider = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待空闲爬虫超时（池大小: {self.size}）")
+                self._cond.wait(remaining)
+
+        if spider is None:
+            return self._create_spider()
+
+        if not self._is_healthy(spider):
+            logger.warning("检测到浏览器已失效，正在替换为新实例...")
+            self._close_spider(spider)
+            return self._create_spider()
+
+        return spider
+
+    def checkin(self, spider: WeixinSpider, discard=False) -> None:
+        """
+        归还爬虫实例
+        :param spider: 之前借出的实例
+        :param discard: 是否直接销毁该实例（例如确认浏览器已损坏）
+        """
+        if discard or self._closed:
+            self._close_spider(spider)
+            self._release_slot()
+            return
+
+        # 恢复调用方可能修改过的默认设置
+        spider.download_images = self.spider_kwargs.get("download_images", True)
+
+        with self._cond:
+            self._idle.append(spider)
+            self._cond.notify()
+
+    @contextmanager
+    def spider(self, timeout=None):
+        """以上下文管理器方式借出并自动归还爬虫实例"""
+        spider = self.checkout(timeout)
+        try:
+            yield spider
+        finally:
+            self.checkin(spider)
+
+    def stats(self) -> Dict[str, int]:
+        """获取池的当前状态"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle)
+            }
+
+    def close_all(self) -> None:
+        """关闭池中所有空闲实例，借出中的实例在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+
+        for spider in idle:
+            self._close_spider(spider)
+        logger.info(f"爬虫池已关闭，释放了 {len(idle)} 个空闲实例")
+
+    def _create_spider(self) -> WeixinSpider:
+        """在已预占的名额上创建新实例，失败时释放名额"""
+        try:
+            spider = WeixinSpider(**self.spider_kwargs)
+            logger.info(f"爬虫池新建实例成功 ({self.stats()['created']}/{self.size})")
+            return spider
+        except Exception as e:
+            logger.error(f"爬虫池创建实例失败: {e}")
+            self._release_slot()
+            raise RuntimeError(f"无法初始化爬虫实例: {e}")
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(spider: WeixinSpider) -> bool:
+        """检查浏览器会话是否仍然可用"""
+        if spider.driver is None:
+            # 浏览器尚未启动（或已关闭），下次需要时会按需重新启动
+            return True
+        try:
+            spider.driver.current_url
+            return True
+        except Exception as e:
+            logger.warning(f"浏览器健康检查失败: {e}")
+            return False
+
+    @staticmethod
+    def _close_spider(spider: WeixinSpider) -> None:
+        try:
+            spider.close()
+        except Exception as e:
+            logger.error(f"关闭爬虫实例失败: {e}")
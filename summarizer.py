@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抽取式摘要（TextRank）
+句子表示为 TF-IDF 向量（特征为汉字二元组和英文单词，与全文检索的切分方式相同），
+句子之间的相似度构成图，按 PageRank 给句子打分，摘要取得分最高且互不重复的句子。
+
+相似度不计算稠密的 n×n 矩阵：通过特征的倒排表只为共享特征的句子对计算，
+出现在太多句子中的特征（区分度低）不参与计算，每个句子只保留相似度最高的 TOP_K_NEIGHBORS 条边，
+所以长文章的计算量和内存随句子数线性增长。
+"""
+
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+from article_search import cjk_tokens
+
+# 短于该长度的句子（小标题、图片说明等）不参与排序
+MIN_SENTENCE_LENGTH = 10
+
+# 每个句子保留的相似句子数（图的出度上限）
+TOP_K_NEIGHBORS = 10
+
+# 出现在超过该数量句子中的特征不参与相似度计算，句子对的数量因此不超过 非零特征数 × 该值
+MAX_FEATURE_DF = 64
+
+# 特征的最大长度：numpy 字符串数组按最长的元素分配空间，正文中的长链接等截断后再参与计算
+MAX_TOKEN_LENGTH = 32
+
+# 相似度超过该值的两个句子视为重复，摘要中只保留得分高的一句
+REDUNDANCY_THRESHOLD = 0.5
+
+# PageRank 阻尼系数和收敛条件
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# 句末标点（保留在句子中）
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[。！？!?；;])')
+
+
+class SentenceRanking(NamedTuple):
+    sentences: List[str]
+    scores: np.ndarray
+    # 相似度超过 REDUNDANCY_THRESHOLD 的句子对 (i, j)，i < j
+    redundant_pairs: Set[Tuple[int, int]]
+
+
+def split_sentences(content: str, min_length=MIN_SENTENCE_LENGTH) -> List[str]:
+    """按段落和句末标点切分句子，去掉过短的句子和完全相同的重复句子"""
+    sentences = []
+    seen = set()
+    for paragraph in content.split('\n'):
+        for sentence in _SENTENCE_END_PATTERN.split(paragraph):
+            sentence = sentence.strip()
+            if len(sentence) >= min_length and sentence not in seen:
+                seen.add(sentence)
+                sentences.append(sentence)
+    return sentences
+
+
+def _sentence_vectors(sentences: List[str]):
+    """
+    句子的 TF-IDF 向量（L2归一化），以坐标形式返回
+    :return: (行号, 特征号, 权重, 每个特征的文档频率)
+    """
+    tokens = [cjk_tokens(sentence).lower().split() for sentence in sentences]
+    n = len(sentences)
+    token_rows = np.repeat(np.arange(n, dtype=np.int64), [len(sentence_tokens) for sentence_tokens in tokens])
+    if not len(token_rows):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), empty
+
+    # 词表编号和词频都用排序去重完成，不逐词维护字典
+    _, token_cols = np.unique(np.array([token[:MAX_TOKEN_LENGTH] for sentence_tokens in tokens for token in sentence_tokens]),
+                              return_inverse=True)
+    vocabulary_size = int(token_cols.max()) + 1
+    keys, counts = np.unique(token_rows * vocabulary_size + token_cols, return_counts=True)
+    rows, cols = keys // vocabulary_size, keys % vocabulary_size
+
+    df = np.bincount(cols, minlength=vocabulary_size)
+    weights = (1 + np.log(counts)) * (np.log((1 + n) / (1 + df[cols])) + 1)
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+    weights /= norms[rows]
+    return rows, cols, weights, df
+
+
+def _similarity_pairs(n: int, rows, cols, weights, df):
+    """
+    通过倒排表计算共享特征的句子对的余弦相似度
+    :return: (句子i, 句子j, 相似度)，i != j，每个有序对只出现一次
+    """
+    # 只出现在一个句子中的特征不产生句子对，太常见的特征被剪掉
+    keep = (df[cols] > 1) & (df[cols] <= MAX_FEATURE_DF)
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    if not len(rows):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+
+    order = np.argsort(cols, kind='stable')
+    rows, cols, weights = rows[order], cols[order], weights[order]
+
+    # 同一特征的条目相邻，每个条目与所在组内的所有条目配对
+    _, group_index, group_sizes = np.unique(cols, return_inverse=True, return_counts=True)
+    group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    sizes = group_sizes[group_index]
+    left = np.repeat(np.arange(len(rows)), sizes)
+    block_starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    right = np.repeat(group_starts[group_index], sizes) + (np.arange(len(left)) - block_starts)
+
+    i, j = rows[left], rows[right]
+    distinct = i != j
+    i, j = i[distinct], j[distinct]
+    products = weights[left][distinct] * weights[right][distinct]
+
+    # 同一句子对在多个特征上的乘积求和
+    keys, inverse = np.unique(i * n + j, return_inverse=True)
+    similarities = np.bincount(inverse, weights=products)
+    return keys // n, keys % n, similarities
+
+
+def _top_k_edges(source, target, similarity, k):
+    """每个句子只保留相似度最高的 k 条边"""
+    order = np.lexsort((-similarity, source))
+    source, target, similarity = source[order], target[order], similarity[order]
+    _, first, counts = np.unique(source, return_index=True, return_counts=True)
+    position = np.arange(len(source)) - np.repeat(first, counts)
+    keep = position < k
+    return source[keep], target[keep], similarity[keep]
+
+
+def _pagerank(n: int, source, target, weight) -> np.ndarray:
+    """带权 PageRank，每轮迭代是一次 O(边数) 的稀疏矩阵向量乘"""
+    out_weight = np.bincount(source, weights=weight, minlength=n)
+    dangling = out_weight == 0
+    transition = weight / out_weight[source]
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        spread = np.bincount(target, weights=transition * scores[source], minlength=n)
+        # 没有出边的句子把得分平均分给所有句子
+        updated = (1 - DAMPING) / n + DAMPING * (spread + scores[dangling].sum() / n)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+@lru_cache(maxsize=32)
+def rank_sentences(content: str) -> SentenceRanking:
+    """
+    对正文的句子打分（同一正文的结果会被缓存，生成多种风格的笔记时只计算一次）
+    :return: SentenceRanking（句子、得分、重复句子对）
+    """
+    sentences = split_sentences(content)
+    n = len(sentences)
+    if n <= 1:
+        return SentenceRanking(sentences, np.ones(n), set())
+
+    rows, cols, weights, df = _sentence_vectors(sentences)
+    source, target, similarity = _similarity_pairs(n, rows, cols, weights, df)
+    redundant = similarity > REDUNDANCY_THRESHOLD
+    redundant_pairs = {(int(a), int(b)) for a, b in zip(source[redundant], target[redundant]) if a < b}
+
+    source, target, similarity = _top_k_edges(source, target, similarity, TOP_K_NEIGHBORS)
+    return SentenceRanking(sentences, _pagerank(n, source, target, similarity), redundant_pairs)
+
+
+def summarize(content: str, max_sentences=5, in_document_order=True) -> List[str]:
+    """
+    抽取摘要句：按得分从高到低选取，跳过与已选句子重复的句子
+    :param content: 正文
+    :param max_sentences: 最多选取的句子数
+    :param in_document_order: 是否按原文顺序返回（否则按得分排序）
+    """
+    ranking = rank_sentences(content)
+    # 得分相同时靠前的句子优先
+    order = sorted(range(len(ranking.sentences)), key=lambda index: (-ranking.scores[index], index))
+
+    selected = []
+    for index in order:
+        if len(selected) >= max_sentences:
+            break
+        if any((min(index, chosen), max(index, chosen)) in ranking.redundant_pairs for chosen in selected):
+            continue
+        selected.append(index)
+
+    if in_document_order:
+        selected.sort()
+    return [ranking.sentences[index] for index in selected]
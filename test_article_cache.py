@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按URL索引的文章缓存（article_cache）：URL规范化、有效期、图片需求、文件失效和LRU淘汰
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from article_cache import ArticleCache, article_content_hash, normalize_article_url
+
+LONG_URL = "https://mp.weixin.qq.com/s?__biz=MzA5&mid=2650&idx=1&sn=abc123"
+SHORT_URL = "https://mp.weixin.qq.com/s/AbCdEfGh"
+
+
+def make_article(content="正文", title="标题"):
+    return {"title": title, "author": "作者", "content": content}
+
+
+def save(tmp_path, name, article_data):
+    """写出文章JSON文件，返回 saved_files"""
+    save_dir = tmp_path / name
+    save_dir.mkdir(exist_ok=True)
+    json_path = save_dir / f"{name}.json"
+    json_path.write_text(json.dumps(article_data, ensure_ascii=False), encoding="utf-8")
+    return [{"type": "json", "path": str(json_path)}, {"type": "txt", "path": str(json_path)}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArticleCache(str(tmp_path / "cache"), ttl=3600, max_entries=3)
+
+
+@pytest.mark.parametrize("url", [
+    LONG_URL,
+    "http://MP.weixin.qq.com/s?sn=abc123&idx=1&mid=2650&__biz=MzA5&chksm=ff&scene=21#wechat_redirect",
+    LONG_URL + "&sharer_shareinfo=x&utm_source=feed",
+])
+def test_long_urls_normalize_to_article_params(url):
+    assert normalize_article_url(url) == LONG_URL
+
+
+def test_short_urls_drop_all_query_params():
+    assert normalize_article_url(SHORT_URL + "/?scene=1&from=timeline") == SHORT_URL
+    assert normalize_article_url(SHORT_URL) != normalize_article_url(SHORT_URL + "x")
+
+
+def test_content_hash_ignores_other_fields():
+    article = make_article()
+    assert article_content_hash(article) == article_content_hash(dict(article, crawl_time="2025-07-02"))
+    assert article_content_hash(article) != article_content_hash(make_article(content="修改后的正文"))
+
+
+def test_put_then_lookup_with_tracking_params(cache, tmp_path):
+    article = make_article()
+    saved_files = save(tmp_path, "a", article)
+    cache.put(LONG_URL, article, saved_files)
+
+    entry, fresh = cache.lookup(LONG_URL + "&scene=1")
+    assert fresh
+    assert entry["saved_files"] == saved_files
+    assert entry["content_hash"] == article_content_hash(article)
+    assert cache.load_article(entry) == article
+
+
+def test_miss_for_unknown_url(cache):
+    assert cache.lookup(SHORT_URL) == (None, False)
+
+
+def test_expired_entry_is_returned_as_stale_and_touch_refreshes_it(tmp_path):
+    cache = ArticleCache(str(tmp_path / "cache"), ttl=60)
+    cache.put(SHORT_URL, make_article(), save(tmp_path, "a", make_article()))
+    entry, _ = cache.lookup(SHORT_URL)
+    entry["cached_at"] = time.time() - 120
+    cache._write_entry(cache._entry_path(SHORT_URL), entry)
+
+    entry, fresh = cache.lookup(SHORT_URL)
+    assert entry is not None and not fresh
+    cache.touch(SHORT_URL, entry)
+    assert cache.lookup(SHORT_URL)[1]
+
+
+def test_entry_without_images_does_not_serve_image_requests(cache, tmp_path):
+    cache.put(SHORT_URL, make_article(), save(tmp_path, "a", make_article()), download_images=False)
+    assert cache.lookup(SHORT_URL, download_images=True) == (None, False)
+    assert cache.lookup(SHORT_URL, download_images=False)[0] is not None
+
+
+def test_entry_is_dropped_when_saved_files_are_deleted(cache, tmp_path):
+    saved_files = save(tmp_path, "a", make_article())
+    cache.put(SHORT_URL, make_article(), saved_files)
+    os.remove(saved_files[0]["path"])
+
+    assert cache.lookup(SHORT_URL) == (None, False)
+    assert not os.path.exists(cache._entry_path(SHORT_URL))
+
+
+def test_invalidate(cache, tmp_path):
+    cache.put(SHORT_URL, make_article(), save(tmp_path, "a", make_article()))
+    cache.invalidate(SHORT_URL)
+    assert cache.lookup(SHORT_URL) == (None, False)
+
+
+def test_put_without_json_file_is_ignored(cache):
+    cache.put(SHORT_URL, make_article(), [{"type": "txt", "path": "a.txt"}])
+    assert os.listdir(cache.root) == []
+
+
+def test_least_recently_used_entries_are_evicted(cache, tmp_path):
+    urls = [f"{SHORT_URL}{i}" for i in range(4)]
+    for i, url in enumerate(urls[:3]):
+        cache.put(url, make_article(), save(tmp_path, f"a{i}", make_article()))
+        # 显式设置修改时间，避免文件系统时间精度影响先后顺序
+        os.utime(cache._entry_path(url), (1000 + i, 1000 + i))
+
+    # 查找会刷新修改时间：第一篇变成最近使用的
+    assert cache.lookup(urls[0])[0] is not None
+    cache.put(urls[3], make_article(), save(tmp_path, "a3", make_article()))
+
+    assert cache.lookup(urls[1]) == (None, False)
+    assert all(cache.lookup(url)[0] is not None for url in (urls[0], urls[2], urls[3]))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试文章目录数据库（article_catalog）：登记、查询、统计、全文检索和近似重复查找
+"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from article_catalog import ArticleCatalog
+from article_search import cjk_tokens
+from simhash import simhash
+
+URL = "https://mp.weixin.qq.com/s/catalog-test"
+
+
+def make_article(content, title="大模型工程实践", url=URL, author="测试作者", crawl_time="2025-07-01 08:00:00"):
+    return {"title": title, "author": author, "publish_time": "2025-07-01", "crawl_time": crawl_time,
+            "url": url, "content": content, "images": [], "word_count": len(content), "image_count": 0}
+
+
+def save(catalog, directory, name, article_data):
+    """像 WeixinSpider.save_article_to_file 一样写出JSON文件并登记"""
+    save_dir = directory / name
+    save_dir.mkdir(exist_ok=True)
+    json_path = str(save_dir / f"{name}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(article_data, f, ensure_ascii=False)
+    catalog.record(article_data, [{"type": "json", "path": json_path}])
+    return json_path
+
+
+def postings(catalog, term):
+    """直接查询倒排表（不连接登记表），残留的旧条目也会被计入"""
+    return catalog._query("SELECT rowid FROM search_index WHERE search_index MATCH ?",
+                          ('"' + cjk_tokens(term) + '"',))
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = ArticleCatalog(str(tmp_path / "catalog.db"))
+    yield catalog
+    catalog.close()
+
+
+def test_record_and_find(catalog, tmp_path):
+    save(catalog, tmp_path, "first", make_article("第一篇文章的正文"))
+    save(catalog, tmp_path, "second", make_article("第二篇文章的正文", title="另一篇", author="其他作者",
+                                                    url="https://mp.weixin.qq.com/s/other",
+                                                    crawl_time="2025-07-02 08:00:00"))
+
+    assert [row["title"] for row in catalog.find(url=URL + "?scene=1")] == ["大模型工程实践"]
+    assert [row["title"] for row in catalog.find(author="其他作者")] == ["另一篇"]
+    assert [row["title"] for row in catalog.find(since="2025-07-02")] == ["另一篇"]
+    assert len(catalog.find(title="篇")) == 1
+
+    stats = catalog.statistics()
+    assert stats["saves"] == 2 and stats["urls"] == 2
+    assert stats["total_words"] == len("第一篇文章的正文") + len("第二篇文章的正文")
+
+
+def test_search_ranks_title_matches_first(catalog, tmp_path):
+    save(catalog, tmp_path, "body", make_article("这篇文章顺带提到了向量数据库。", title="随笔",
+                                                  url="https://mp.weixin.qq.com/s/body"))
+    save(catalog, tmp_path, "title", make_article("正文讨论索引结构和召回率。", title="向量数据库选型",
+                                                   url="https://mp.weixin.qq.com/s/title"))
+
+    results = catalog.search("向量数据库")
+    assert [result["title"] for result in results] == ["向量数据库选型", "随笔"]
+    assert "**向量数据库**" in results[1]["snippet"]
+    assert catalog.search("不存在的词") == []
+
+
+def test_search_filters_by_kind(catalog, tmp_path):
+    article_data = make_article("正文介绍检索增强生成。")
+    save(catalog, tmp_path, "article", article_data)
+    notes_path = tmp_path / "notes.md"
+    notes_path.write_text("# 读书笔记\n\n检索增强生成的要点", encoding="utf-8")
+    catalog.index_notes(article_data, str(notes_path), notes_path.read_text(encoding="utf-8"))
+
+    assert {result["kind"] for result in catalog.search("检索增强")} == {"article", "notes"}
+    assert [result["kind"] for result in catalog.search("检索增强", kind="notes")] == ["notes"]
+    with pytest.raises(ValueError):
+        catalog.search("检索增强", kind="unknown")
+
+
+def test_overwritten_document_removes_old_postings(catalog, tmp_path):
+    """同一路径的文件被覆盖后重新登记：旧正文的倒排条目要被删除，而不只是登记行"""
+    json_path = save(catalog, tmp_path, "article", make_article("旧版本提到了蒸馏模型"))
+    assert postings(catalog, "蒸馏模型")
+
+    save(catalog, tmp_path, "article", make_article("新版本改为讨论量化部署"))
+    assert postings(catalog, "蒸馏模型") == []
+    assert [result["path"] for result in catalog.search("量化部署")] == [json_path]
+    assert catalog._query("SELECT COUNT(*) AS n FROM search_docs")[0]["n"] == 1
+
+
+def test_reindexing_same_content_does_not_grow_index(catalog, tmp_path):
+    article_data = make_article("同样的内容保存了两次")
+    save(catalog, tmp_path, "first", article_data)
+    second_path = save(catalog, tmp_path, "second", article_data)
+
+    assert len(postings(catalog, "保存了两次")) == 1
+    assert [result["path"] for result in catalog.search("保存了两次")] == [second_path]
+
+
+def test_backfill_prunes_deleted_files(catalog, tmp_path):
+    articles_dir = tmp_path / "articles"
+    articles_dir.mkdir()
+    kept = save(catalog, articles_dir, "kept", make_article("保留的文章", url="https://mp.weixin.qq.com/s/kept"))
+    removed = save(catalog, articles_dir, "removed", make_article("被删除的文章"))
+    os.remove(removed)
+
+    added, deleted = catalog.backfill(str(articles_dir), notes_dir=None)
+    assert (added, deleted) == (0, 1)
+    assert [row["json_path"] for row in catalog.find()] == [kept]
+    assert postings(catalog, "被删除") == []
+
+
+def test_backfill_indexes_existing_files(catalog, tmp_path):
+    articles_dir = tmp_path / "articles"
+    (articles_dir / "old").mkdir(parents=True)
+    json_path = articles_dir / "old" / "old.json"
+    json_path.write_text(json.dumps(make_article("补录进来的旧文章"), ensure_ascii=False), encoding="utf-8")
+
+    assert catalog.backfill(str(articles_dir), notes_dir=None) == (1, 0)
+    assert catalog.backfill(str(articles_dir), notes_dir=None) == (0, 0)
+    assert [result["path"] for result in catalog.search("补录")] == [str(json_path)]
+
+
+def test_upgrade_rebuilds_index_without_stale_postings(tmp_path):
+    """旧版本数据库（search_docs 没有 body 列）中残留的倒排条目在升级时被清除"""
+    articles_dir = tmp_path / "articles"
+    (articles_dir / "old").mkdir(parents=True)
+    json_path = str(articles_dir / "old" / "old.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(make_article("当前的正文内容"), f, ensure_ascii=False)
+
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE search_docs (rowid INTEGER PRIMARY KEY AUTOINCREMENT, article_id TEXT NOT NULL,
+            kind TEXT NOT NULL, path TEXT NOT NULL UNIQUE, title TEXT NOT NULL DEFAULT '', content_hash TEXT NOT NULL);
+        CREATE VIRTUAL TABLE search_index USING fts5(title, body, content='', tokenize='unicode61 remove_diacritics 2');
+    """)
+    conn.execute("INSERT INTO search_docs (rowid, article_id, kind, path, title, content_hash) "
+                 "VALUES (1, 'a', 'article', ?, '大模型工程实践', '')", (json_path,))
+    # 旧实现覆盖文件时留下的条目：rowid 1 先后索引过两个版本
+    conn.execute("INSERT INTO search_index (rowid, title, body) VALUES (1, ?, ?)",
+                 (cjk_tokens("大模型工程实践"), cjk_tokens("早已删除的旧正文")))
+    conn.execute("INSERT INTO search_index (rowid, title, body) VALUES (1, ?, ?)",
+                 (cjk_tokens("大模型工程实践"), cjk_tokens("当前的正文内容")))
+    conn.commit()
+    conn.close()
+
+    catalog = ArticleCatalog(db_path)
+    try:
+        assert postings(catalog, "旧正文") == []
+        assert [result["path"] for result in catalog.search("正文内容")] == [json_path]
+        # 升级后覆盖文件也能删除旧条目
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(make_article("更新后的版本"), f, ensure_ascii=False)
+        catalog.record(make_article("更新后的版本"), [{"type": "json", "path": json_path}])
+        assert postings(catalog, "正文内容") == []
+    finally:
+        catalog.close()
+
+
+def test_find_near_duplicates(catalog, tmp_path):
+    content = "".join(f"第{i}段讨论了模型部署中的一个具体问题，以及团队最后采用的解决办法。" for i in range(40))
+    json_path = save(catalog, tmp_path, "original", make_article(content))
+
+    matches = catalog.find_near_duplicates(simhash("本文转载自其他公众号。" + content))
+    assert [match["json_path"] for match in matches] == [json_path]
+    assert matches[0]["url"] == URL
+    assert catalog.find_near_duplicates(simhash("一篇完全不同的文章，讲的是周末去哪里爬山。" * 20)) == []
+
+
+def test_short_content_is_not_fingerprinted(catalog, tmp_path):
+    save(catalog, tmp_path, "image-only", make_article(""))
+    save(catalog, tmp_path, "failed", make_article("无法提取内容"))
+    assert catalog._query("SELECT json_path FROM fingerprints") == []
+    assert catalog.find_near_duplicates(simhash("")) == []
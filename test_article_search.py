@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试全文检索的分词、查询构造和摘要截取（article_search）
+"""
+
+from article_search import build_match_query, cjk_tokens, make_snippet, notes_title
+
+
+def test_cjk_tokens_splits_han_runs_into_bigrams():
+    assert cjk_tokens("大模型") == "大模 模型"
+    assert cjk_tokens("用 GPT4 写代码") == "用 GPT4 写代 代码"
+    assert cjk_tokens("，。！") == ""
+
+
+def test_build_match_query():
+    assert build_match_query("大模型 部署") == '"大模 模型" AND "部署"'
+    # 单个汉字按前缀匹配
+    assert build_match_query("模") == '"模"*'
+    assert build_match_query("  ，。 ") is None
+
+
+def test_make_snippet_marks_terms():
+    text = "开头的铺垫。" * 30 + "这里讨论向量数据库的选型。" + "结尾。" * 30
+    snippet = make_snippet(text, "向量数据库", width=40)
+    assert "**向量数据库**" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert make_snippet("短文本", "不存在") == "短文本"
+
+
+def test_notes_title():
+    assert notes_title("前言\n# 读书笔记：标题\n正文", "fallback") == "读书笔记：标题"
+    assert notes_title("没有标题行", "fallback") == "fallback"
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试原子写文件（atomic_file.atomic_write）
+"""
+
+import os
+
+import pytest
+
+from atomic_file import atomic_write
+
+
+def test_write_creates_directory_and_replaces_content(tmp_path):
+    path = tmp_path / "a" / "b.json"
+    atomic_write(str(path), b"first")
+    atomic_write(str(path), "第二次".encode('utf-8'))
+    assert path.read_text(encoding='utf-8') == "第二次"
+    assert os.listdir(path.parent) == ["b.json"]
+
+
+def test_failed_write_keeps_old_file_and_removes_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "b.json"
+    atomic_write(str(path), b"old")
+
+    def fail(src, dst):
+        raise OSError("磁盘已满")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["b.json"]
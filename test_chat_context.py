@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试聊天历史的 token 预算管理（qwen3_mcp.ChatTurn / ChatContext）
+汉字每字按1个 token 估算，测试中用汉字构造长度确定的消息
+"""
+
+import asyncio
+import builtins
+from types import SimpleNamespace
+
+import qwen3_mcp
+from qwen3_mcp import MESSAGE_OVERHEAD_TOKENS, ChatContext, ChatTurn, MultiServerMCPClient
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def answer(text):
+    return {"role": "assistant", "content": text}
+
+
+def tool_turn(context, question, result_chars, call_id="call_1"):
+    """加入一轮带工具调用的对话：提问、工具调用、工具结果（result_chars 个汉字）、最终回答"""
+    context.add(user(question))
+    context.add({"role": "assistant", "content": None, "tool_calls": [
+        {"id": call_id, "type": "function", "function": {"name": "search", "arguments": "{}"}}]})
+    context.add({"role": "tool", "tool_call_id": call_id, "content": "果" * result_chars})
+    context.add(answer(f"{question}的回答"))
+
+
+def assert_tool_pairs_intact(messages):
+    """每个工具结果前面都有对应的工具调用，每个工具调用后面都有它的结果"""
+    pending = set()
+    for message in messages:
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in pending
+            pending.discard(message["tool_call_id"])
+        else:
+            assert not pending
+            pending = {call["id"] for call in message.get("tool_calls") or []}
+    assert not pending
+
+
+def test_turn_forms_go_from_full_to_brief():
+    context = ChatContext()
+    tool_turn(context, "问题", 2000)
+    full, truncated, brief = context.turns[0].forms()
+
+    assert full[1] == sum(context.turns[0].tokens)
+    assert truncated[1] < full[1]
+    assert "工具结果已截断" in truncated[0][2]["content"]
+    assert [m["role"] for m in truncated[0]] == ["user", "assistant", "tool", "assistant"]
+    assert [m["content"] for m in brief[0]] == ["问题", "问题的回答"]
+    # 截断的是副本，原消息不变
+    assert context.turns[0].messages[2]["content"] == "果" * 2000
+
+
+def test_short_turn_has_only_full_form():
+    turn = ChatTurn(user("你好"))
+    assert turn.forms() == [([user("你好")], MESSAGE_OVERHEAD_TOKENS + 2)]
+
+
+def test_everything_fits_within_budget():
+    context = ChatContext(max_tokens=10000)
+    tool_turn(context, "第一问", 100)
+    context.add(user("第二问"))
+
+    messages = context.build()
+    assert len(messages) == 5
+    assert messages[-1] == user("第二问")
+    assert_tool_pairs_intact(messages)
+
+
+def test_old_turn_is_compacted_to_fit():
+    context = ChatContext()
+    tool_turn(context, "第一问", 2000)
+    context.add(user("第二问"))
+    full, truncated, brief = context.turns[0].forms()
+    latest = context.turns[1].forms()[0][1]
+
+    context.max_tokens = latest + truncated[1]
+    messages = context.build()
+    assert messages[:-1] == truncated[0]
+    assert_tool_pairs_intact(messages)
+
+    context.max_tokens = latest + brief[1]
+    messages = context.build()
+    assert messages == brief[0] + [user("第二问")]
+    assert_tool_pairs_intact(messages)
+
+
+def test_turns_that_do_not_fit_are_skipped_but_kept():
+    """预算不足时本次省略较早的轮次，但不从历史中删除"""
+    context = ChatContext(max_tokens=300)
+    context.add(user("早" * 100))
+    context.add(answer("答" * 100))
+    context.add(user("长" * 250))
+
+    assert context.build() == [user("长" * 250)]
+    assert len(context.turns) == 2
+
+    # 最新一轮变短后，较早的轮次重新放得下
+    context.discard_turn()
+    context.add(user("短"))
+    assert context.build() == [user("早" * 100), answer("答" * 100), user("短")]
+
+
+def test_older_turns_are_skipped_once_one_does_not_fit():
+    """较早的轮次即使更短，也不能跳过中间放不下的轮次而被加入（否则对话不连贯）"""
+    context = ChatContext(max_tokens=200)
+    context.add(user("最早"))
+    context.add(user("中" * 300))
+    context.add(user("最新"))
+    assert context.build() == [user("最新")]
+
+
+def test_discard_turn_removes_only_the_current_turn():
+    context = ChatContext()
+    tool_turn(context, "第一问", 10)
+    context.add(user("第二问"))
+    context.discard_turn()
+    assert len(context.turns) == 1
+    assert context.build()[0] == user("第一问")
+
+
+def test_failed_turn_is_not_kept_in_history(monkeypatch):
+    """一轮请求出错后，用户消息不应留在历史中被下一轮带上"""
+    inputs = iter(["会出错的问题", "第二个问题", "quit"])
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(inputs))
+    monkeypatch.setattr(qwen3_mcp, "LLM_STREAM", False)
+
+    sent = []
+
+    async def chat_base(messages):
+        sent.append([dict(m) for m in messages])
+        if len(sent) == 1:
+            raise RuntimeError("模型接口不可用")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+            model_dump=lambda: answer("好的")))])
+
+    client = MultiServerMCPClient()
+    client.chat_base = chat_base
+
+    async def run():
+        try:
+            await client.chat_loop()
+        finally:
+            await client.client.close()
+
+    asyncio.run(run())
+    assert sent[1] == [user("第二个问题")]
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 weixin_server 的爬取保存流程（文章缓存、转载去重、批量爬取）
+用替身爬虫返回固定的文章数据，不启动浏览器也不访问网络；所有文件写到临时目录
+"""
+
+import asyncio
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import article_catalog
+import tfidf_index
+import weixin_server
+from article_cache import ArticleCache
+from article_catalog import ArticleCatalog
+from article_extractor import extract_article
+from article_store import ArticleStore
+from tfidf_index import DocumentFrequencyIndex
+from weixin_spider import WeixinSpider
+
+URL = "https://mp.weixin.qq.com/s/original-article"
+REPOST_URL = "https://mp.weixin.qq.com/s/reposted-article"
+
+# 正文取自基准测试用的长文章页面
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures", "weixin_article_long.html"),
+          encoding="utf-8") as f:
+    CONTENT = extract_article(f.read())["content"]
+# 作者修改了一句话：与原文近似（汉明距离很小），但内容确实变了
+EDITED_CONTENT = CONTENT.replace("真正决定效果的并不是模型本身", "真正决定效果的往往不是模型本身", 1)
+
+
+def make_article(url, content, title="测试文章"):
+    return {
+        "title": title,
+        "author": "测试作者",
+        "publish_time": "2025-07-01",
+        "crawl_time": "2025-07-01 08:00:00",
+        "url": url,
+        "content": content,
+        "content_html": f"<p>{content}</p>",
+        "images": [],
+        "word_count": len(content),
+        "image_count": 0,
+    }
+
+
+class FakeSpider(WeixinSpider):
+    """按URL返回预先设置的文章数据，保存仍走 WeixinSpider.save_article_to_file"""
+
+    def __init__(self, pool):
+        super().__init__(fetch_mode="http", download_images=False)
+        self.pool = pool
+
+    def crawl_article_by_url(self, url, retry_times=3, deadline=None):
+        self.pool.crawled.append(url)
+        if url in self.pool.hanging:
+            # 模拟一直加载不完的页面：真实爬虫在截止时间中止页面加载并抛出 TimeoutError
+            time.sleep(max(0.0, deadline - time.monotonic()) if deadline else 5)
+            raise TimeoutError(f"超过截止时间，放弃爬取: {url}")
+        page = self.pool.pages.get(url)
+        return copy.deepcopy(page) if page else None
+
+
+class FakePool:
+    """与 SpiderPool 一样限制同时借出的爬虫数，每次借出一个独立的替身爬虫"""
+
+    def __init__(self, size=1):
+        self.pages = {}
+        self.hanging = set()
+        self.crawled = []
+        self._slots = threading.Semaphore(size)
+
+    @contextmanager
+    def spider(self, timeout=None):
+        with self._slots:
+            yield FakeSpider(self)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """把服务器用到的缓存、目录数据库、句柄存储和词频索引都指向临时目录"""
+    monkeypatch.chdir(tmp_path)
+    catalog = ArticleCatalog(str(tmp_path / "catalog.db"))
+    pool = FakePool()
+    monkeypatch.setattr(article_catalog, "_default_catalog", catalog)
+    monkeypatch.setattr(tfidf_index, "_default_index", DocumentFrequencyIndex(str(tmp_path / "tfidf")))
+    monkeypatch.setattr(weixin_server, "spider_pool", pool)
+    # 有效期为0：每次都重新爬取并比较内容，模拟缓存已过期
+    monkeypatch.setattr(weixin_server, "article_cache", ArticleCache(str(tmp_path / "cache"), ttl=0))
+    monkeypatch.setattr(weixin_server, "article_store", ArticleStore(str(tmp_path / "index"), catalog=catalog))
+    yield pool
+    catalog.close()
+
+
+def test_same_url_with_edited_content_is_saved_again(server):
+    """同一URL的文章修改后重新爬取：不能当作自己旧版本的转载，需要重新保存"""
+    server.pages[URL] = make_article(URL, CONTENT)
+    _, success, first_files, status = weixin_server._crawl_and_save(URL, download_images=False)
+    assert success and status == "miss"
+
+    server.pages[URL] = make_article(URL, EDITED_CONTENT)
+    article_data, success, saved_files, status = weixin_server._crawl_and_save(URL, download_images=False)
+    assert success and status == "miss"
+    assert article_data["content"] == EDITED_CONTENT
+    assert weixin_server.get_article_cache().load_article(
+        weixin_server.get_article_cache().lookup(URL, False)[0])["content"] == EDITED_CONTENT
+
+
+def test_same_url_is_not_a_duplicate_after_cache_eviction(server):
+    """缓存记录被淘汰后，同一URL的旧版本仍在目录数据库中，也不能被当作转载"""
+    server.pages[URL] = make_article(URL, CONTENT)
+    weixin_server._crawl_and_save(URL, download_images=False)
+    weixin_server.get_article_cache().invalidate(URL)
+
+    server.pages[URL] = make_article(URL, EDITED_CONTENT)
+    article_data, success, _, status = weixin_server._crawl_and_save(URL, download_images=False)
+    assert success and status == "miss"
+    assert article_data["content"] == EDITED_CONTENT
+
+
+def test_unchanged_article_is_revalidated(server):
+    server.pages[URL] = make_article(URL, CONTENT)
+    _, _, first_files, _ = weixin_server._crawl_and_save(URL, download_images=False)
+
+    _, success, saved_files, status = weixin_server._crawl_and_save(URL, download_images=False)
+    assert success and status == "revalidated"
+    assert saved_files == first_files
+
+
+def test_repost_from_another_url_reuses_saved_article(server):
+    server.pages[URL] = make_article(URL, CONTENT)
+    _, _, first_files, _ = weixin_server._crawl_and_save(URL, download_images=False)
+
+    server.pages[REPOST_URL] = make_article(REPOST_URL, "本文转载自其他公众号。" + CONTENT, title="转载的文章")
+    article_data, success, saved_files, status = weixin_server._crawl_and_save(REPOST_URL, download_images=False)
+    assert success and status == "duplicate"
+    assert saved_files == first_files
+    assert article_data["url"] == URL
+
+
+@pytest.mark.parametrize("content", ["", "   ", "无法提取内容"])
+def test_distinct_empty_body_articles_are_not_duplicates(server, content):
+    """纯图片或视频文章没有正文：两篇不同URL的文章指纹相同，但不能当作彼此的转载"""
+    server.pages[URL] = make_article(URL, content, title="图片文章")
+    _, success, first_files, status = weixin_server._crawl_and_save(URL, download_images=False)
+    assert success and status == "miss"
+
+    server.pages[REPOST_URL] = make_article(REPOST_URL, content, title="视频文章")
+    article_data, success, saved_files, status = weixin_server._crawl_and_save(REPOST_URL, download_images=False)
+    assert success and status == "miss"
+    assert article_data["title"] == "视频文章" and article_data["url"] == REPOST_URL
+    assert saved_files != first_files
+    assert "simhash" not in article_data
+
+
+def run_batch(urls, **kwargs):
+    return json.loads(asyncio.run(weixin_server.crawl_weixin_articles_batch(urls, download_images=False, **kwargs)))
+
+
+def test_batch_reports_a_row_per_url(server):
+    server.pages[URL] = make_article(URL, CONTENT)
+    missing = "https://mp.weixin.qq.com/s/missing"
+    result = run_batch([URL, "https://example.com/not-weixin", URL + "?scene=1", missing])
+
+    assert result["status"] == "success"
+    assert result["summary"]["success"] == 1 and result["summary"]["error"] == 1
+    statuses = [row["status"] for row in result["results"]]
+    assert statuses == ["success", "invalid", "duplicate", "error"]
+
+    row = result["results"][0]
+    assert row["cache"] == "miss" and row["word_count"] == len(CONTENT)
+    assert os.path.isdir(row["dir"])
+    assert weixin_server.get_article_store().get(row["id"])["content"] == CONTENT
+
+
+def test_image_download_uses_the_remaining_crawl_deadline(server, monkeypatch):
+    """超时覆盖爬取和下载图片：保存文章时把同一个截止时间交给图片下载"""
+    deadlines = []
+    monkeypatch.setattr(FakeSpider, "_download_all_images",
+                        lambda self, images_info, save_dir, deadline=None: deadlines.append(deadline))
+    article = make_article(URL, CONTENT)
+    article["images"] = [{"url": "https://mmbiz.qpic.cn/a.png"}]
+    server.pages[URL] = article
+
+    start = time.monotonic()
+    _, success, _, _ = weixin_server._crawl_and_save(URL, download_images=True, timeout=30)
+    assert success
+    assert len(deadlines) == 1 and start + 29 < deadlines[0] <= time.monotonic() + 30
+
+
+def test_batch_timeout_does_not_delay_later_urls(server):
+    """超时的文章在截止时间中止并释放爬虫，排在后面的文章从自己开始爬取时计时，不会跟着超时"""
+    slow = "https://mp.weixin.qq.com/s/slow"
+    server.hanging.add(slow)
+    server.pages[URL] = make_article(URL, CONTENT)
+
+    result = run_batch([slow, URL], concurrency=1, timeout=0.5)
+    slow_row, row = result["results"]
+    assert slow_row["status"] == "timeout"
+    assert 0.4 <= slow_row["seconds"] < 2
+    assert row["status"] == "success"
+    assert server.crawled == [slow, URL]
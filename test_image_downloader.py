@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试并发图片下载（image_downloader.ImageDownloader）的截止时间
+用替身会话按URL延迟返回图片内容，不访问网络
+"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from image_downloader import ImageDownloader
+
+FAST_URL = "https://mmbiz.qpic.cn/fast.png"
+SLOW_URL = "https://mmbiz.qpic.cn/slow.png"
+
+
+class FakeSession:
+    """按URL等待指定秒数后返回图片；finished 记录已返回的请求"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.finished = []
+        self.all_finished = threading.Event()
+
+    def get(self, url, timeout=None):
+        time.sleep(self.delays.get(url, 0))
+        self.finished.append(url)
+        if len(self.finished) == len(self.delays):
+            self.all_finished.set()
+        return SimpleNamespace(status_code=200, content=url.encode(), headers={"content-type": "image/png"},
+                               raise_for_status=lambda: None)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def downloader():
+    instance = ImageDownloader(retries=0, total_timeout=30)
+    instance.session = FakeSession({FAST_URL: 0, SLOW_URL: 0.5})
+    yield instance
+    instance.close()
+
+
+def test_images_finishing_after_the_deadline_fail_and_are_not_written(downloader, tmp_path):
+    images = [{"url": FAST_URL}, {"url": SLOW_URL}]
+    success_count = downloader.download_all(images, str(tmp_path), deadline=time.monotonic() + 0.2)
+
+    assert success_count == 1
+    assert images[0]["download_success"] and os.path.exists(images[0]["local_path"])
+    assert not images[1]["download_success"]
+    assert images[1]["error"] == "超出图片下载总时长"
+
+    # 慢的请求在截止时间之后才返回，也不能再往文章目录写文件
+    assert downloader.session.all_finished.wait(5)
+    time.sleep(0.1)
+    assert os.listdir(tmp_path) == [images[0]["filename"]]
+
+
+def test_total_timeout_applies_without_deadline(downloader, tmp_path):
+    downloader.total_timeout = 0.2
+    images = [{"url": SLOW_URL}]
+    assert downloader.download_all(images, str(tmp_path)) == 0
+    assert not images[0]["download_success"]
+
+
+def test_all_images_downloaded_before_the_deadline(downloader, tmp_path):
+    images = [{"url": FAST_URL}, {"url": SLOW_URL}]
+    assert downloader.download_all(images, str(tmp_path), deadline=time.monotonic() + 5) == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(image["filename"] for image in images)
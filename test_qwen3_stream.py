@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试流式响应中工具调用的拼接与提前执行（qwen3_mcp.MultiServerMCPClient._stream_turn / chat_stream）
+用替身流逐块产出 chunk，记录每个工具调用在第几块之后启动、启动时拿到的参数
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mock_llm_server import start_mock_server
+from qwen3_mcp import LLMClient, MultiServerMCPClient
+
+
+def text(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=None))])
+
+
+def call(index, id=None, name=None, arguments=None):
+    """一个工具调用片段（与 OpenAI SDK 的 ChoiceDeltaToolCall 字段相同）"""
+    function = SimpleNamespace(name=name, arguments=arguments) if name is not None or arguments is not None else None
+    fragment = SimpleNamespace(index=index, id=id, function=function)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[fragment]))])
+
+
+class FakeStream:
+    """按顺序产出 chunk；hang=True 时产出完后一直等待（模拟模型还在生成）"""
+
+    def __init__(self, chunks, hang=False):
+        self.chunks = chunks
+        self.hang = hang
+        self.position = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+            self.position += 1
+            # 让已启动的工具任务有机会开始运行
+            await asyncio.sleep(0)
+        if self.hang:
+            await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeLLM:
+    def __init__(self, *streams):
+        self.streams = list(streams)
+
+    async def stream_response(self, messages, tools=None):
+        return self.streams.pop(0)
+
+
+def make_client(*streams, tool_delay=0.0):
+    """返回客户端和工具调用记录 [(名称, 参数, 启动时已接收的块数)]"""
+    client = MultiServerMCPClient()
+    client.client = FakeLLM(*streams)
+    started = []
+    client.cancelled = []
+
+    async def run_tool_call(tool_name, arguments):
+        started.append((tool_name, arguments, streams[0].position))
+        try:
+            await asyncio.sleep(tool_delay)
+        except asyncio.CancelledError:
+            client.cancelled.append(tool_name)
+            raise
+        return f"{tool_name} 的结果"
+
+    client._run_tool_call = run_tool_call
+    return client, started
+
+
+def test_arguments_split_across_chunks_start_once_complete():
+    stream = FakeStream([
+        call(0, id="call_a", name="weather_get", arguments=""),
+        call(0, arguments='{"city": '),
+        call(0, arguments='"北京"}'),
+        text("正在查询"),
+        text("天气"),
+    ])
+    client, started = make_client(stream)
+    message, tasks = asyncio.run(client._stream_turn([], on_text=None))
+
+    # 参数在第3块拼完整，此时就已启动，不等流结束
+    assert started == [("weather_get", '{"city": "北京"}', 3)]
+    assert message["content"] == "正在查询天气"
+    assert message["tool_calls"][0] == {"id": "call_a", "type": "function",
+                                        "function": {"name": "weather_get", "arguments": '{"city": "北京"}'}}
+    assert len(tasks) == 1
+
+
+def test_interleaved_indices_wait_for_complete_arguments():
+    """两个调用的片段交替到达：后一个调用开始到达时，前一个调用的参数还不完整，不能提前启动"""
+    stream = FakeStream([
+        call(0, id="call_a", name="weather_get", arguments='{"city": '),
+        call(1, id="call_b", name="math_add", arguments='{"a": 1, '),
+        call(0, arguments='"上海"}'),
+        call(1, arguments='"b": 2}'),
+        text("完成"),
+    ])
+    client, started = make_client(stream)
+
+    async def run():
+        message, tasks = await client._stream_turn([], on_text=None)
+        return message, await asyncio.gather(*tasks)
+
+    message, results = asyncio.run(run())
+    assert started == [("weather_get", '{"city": "上海"}', 3), ("math_add", '{"a": 1, "b": 2}', 4)]
+    assert [tool_call["id"] for tool_call in message["tool_calls"]] == ["call_a", "call_b"]
+    assert results == ["weather_get 的结果", "math_add 的结果"]
+
+
+def test_later_call_waits_for_earlier_incomplete_call():
+    """调用按 index 依次启动：后一个调用先完整时，等前一个完整后再一起启动，结果顺序与调用顺序一致"""
+    stream = FakeStream([
+        call(0, id="call_a", name="slow_tool", arguments='{"q": '),
+        call(1, id="call_b", name="fast_tool", arguments="{}"),
+        call(0, arguments='"x"}'),
+    ])
+    client, started = make_client(stream)
+    _, tasks = asyncio.run(client._stream_turn([], on_text=None))
+    assert [(name, position) for name, _, position in started] == [("slow_tool", 3), ("fast_tool", 3)]
+    assert len(tasks) == 2
+
+
+def test_empty_object_arguments_start_immediately():
+    stream = FakeStream([
+        call(0, id="call_a", name="time_now", arguments="{}"),
+        text("稍等"),
+        text("片刻"),
+    ])
+    client, started = make_client(stream)
+    message, _ = asyncio.run(client._stream_turn([], on_text=None))
+    assert started == [("time_now", "{}", 1)]
+    assert message["tool_calls"][0]["function"]["arguments"] == "{}"
+
+
+def test_incomplete_arguments_start_when_stream_ends():
+    """参数始终不是完整的 JSON 对象（如空字符串）的调用在响应结束时启动"""
+    stream = FakeStream([call(0, id="call_a", name="ping", arguments=""), text("好")])
+    client, started = make_client(stream)
+    asyncio.run(client._stream_turn([], on_text=None))
+    assert started == [("ping", "", 2)]
+
+
+def test_cancel_mid_stream_cancels_started_tool_calls():
+    stream = FakeStream([
+        call(0, id="call_a", name="slow_tool", arguments="{}"),
+        text("还在生成"),
+    ], hang=True)
+    client, started = make_client(stream, tool_delay=10)
+
+    async def run():
+        turn = asyncio.create_task(client._stream_turn([], on_text=None))
+        while stream.position < 2:
+            await asyncio.sleep(0)
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+        # 让被取消的工具任务处理取消
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert [name for name, _, _ in started] == ["slow_tool"]
+    assert client.cancelled == ["slow_tool"]
+    assert stream.closed
+
+
+def test_text_deltas_are_passed_to_callback():
+    stream = FakeStream([text("你"), text("好")])
+    client, _ = make_client(stream)
+    received = []
+    message, tasks = asyncio.run(client._stream_turn([], on_text=received.append))
+    assert received == ["你", "好"]
+    assert message == {"role": "assistant", "content": "你好"}
+    assert tasks == []
+
+
+def test_chat_stream_against_mock_server():
+    """通过本地模拟接口的工具调用模式走完整的一轮：两个工具调用，再返回最终回答"""
+    server = start_mock_server(latency=0, token_delay=0, tool_calls=2)
+    client = MultiServerMCPClient()
+    client.all_tools = [
+        {"type": "function", "function": {"name": "weather_get", "description": "",
+                                          "parameters": {"type": "object", "properties": {"city": {"type": "string"}},
+                                                         "required": ["city"]}}},
+        {"type": "function", "function": {"name": "math_add", "description": "",
+                                          "parameters": {"type": "object", "properties": {}, "required": []}}},
+    ]
+    calls = []
+
+    async def run_tool_call(tool_name, arguments):
+        calls.append((tool_name, arguments))
+        return f"{tool_name} 的结果"
+
+    client._run_tool_call = run_tool_call
+
+    async def run():
+        client.client = LLMClient(api_key="mock", base_url=server.base_url, model="mock")
+        try:
+            messages = [{"role": "user", "content": "你好"}]
+            reply = await client.chat_stream(messages)
+            return messages, reply
+        finally:
+            await client.client.close()
+
+    try:
+        messages, reply = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert calls == [("weather_get", '{"city": "test"}'), ("math_add", "{}")]
+    assert [message["role"] for message in messages] == ["user", "assistant", "tool", "tool"]
+    assert [message["tool_call_id"] for message in messages[2:]] == \
+        [tool_call["id"] for tool_call in messages[1]["tool_calls"]]
+    assert reply["content"] == "已完成 2 个工具调用"
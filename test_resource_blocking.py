@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试浏览器资源拦截策略（weixin_spider.BLOCK_POLICIES）
+拦截规则用 Chrome 的 Network.setBlockedURLs 通配符语义（* 匹配任意字符）检查，用替身驱动记录 DevTools 命令，不需要 Chrome
+"""
+
+from fnmatch import fnmatchcase
+
+import pytest
+
+import bench_resource_blocking
+from weixin_spider import BLOCK_POLICIES, WeixinSpider
+
+ARTICLE_URL = "https://mp.weixin.qq.com/s/AbCdEfGhIjKlMnOp"
+IMAGE_URL = "https://mmbiz.qpic.cn/mmbiz_jpg/abc/640?wx_fmt=jpeg"
+
+
+def blocked(policy, url):
+    return any(fnmatchcase(url, pattern) for pattern in BLOCK_POLICIES[policy])
+
+
+class FakeDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+
+@pytest.mark.parametrize("policy", list(BLOCK_POLICIES))
+def test_article_page_itself_is_never_blocked(policy):
+    assert not blocked(policy, ARTICLE_URL)
+    assert not blocked(policy, ARTICLE_URL + "?__biz=MzA&mid=1&idx=1&sn=abc")
+
+
+def test_policies_are_cumulative():
+    assert set(BLOCK_POLICIES["standard"]) <= set(BLOCK_POLICIES["no_images"])
+    assert not blocked("standard", IMAGE_URL)
+    assert blocked("no_images", IMAGE_URL)
+    assert blocked("standard", "https://mp.weixin.qq.com/mp/appmsg_comment?action=getcomment")
+    assert blocked("standard", "https://res.wx.qq.com/mmbizwap/font/weui.woff2")
+
+
+def test_block_policy_is_sent_to_devtools():
+    spider = WeixinSpider(fetch_mode="http", block_policy="standard", extra_blocked_urls=["*://example.com/*"])
+    spider.driver = FakeDriver()
+    spider._apply_block_policy()
+    assert spider.driver.commands == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": BLOCK_POLICIES["standard"] + ["*://example.com/*"]}),
+    ]
+
+
+def test_no_devtools_commands_without_patterns():
+    spider = WeixinSpider(fetch_mode="http", block_policy="none")
+    spider.driver = FakeDriver()
+    spider._apply_block_policy()
+    assert spider.driver.commands == []
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        WeixinSpider(fetch_mode="http", block_policy="everything")
+
+
+def test_benchmark_loads_images_unless_the_policy_blocks_them(monkeypatch):
+    """基准测试中图片是否加载只由拦截策略决定：Chrome 的图片偏好设置对每种策略都允许加载"""
+    image_prefs = {}
+
+    def setup_driver(self, headless=True):
+        prefs = self._build_chrome_options(headless).experimental_options["prefs"]
+        image_prefs[self.block_policy] = prefs["profile.managed_default_content_settings.images"]
+
+    monkeypatch.setattr(bench_resource_blocking.BenchSpider, "setup_driver", setup_driver)
+    for policy in BLOCK_POLICIES:
+        assert bench_resource_blocking.bench_policy(policy, [], runs=1) == []
+    assert image_prefs == {policy: 1 for policy in BLOCK_POLICIES}
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分词后端（segmenter）：默认后端、dag 最大概率分词和用户词典
+"""
+
+import pytest
+
+import segmenter
+from segmenter import DictSegmenter, NgramSegmenter, get_segmenter
+
+
+@pytest.fixture
+def dag():
+    instance = DictSegmenter()
+    yield instance
+    instance.close()
+
+
+def test_default_backend_is_ngram(monkeypatch):
+    monkeypatch.delenv("KEYWORD_SEGMENTER", raising=False)
+    monkeypatch.setattr(segmenter, "_instances", {})
+    assert isinstance(get_segmenter(), NgramSegmenter)
+
+
+def test_dag_is_opt_in(monkeypatch):
+    monkeypatch.setenv("KEYWORD_SEGMENTER", "dag")
+    monkeypatch.setattr(segmenter, "_instances", {})
+    assert isinstance(get_segmenter(), DictSegmenter)
+
+
+def test_dag_cuts_whole_words(dag):
+    assert dag.cut_run("软件工程师学习人工智能") == ["软件", "工程师", "学习", "人工智能"]
+
+
+def test_unknown_characters_are_single_words(dag):
+    assert dag.cut_run("龘龘") == ["龘", "龘"]
+
+
+def test_cut_keeps_non_han_text(dag):
+    assert dag.cut("我们在2025年学习人工智能。") == ["我们", "在", "2025", "年", "学习", "人工智能", "。"]
+
+
+def test_user_words_are_not_split(dag):
+    assert dag.cut_run("大模型推理框架") != ["大模型推理框架"]
+    dag.add_user_words({"大模型推理框架": None})
+    assert dag.cut_run("使用大模型推理框架") == ["使用", "大模型推理框架"]
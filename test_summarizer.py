@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试抽取式摘要（summarizer）：TextRank 排序、重复句子跳过和边界情况
+"""
+
+import numpy as np
+
+from summarizer import rank_sentences, split_sentences, summarize
+
+SENTENCES = [
+    "大模型部署需要同时考虑推理延迟、显存占用和服务成本。",
+    "推理延迟主要取决于批处理大小和量化方式。",
+    "显存占用可以通过量化和分页注意力来降低。",
+    "服务成本与显存占用和推理延迟都直接相关。",
+    "周末天气晴朗，适合去公园散步放松心情。",
+]
+CONTENT = "\n".join(SENTENCES)
+# 与第一句只差一个字的改写
+NEAR_COPY = "大模型部署需要同时考虑推理延迟、显存占用以及服务成本。"
+
+
+def test_split_sentences_drops_short_and_repeated_sentences():
+    content = "小标题\n" + SENTENCES[0] + SENTENCES[1] + "\n" + SENTENCES[0]
+    assert split_sentences(content) == SENTENCES[:2]
+
+
+def test_sentence_sharing_the_most_terms_ranks_first():
+    ranking = rank_sentences(CONTENT)
+    assert ranking.sentences == SENTENCES
+    assert np.isclose(ranking.scores.sum(), 1.0)
+    # 与其他句子都相关的句子得分最高，无关的句子得分最低
+    assert int(np.argmax(ranking.scores)) == 3
+    assert int(np.argmin(ranking.scores)) == 4
+    assert summarize(CONTENT, max_sentences=1) == [SENTENCES[3]]
+
+
+def test_summary_order():
+    assert summarize(CONTENT, max_sentences=2) == [SENTENCES[0], SENTENCES[3]]
+    assert summarize(CONTENT, max_sentences=2, in_document_order=False) == [SENTENCES[3], SENTENCES[0]]
+
+
+def test_near_identical_sentence_is_skipped():
+    content = CONTENT + "\n" + NEAR_COPY
+    ranking = rank_sentences(content)
+    assert ranking.redundant_pairs == {(0, 5)}
+    # 改写句得分排第二，但与已选的第一句重复，摘要改取第三名
+    assert sorted(range(6), key=lambda i: -ranking.scores[i])[:3] == [0, 5, 3]
+    assert summarize(content, max_sentences=2) == [SENTENCES[0], SENTENCES[3]]
+    assert NEAR_COPY not in summarize(content, max_sentences=5)
+
+
+def test_single_sentence():
+    ranking = rank_sentences(SENTENCES[0])
+    assert ranking.sentences == [SENTENCES[0]]
+    assert ranking.scores.tolist() == [1.0]
+    assert summarize(SENTENCES[0]) == [SENTENCES[0]]
+
+
+def test_empty_content():
+    assert summarize("") == []
+    # 只有小标题、图片说明这类短句时也没有摘要句
+    assert summarize("小标题\n图片") == []
+    assert len(rank_sentences("").scores) == 0
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试语料库文档频率索引（tfidf_index.DocumentFrequencyIndex）：日志重放、重复文章、合并快照
+"""
+
+import json
+import os
+
+from tfidf_index import DocumentFrequencyIndex
+
+DOCS = {
+    "a" * 40: ["模型", "部署", "推理"],
+    "b" * 40: ["模型", "量化"],
+    "c" * 40: ["模型", "部署", "部署"],
+}
+EXPECTED_DF = {"模型": 3, "部署": 2, "推理": 1, "量化": 1}
+
+
+def state(index):
+    return index.doc_count, dict(index.df), {key for key in DOCS if index.contains(key)}
+
+
+def fill(index):
+    for content_hash, terms in DOCS.items():
+        assert index.add_document(content_hash, terms)
+
+
+def test_add_reopen_compact_reopen(tmp_path):
+    root = str(tmp_path / "tfidf")
+    index = DocumentFrequencyIndex(root)
+    fill(index)
+    expected = (3, EXPECTED_DF, set(DOCS))
+    assert state(index) == expected
+    assert index.stats()["journal_lines"] == 3
+
+    # 重新打开：只有日志，靠重放恢复
+    reopened = DocumentFrequencyIndex(root)
+    assert not os.path.exists(reopened.snapshot_path)
+    assert state(reopened) == expected
+
+    # 合并后日志清空，重新打开从快照恢复
+    reopened.compact()
+    assert os.path.getsize(reopened.journal_path) == 0
+    assert reopened.stats()["journal_lines"] == 0
+    compacted = DocumentFrequencyIndex(root)
+    assert state(compacted) == expected
+    assert compacted.idf("模型") < compacted.idf("量化") < compacted.idf("没出现过的词")
+
+
+def test_snapshot_plus_journal_after_compaction(tmp_path):
+    root = str(tmp_path / "tfidf")
+    index = DocumentFrequencyIndex(root)
+    index.add_document("a" * 40, DOCS["a" * 40])
+    index.compact()
+    index.add_document("b" * 40, DOCS["b" * 40])
+
+    reopened = DocumentFrequencyIndex(root)
+    assert reopened.doc_count == 2
+    assert dict(reopened.df) == {"模型": 2, "部署": 1, "推理": 1, "量化": 1}
+    assert reopened.stats()["journal_lines"] == 1
+
+
+def test_duplicate_document_is_counted_once(tmp_path):
+    root = str(tmp_path / "tfidf")
+    index = DocumentFrequencyIndex(root)
+    fill(index)
+    # 同一内容哈希（只比较前缀）再次登记不计数，也不写日志
+    assert not index.add_document("a" * 40, ["别的词"])
+    assert not index.add_document("a" * 16 + "x" * 24, ["别的词"])
+    assert state(index) == (3, EXPECTED_DF, set(DOCS))
+    assert index.stats()["journal_lines"] == 3
+
+    # 日志里重复的文章行（例如两个进程各写了一次）重放时也只计一次
+    with open(index.journal_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"doc": "b" * 16, "terms": DOCS["b" * 40]}, ensure_ascii=False) + "\n")
+    assert state(DocumentFrequencyIndex(root)) == (3, EXPECTED_DF, set(DOCS))
+
+
+def test_truncated_last_journal_line_is_ignored(tmp_path):
+    root = str(tmp_path / "tfidf")
+    index = DocumentFrequencyIndex(root)
+    fill(index)
+    with open(index.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"doc": "dddd')
+
+    assert state(DocumentFrequencyIndex(root)) == (3, EXPECTED_DF, set(DOCS))
+
+
+def test_compacts_automatically_at_threshold(tmp_path):
+    root = str(tmp_path / "tfidf")
+    index = DocumentFrequencyIndex(root, compact_threshold=2)
+    fill(index)
+    # 第二篇之后自动合并，第三篇留在日志中
+    assert index.stats()["journal_lines"] == 1
+    with open(index.snapshot_path, encoding='utf-8') as f:
+        assert json.load(f)["doc_count"] == 2
+    assert state(DocumentFrequencyIndex(root)) == (3, EXPECTED_DF, set(DOCS))
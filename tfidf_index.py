@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语料库文档频率索引
+记录每个词出现在多少篇已保存的文章中，关键词可按 TF-IDF 排序，压低“模型”“工具”这类在所有文章里都常见的词。
+
+磁盘上是一个快照文件加一个追加写的日志：保存文章时只向日志追加一行（该文章的词表），
+日志达到一定行数后合并进快照，启动时读取快照并重放日志，不需要重新扫描 articles/ 目录。
+
+用法:
+    python tfidf_index.py backfill [articles目录]  # 把已保存的文章补录进索引
+    python tfidf_index.py stats                    # 查看索引统计
+"""
+
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from article_catalog import iter_saved_articles
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = os.getenv("TFIDF_INDEX_DIR", "articles/.tfidf")
+
+# 日志超过该行数时合并进快照
+COMPACT_THRESHOLD = 200
+
+# 文档指纹长度（内容哈希的前缀），用于避免同一篇文章重复计数
+DOC_KEY_LENGTH = 16
+
+
+class DocumentFrequencyIndex:
+    def __init__(self, root=DEFAULT_INDEX_DIR, compact_threshold=COMPACT_THRESHOLD):
+        """
+        初始化索引并从磁盘加载
+        :param root: 索引目录（snapshot.json + journal.jsonl）
+        :param compact_threshold: 日志合并阈值（行数）
+        """
+        self.root = root
+        self.compact_threshold = compact_threshold
+        self.snapshot_path = os.path.join(root, "snapshot.json")
+        self.journal_path = os.path.join(root, "journal.jsonl")
+
+        self.doc_count = 0
+        self.df: Counter = Counter()
+        self._docs = set()
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def add_document(self, content_hash: str, terms: Iterable[str]) -> bool:
+        """
+        登记一篇文章的词（同一内容只计一次）
+        :param content_hash: 文章正文的内容哈希
+        :param terms: 文章中出现的词（重复的词只计一次）
+        :return: 是否为新文章
+        """
+        doc_key = content_hash[:DOC_KEY_LENGTH]
+        unique_terms = sorted(set(terms))
+
+        with self._lock:
+            if doc_key in self._docs:
+                return False
+            self._apply(doc_key, unique_terms)
+
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"doc": doc_key, "terms": unique_terms}, ensure_ascii=False) + "\n")
+            self._journal_lines += 1
+
+            if self._journal_lines >= self.compact_threshold:
+                self._compact()
+        return True
+
+    def idf(self, term: str) -> float:
+        """平滑的逆文档频率：log((N + 1) / (df + 1)) + 1"""
+        return math.log((self.doc_count + 1) / (self.df.get(term, 0) + 1)) + 1
+
+    def contains(self, content_hash: str) -> bool:
+        return content_hash[:DOC_KEY_LENGTH] in self._docs
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "documents": self.doc_count,
+            "terms": len(self.df),
+            "journal_lines": self._journal_lines
+        }
+
+    def compact(self):
+        """把日志合并进快照"""
+        with self._lock:
+            self._compact()
+
+    def _apply(self, doc_key, terms):
+        self._docs.add(doc_key)
+        self.doc_count += 1
+        self.df.update(terms)
+
+    def _load(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.doc_count = snapshot.get("doc_count", 0)
+            self.df = Counter(snapshot.get("df", {}))
+            self._docs = set(snapshot.get("docs", []))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取TF-IDF索引快照失败，将从日志重建: {e}")
+
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 进程中断时最后一行可能不完整
+                        continue
+                    self._journal_lines += 1
+                    if entry["doc"] not in self._docs:
+                        self._apply(entry["doc"], entry["terms"])
+        except FileNotFoundError:
+            pass
+
+    def _compact(self):
+        """写新快照（原子替换），然后清空日志"""
+        snapshot = {
+            "doc_count": self.doc_count,
+            "docs": sorted(self._docs),
+            "df": dict(self.df)
+        }
+        atomic_write(self.snapshot_path, json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        open(self.journal_path, 'w').close()
+        self._journal_lines = 0
+        logger.info(f"TF-IDF索引已合并: {self.doc_count} 篇文章, {len(self.df)} 个词")
+
+
+_default_index: Optional[DocumentFrequencyIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_document_index() -> DocumentFrequencyIndex:
+    """获取默认索引（单例模式）"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DocumentFrequencyIndex()
+    return _default_index
+
+
+def main():
+    from article_analysis import index_article
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    index = get_document_index()
+
+    if command == "backfill":
+        articles_dir = sys.argv[2] if len(sys.argv) > 2 else "articles"
+        added = sum(1 for _, article_data in iter_saved_articles(articles_dir) if index_article(article_data, index))
+        index.compact()
+        print(f"新增 {added} 篇文章")
+    elif command != "stats":
+        print(__doc__)
+        return
+    print(json.dumps(index.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
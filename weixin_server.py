@@ -5,20 +5,34 @@
 提供微信公众号文章爬取和文件保存功能
 """
 
+import asyncio
+import functools
 import json
 import logging
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
 from collections import Counter
 
 # MCP imports
 from mcp.server.fastmcp import FastMCP
 
-# 导入微信爬虫
-from weixin_spider import WeixinSpider
+# 导入微信爬虫池
+from weixin_spider import DEFAULT_HEADERS
+from spider_pool import SpiderPool
+from image_downloader import ImageDownloader
+from image_store import ImageStore
+from article_cache import ArticleCache, article_content_hash, normalize_article_url
+from article_store import ArticleStore
+from article_catalog import get_article_catalog
+from article_analysis import analyze_content, index_article
+from simhash import format_simhash, has_fingerprint, simhash
+from summarizer import summarize
 
 # 配置日志
 logging.basicConfig(
@@ -30,48 +44,223 @@ logger = logging.getLogger(__name__)
 # 创建FastMCP服务器实例
 mcp = FastMCP("weixin-spider")
 
-# 全局爬虫实例
-spider_instance: Optional[WeixinSpider] = None
+# 爬虫池配置（可在 servers_config.json 的 env 中覆盖）
+SPIDER_POOL_SIZE = int(os.getenv("SPIDER_POOL_SIZE", "2"))
+HEADLESS = os.getenv("HEADLESS", "true").lower() != "false"
+WAIT_TIME = int(os.getenv("WAIT_TIME", "10"))
+FETCH_MODE = os.getenv("FETCH_MODE", "auto")  # auto / http / browser
+BLOCK_POLICY = os.getenv("BLOCK_POLICY", "no_images")  # none / standard / no_images
 
-def get_spider_instance() -> WeixinSpider:
-    """获取爬虫实例（单例模式）"""
-    global spider_instance
-    if spider_instance is None:
-        try:
-            spider_instance = WeixinSpider(
-                headless=True,  # MCP服务器中使用无头模式
-                wait_time=10,
-                download_images=True
+# 图片下载配置：所有爬虫共享一个下载器（连接池和按主机并发限制都是全局的）
+IMAGE_DOWNLOAD_WORKERS = int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "8"))
+IMAGE_PER_HOST_LIMIT = int(os.getenv("IMAGE_PER_HOST_LIMIT", "4"))
+IMAGE_DOWNLOAD_BUDGET = float(os.getenv("IMAGE_DOWNLOAD_BUDGET", "120"))
+# 内容寻址图片存储目录（需与 articles/ 位于同一文件系统才能硬链接）
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "articles/.image_store")
+
+# 全局爬虫池
+spider_pool: Optional[SpiderPool] = None
+_spider_pool_lock = threading.Lock()
+
+def get_spider_pool() -> SpiderPool:
+    """获取爬虫池（单例模式），池中的每个爬虫持有独立的浏览器"""
+    global spider_pool
+    with _spider_pool_lock:
+        if spider_pool is None:
+            spider_pool = SpiderPool(
+                size=SPIDER_POOL_SIZE,
+                spider_kwargs={
+                    "headless": HEADLESS,  # MCP服务器中默认使用无头模式
+                    "wait_time": WAIT_TIME,
+                    "download_images": True,
+                    "fetch_mode": FETCH_MODE,
+                    "block_policy": BLOCK_POLICY,
+                    "image_downloader": ImageDownloader(
+                        headers=DEFAULT_HEADERS,
+                        max_workers=IMAGE_DOWNLOAD_WORKERS,
+                        per_host_limit=IMAGE_PER_HOST_LIMIT,
+                        total_timeout=IMAGE_DOWNLOAD_BUDGET,
+                        store=ImageStore(IMAGE_STORE_DIR)
+                    )
+                }
             )
-            logger.info("爬虫实例初始化成功")
-        except Exception as e:
-            logger.error(f"爬虫实例初始化失败: {e}")
-            raise RuntimeError(f"无法初始化爬虫实例: {e}")
+            logger.info(f"爬虫池初始化成功，池大小: {SPIDER_POOL_SIZE}")
+    return spider_pool
+
+# 爬取任务线程池：Selenium 和图片下载都是阻塞调用，放到工作线程中执行，
+# 避免阻塞 MCP 事件循环。浏览器驱动无法跨进程传递，因此使用线程而不是进程
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", str(SPIDER_POOL_SIZE)))
+crawl_executor: Optional[ThreadPoolExecutor] = None
+
+def get_crawl_executor() -> ThreadPoolExecutor:
+    """获取爬取任务线程池（单例模式）"""
+    global crawl_executor
+    with _spider_pool_lock:
+        if crawl_executor is None:
+            crawl_executor = ThreadPoolExecutor(
+                max_workers=max(1, CRAWL_WORKERS),
+                thread_name_prefix="weixin-crawl"
+            )
+    return crawl_executor
+
+async def run_blocking(func, *args, **kwargs) -> Any:
+    """在爬取线程池中执行阻塞函数，事件循环在等待期间可以继续处理其他工具调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_crawl_executor(), functools.partial(func, *args, **kwargs))
+
+# 文章缓存：同一篇文章（按规范化URL）在有效期内直接返回已保存的文件
+ARTICLE_CACHE_DIR = os.getenv("ARTICLE_CACHE_DIR", "articles/.article_cache")
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", "86400"))
+ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "500"))
+article_cache: Optional[ArticleCache] = None
+
+def get_article_cache() -> ArticleCache:
+    """获取文章缓存（单例模式）"""
+    global article_cache
+    with _spider_pool_lock:
+        if article_cache is None:
+            article_cache = ArticleCache(
+                ARTICLE_CACHE_DIR,
+                ttl=ARTICLE_CACHE_TTL,
+                max_entries=ARTICLE_CACHE_MAX_ENTRIES
+            )
+    return article_cache
+
+# 文章句柄：爬取后返回短ID，分析类工具通过ID在服务器端取回文章
+ARTICLE_INDEX_DIR = os.getenv("ARTICLE_INDEX_DIR", "articles/.article_index")
+article_store: Optional[ArticleStore] = None
+
+def get_article_store() -> ArticleStore:
+    """获取文章句柄存储（单例模式）"""
+    global article_store
+    with _spider_pool_lock:
+        if article_store is None:
+            article_store = ArticleStore(ARTICLE_INDEX_DIR, catalog=get_article_catalog())
+    return article_store
+
+def _resolve_article(article_data: Optional[dict], article_id: Optional[str]):
+    """
+    取得工具要处理的文章：优先按 article_id 从服务器端取回，否则使用传入的 article_data
     
-    # 检查驱动是否仍然有效
-    if spider_instance.driver is None:
-        logger.warning("检测到驱动已失效，重新初始化...")
-        try:
-            spider_instance.setup_driver(headless=True)
-            logger.info("驱动重新初始化成功")
-        except Exception as e:
-            logger.error(f"驱动重新初始化失败: {e}")
-            # 创建新的爬虫实例
-            try:
-                spider_instance = WeixinSpider(
-                    headless=True,
-                    wait_time=10,
-                    download_images=True
-                )
-                logger.info("创建新的爬虫实例成功")
-            except Exception as new_e:
-                logger.error(f"创建新爬虫实例失败: {new_e}")
-                raise RuntimeError(f"无法创建爬虫实例: {new_e}")
-    
-    return spider_instance
+    Returns:
+        (article_data, error_message)，找不到文章时 article_data 为 None
+    """
+    if article_id:
+        stored = get_article_store().get(article_id)
+        if stored is None:
+            return None, f"未找到文章ID: {article_id}，请先用爬取工具获取文章"
+        return stored, None
+    if not article_data or not isinstance(article_data, dict):
+        return None, "请提供 article_id（爬取工具返回的文章ID）或字典格式的 article_data"
+    return article_data, None
+
+def _crawl_and_save(url: str, download_images: bool = True, custom_filename: str = None,
+                    force_refresh: bool = False, timeout: Optional[float] = None):
+    """
+    借用池中的爬虫实例爬取并保存文章（阻塞调用，需在工作线程中执行）
+    
+    未指定 custom_filename 且不强制刷新时先查文章缓存：有效期内直接返回已保存的文件；
+    已过期则重新爬取，内容未变时沿用原来的文件，不再下载图片和写新目录；
+    爬取到的正文与已保存的文章近似重复（其他账号转载）时同样沿用已保存的文章，正文太短的文章不查重
+    
+    Args:
+        timeout: 爬取和下载图片的总超时秒数，从借到爬虫实例时开始计时（等待空闲爬虫的时间不计入）；
+                 爬取页面时到期则中止页面加载并抛出 TimeoutError，下载图片时到期则未下载完的图片记为失败、
+                 文章照常保存；为空表示不限
+    
+    Returns:
+        (article_data, save_success, saved_files, cache_status)，爬取失败时 article_data 为 None；
+        cache_status 为 hit（命中缓存）、revalidated（过期但内容未变）、duplicate（转载的近似重复文章）或 miss
+    """
+    cache = get_article_cache()
+    entry = None
+    if not force_refresh and not custom_filename:
+        entry, fresh = cache.lookup(url, download_images)
+        if entry and fresh:
+            article_data = cache.load_article(entry)
+            if article_data:
+                logger.info(f"命中文章缓存: {url}")
+                return article_data, True, entry["saved_files"], "hit"
+            entry = None
+    
+    with get_spider_pool().spider() as spider:
+        spider.download_images = download_images
+        
+        deadline = time.monotonic() + timeout if timeout else None
+        article_data = spider.crawl_article_by_url(url, deadline=deadline)
+        if not article_data:
+            return None, False, [], "miss"
+        
+        if entry and entry.get("content_hash") == article_content_hash(article_data):
+            cached_data = cache.load_article(entry)
+            if cached_data:
+                logger.info(f"文章内容未变化，沿用缓存的文件: {url}")
+                cache.touch(url, entry)
+                return cached_data, True, entry["saved_files"], "revalidated"
+        
+        # 正文指纹只在需要查重和保存时计算，随文章JSON保存，登记目录时不再重算；
+        # 正文为空或太短（纯图片、视频文章）时不计算，也不查重
+        content = article_data.get("content", "")
+        fingerprint = simhash(content) if has_fingerprint(content) else None
+        if fingerprint is not None:
+            article_data["simhash"] = format_simhash(fingerprint)
+        
+        # 缓存中已有这个URL说明是同一篇文章重新爬取（内容已变化），不与任何已保存的文章比较
+        if not force_refresh and not custom_filename and entry is None and fingerprint is not None:
+            duplicate = _find_saved_duplicate(url, fingerprint, download_images)
+            if duplicate:
+                original_data, original_files = duplicate
+                # 缓存记录这个URL自己的内容哈希，过期后重新爬取时仍能判断内容是否变化
+                cache.put(url, article_data, original_files, download_images)
+                return original_data, True, original_files, "duplicate"
+        
+        save_success = spider.save_article_to_file(article_data, custom_filename, deadline)
+        saved_files = spider.get_saved_files_info() if save_success else []
+    
+    if save_success:
+        cache.put(url, article_data, saved_files, download_images)
+        index_article(article_data)
+    return article_data, save_success, saved_files, "miss"
+
+def _find_saved_duplicate(url: str, fingerprint: int, download_images: bool):
+    """
+    按正文 SimHash 在已保存的文章中查找近似重复的文章（跳过同一URL之前保存的版本）
+    
+    Returns:
+        (已保存的文章数据, 已保存的文件)，没有可沿用的文章时返回 None
+    """
+    normalized_url = normalize_article_url(url)
+    for match in get_article_catalog().find_near_duplicates(fingerprint):
+        # 同一URL的旧版本（缓存过期或被淘汰后重新爬取）不算转载，内容有修改时需要重新保存
+        if match["url"] and normalize_article_url(match["url"]) == normalized_url:
+            continue
+        # 需要图片但已保存的那份没有下载图片时不沿用
+        if download_images and match["image_count"] and not match["images_dir"]:
+            continue
+        original_data = get_article_store().get(match["article_id"])
+        if original_data:
+            logger.info(f"检测到近似重复的文章（汉明距离 {match['distance']}），沿用已保存的文章: {match['title']} {match['url']}")
+            return original_data, match["saved_files"]
+    return None
+
+def _save_article(article_data: dict, custom_filename: str = None):
+    """
+    借用池中的爬虫实例保存文章（阻塞调用，需在工作线程中执行）
+    
+    Returns:
+        (save_success, saved_files)
+    """
+    with get_spider_pool().spider() as spider:
+        save_success = spider.save_article_to_file(article_data, custom_filename)
+        saved_files = spider.get_saved_files_info() if save_success else []
+    
+    if save_success:
+        index_article(article_data)
+    return save_success, saved_files
 
 @mcp.tool()
-async def crawl_weixin_article(url: str, download_images: bool = True, custom_filename: str = None) -> str:
+async def crawl_weixin_article(url: str, download_images: bool = True, custom_filename: str = None,
+                               force_refresh: bool = False) -> str:
     """
     爬取微信公众号文章内容并保存到文件
     
@@ -79,9 +268,10 @@ async def crawl_weixin_article(url: str, download_images: bool = True, custom_fi
         url: 微信公众号文章的URL链接，必须以 https://mp.weixin.qq.com/ 开头
         download_images: 是否下载文章中的图片，默认为 true
         custom_filename: 自定义文件名（可选），如果不提供将使用文章标题作为文件名
+        force_refresh: 是否忽略缓存重新爬取，默认为 false（同一篇文章在缓存有效期内直接返回已保存的文件）
     
     Returns:
-        爬取结果的JSON字符串
+        爬取结果的JSON字符串，其中的 article_id 可传给分析、笔记和保存工具，无需再传整篇文章
     """
     try:
         # 验证URL
@@ -93,14 +283,10 @@ async def crawl_weixin_article(url: str, download_images: bool = True, custom_fi
         
         logger.info(f"开始爬取文章: {url}")
         
-        # 获取爬虫实例
-        spider = get_spider_instance()
-        
-        # 设置是否下载图片
-        spider.download_images = download_images
-        
-        # 爬取文章
-        article_data = spider.crawl_article_by_url(url)
+        # 在工作线程中爬取并保存文章
+        article_data, success, saved_files, cache_status = await run_blocking(
+            _crawl_and_save, url, download_images, custom_filename, force_refresh
+        )
         
         if not article_data:
             return json.dumps({
@@ -108,14 +294,19 @@ async def crawl_weixin_article(url: str, download_images: bool = True, custom_fi
                 "message": "无法获取文章内容，请检查URL是否正确或网络连接"
             }, ensure_ascii=False, indent=2)
         
-        # 保存文章到文件
-        success = spider.save_article_to_file(article_data, custom_filename)
-        
         if success:
             # 构建返回结果
+            if cache_status == "miss":
+                message = "文章爬取成功"
+            elif cache_status == "duplicate":
+                message = "该文章与已保存的文章内容近似（转载），沿用已保存的文章"
+            else:
+                message = "文章已缓存，返回已保存的文件"
             result = {
                 "status": "success",
-                "message": "文章爬取成功",
+                "message": message,
+                "article_id": get_article_store().put(article_data, saved_files),
+                "cache": cache_status,
                 "article": {
                     "title": article_data.get("title", ""),
                     "author": article_data.get("author", ""),
@@ -134,6 +325,9 @@ async def crawl_weixin_article(url: str, download_images: bool = True, custom_fi
                 }
             }
             
+            if cache_status == "duplicate":
+                result["requested_url"] = url
+            
             if download_images:
                 images = article_data.get("images", [])
                 success_count = sum(1 for img in images if img.get("download_success", False))
@@ -153,75 +347,188 @@ async def crawl_weixin_article(url: str, download_images: bool = True, custom_fi
             "message": f"爬取失败: {str(e)}"
         }, ensure_ascii=False, indent=2)
 
+# 批量爬取：URL数超过该值时，逐条结果写入JSONL清单文件，工具只返回汇总和失败项
+BATCH_MANIFEST_THRESHOLD = int(os.getenv("BATCH_MANIFEST_THRESHOLD", "20"))
+BATCH_MANIFEST_DIR = os.getenv("BATCH_MANIFEST_DIR", "articles/batch_manifests")
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "200"))
+
+async def _crawl_batch_item(url: str, download_images: bool, force_refresh: bool, timeout: float,
+                            semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """爬取批量任务中的一个URL，返回该URL的状态行（不抛出异常）"""
+    row = {"url": url, "status": "", "title": "", "word_count": 0, "images": "", "seconds": 0.0, "error": ""}
+
+    async with semaphore:
+        start = asyncio.get_running_loop().time()
+        try:
+            # 超时由爬虫在工作线程中执行（到期中止页面加载），这里一直等到爬取真正结束才释放并发名额，
+            # 不会出现已放弃等待的爬取仍占着线程和爬虫、让后面的URL排队超时的情况
+            article_data, success, saved_files, cache_status = await run_blocking(
+                _crawl_and_save, url, download_images, None, force_refresh, timeout
+            )
+        except TimeoutError:
+            row.update(status="timeout", error=f"超过 {timeout:g}s 未完成")
+            article_data = None
+        except Exception as e:
+            row.update(status="error", error=str(e))
+            article_data = None
+        else:
+            if not article_data:
+                row.update(status="error", error="无法获取文章内容")
+            elif not success:
+                row.update(status="error", error="保存文件时出错")
+            else:
+                row["status"] = "success"
+                row["id"] = get_article_store().put(article_data, saved_files)
+                row["cache"] = cache_status
+                row["dir"] = os.path.dirname(saved_files[0]["path"]) if saved_files else ""
+        row["seconds"] = round(asyncio.get_running_loop().time() - start, 2)
+
+    if article_data:
+        images = article_data.get("images", [])
+        row["title"] = article_data.get("title", "")
+        row["word_count"] = article_data.get("word_count", 0)
+        if download_images:
+            downloaded = sum(1 for img in images if img.get("download_success", False))
+            row["images"] = f"{downloaded}/{len(images)}"
+        else:
+            row["images"] = str(len(images))
+    return row
+
+def _write_batch_manifest(rows: List[Dict[str, Any]]) -> str:
+    """把批量爬取的逐条结果写入JSONL清单文件，返回文件路径"""
+    os.makedirs(BATCH_MANIFEST_DIR, exist_ok=True)
+    manifest_path = os.path.join(BATCH_MANIFEST_DIR, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return manifest_path
+
 @mcp.tool()
-async def analyze_article_content(article_data: dict, analysis_type: str = "full") -> str:
+async def crawl_weixin_articles_batch(urls: List[str], concurrency: int = 2, timeout: float = 180,
+                                      download_images: bool = True, force_refresh: bool = False) -> str:
+    """
+    批量爬取多篇微信公众号文章并分别保存到文件
+
+    Args:
+        urls: 微信公众号文章URL列表，每个都必须以 https://mp.weixin.qq.com/ 开头
+        concurrency: 同时爬取的文章数，默认为 2（不超过服务器的爬取线程数）
+        timeout: 单篇文章的超时时间（秒），从开始爬取该文章时计时（排队等待不计入），包括爬取页面和下载图片，
+                 默认为 180；下载图片时到期的文章仍会保存，只是缺少未下载完的图片
+        download_images: 是否下载文章中的图片，默认为 true
+        force_refresh: 是否忽略缓存重新爬取，默认为 false
+
+    Returns:
+        批量爬取结果的JSON字符串：汇总信息和每个URL一行的状态表；
+        URL较多时状态表写入JSONL清单文件，只返回清单路径和失败项
+    """
+    try:
+        if not urls or not isinstance(urls, list):
+            return json.dumps({
+                "status": "error",
+                "message": "urls 必须是非空的URL列表"
+            }, ensure_ascii=False, indent=2)
+
+        if len(urls) > BATCH_MAX_URLS:
+            return json.dumps({
+                "status": "error",
+                "message": f"单次最多爬取 {BATCH_MAX_URLS} 个URL，当前为 {len(urls)} 个"
+            }, ensure_ascii=False, indent=2)
+
+        # 并发数不超过爬取线程数，多出的任务只会在线程池中排队
+        concurrency = max(1, min(int(concurrency), max(1, CRAWL_WORKERS)))
+        semaphore = asyncio.Semaphore(concurrency)
+        logger.info(f"开始批量爬取 {len(urls)} 篇文章，并发数: {concurrency}")
+
+        # 无效和重复的URL直接记录结果，不占用爬取名额
+        rows: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        tasks = {}
+        seen = set()
+        for i, url in enumerate(urls):
+            if not isinstance(url, str) or not url.startswith("https://mp.weixin.qq.com/"):
+                rows[i] = {"url": url, "status": "invalid", "error": "无效的微信文章URL"}
+            elif normalize_article_url(url) in seen:
+                rows[i] = {"url": url, "status": "duplicate", "error": "与前面的URL重复"}
+            else:
+                seen.add(normalize_article_url(url))
+                tasks[i] = _crawl_batch_item(url, download_images, force_refresh, timeout, semaphore)
+
+        for i, row in zip(tasks, await asyncio.gather(*tasks.values())):
+            rows[i] = row
+
+        counts = Counter(row["status"] for row in rows)
+        result = {
+            "status": "success" if counts["success"] else "error",
+            "message": f"批量爬取完成：成功 {counts['success']} 篇，共 {len(urls)} 个URL",
+            "summary": {
+                "total": len(urls),
+                "success": counts["success"],
+                "error": counts["error"],
+                "timeout": counts["timeout"],
+                "invalid": counts["invalid"],
+                "duplicate": counts["duplicate"],
+                "near_duplicate": sum(1 for row in rows if row.get("cache") == "duplicate"),
+                "concurrency": concurrency
+            }
+        }
+
+        if len(rows) > BATCH_MANIFEST_THRESHOLD:
+            result["manifest"] = _write_batch_manifest(rows)
+            result["failures"] = [
+                {"url": row["url"], "status": row["status"], "error": row.get("error", "")}
+                for row in rows if row["status"] != "success"
+            ]
+        else:
+            result["results"] = rows
+
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        logger.error(f"批量爬取失败: {e}")
+        return json.dumps({
+            "status": "error",
+            "message": f"批量爬取失败: {str(e)}"
+        }, ensure_ascii=False, indent=2)
+
+@mcp.tool()
+async def analyze_article_content(article_data: dict = None, analysis_type: str = "full", article_id: str = None) -> str:
     """
     分析已爬取的文章内容，提供摘要和统计信息
     
     Args:
-        article_data: 文章数据对象，包含标题、内容等信息
+        article_data: 文章数据对象，包含标题、内容等信息（提供 article_id 时可省略）
         analysis_type: 分析类型：summary(摘要), keywords(关键词), images(图片信息), full(完整分析)
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         分析结果的JSON字符串
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
             return json.dumps({
                 "status": "error",
-                "message": "article_data 必须是字典格式的文章数据"
+                "message": error
             }, ensure_ascii=False, indent=2)
         
         logger.info(f"分析文章内容: analysis_type={analysis_type}")
         
         result = {"analysis_type": analysis_type}
         
+        # 关键词和段落统计按正文内容哈希缓存，同一篇文章只分析一次
         if analysis_type in ["summary", "full"]:
             content = article_data.get("content", "")
+            analysis = analyze_content(content)
             result["summary"] = {
                 "title": article_data.get("title", ""),
                 "author": article_data.get("author", ""),
                 "publish_time": article_data.get("publish_time", ""),
                 "word_count": len(content),
-                "paragraph_count": len([p for p in content.split('\n') if p.strip()]),
+                "paragraph_count": analysis["paragraph_count"],
                 "estimated_reading_time": f"{max(1, len(content) // 300)} 分钟"
             }
         
         if analysis_type in ["keywords", "full"]:
-            content = article_data.get("content", "")
-            # 改进的关键词提取（基于词频）
-            # 清理文本，保留中文字符和基本标点
-            cleaned_text = re.sub(r'[^\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]', ' ', content)
-            
-            # 简单的中文分词（基于标点和空格）
-            # 移除常见停用词
-            stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少', '可以', '能够', '应该', '必须', '如果', '因为', '所以', '但是', '然后', '现在', '已经', '还是', '只是', '或者', '以及', '并且', '而且', '不过', '虽然', '尽管', '除了', '通过', '关于', '对于', '由于', '为了', '根据', '按照', '依据', '基于'}
-            
-            # 提取2-4字的中文词组
-            words = []
-            text_parts = re.split(r'[，。！？；：\s]+', cleaned_text)
-            
-            for part in text_parts:
-                if len(part) >= 2:
-                    # 提取2-4字的连续中文字符，优先提取完整词汇
-                    for i in range(len(part)):
-                        for length in [4, 3, 2]:  # 优先提取长词
-                            if i + length <= len(part):
-                                word = part[i:i+length]
-                                if (len(word) == length and 
-                                    word not in stop_words and 
-                                    re.match(r'^[\u4e00-\u9fff]+$', word) and
-                                    not any(word.endswith(suffix) for suffix in ['的', '了', '在', '是', '有', '和', '就', '不', '都', '也', '很', '到', '说', '要', '去', '会', '着', '没', '看', '好', '这', '那', '它', '他', '她', '们', '来', '过', '时', '大', '小', '多', '少'])):
-                                    words.append(word)
-            
-            # 统计词频
-            word_freq = Counter(words)
-            top_keywords = word_freq.most_common(15)
-            
-            # 过滤掉频次太低的词（少于2次）
-            filtered_keywords = [(word, count) for word, count in top_keywords if count >= 2]
-            
-            result["keywords"] = [{"word": word, "count": count} for word, count in filtered_keywords[:10]]
+            result["keywords"] = analyze_content(article_data.get("content", ""))["keywords"]
         
         if analysis_type in ["images", "full"]:
             images = article_data.get("images", [])
@@ -246,21 +553,23 @@ async def analyze_article_content(article_data: dict, analysis_type: str = "full
         }, ensure_ascii=False, indent=2)
 
 @mcp.tool()
-async def get_article_statistics(article_data: dict) -> str:
+async def get_article_statistics(article_data: dict = None, article_id: str = None) -> str:
     """
     获取文章的统计信息
     
     Args:
-        article_data: 文章数据对象
+        article_data: 文章数据对象（提供 article_id 时可省略）
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         统计信息的JSON字符串
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
             return json.dumps({
                 "status": "error",
-                "message": "article_data 必须是字典格式的文章数据"
+                "message": error
             }, ensure_ascii=False, indent=2)
         
         content = article_data.get("content", "")
@@ -298,22 +607,24 @@ async def get_article_statistics(article_data: dict) -> str:
         }, ensure_ascii=False, indent=2)
 
 @mcp.tool()
-async def generate_reading_notes(article_data: dict, note_style: str = "summary") -> str:
+async def generate_reading_notes(article_data: dict = None, note_style: str = "summary", article_id: str = None) -> str:
     """
     根据文章内容生成读书笔记
     
     Args:
-        article_data: 文章数据对象，包含标题、内容等信息
+        article_data: 文章数据对象，包含标题、内容等信息（提供 article_id 时可省略）
         note_style: 笔记风格：summary(摘要式), detailed(详细式), mind_map(思维导图式), key_points(要点式), one_sentence(一句话总结)
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         生成的读书笔记内容
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
             return json.dumps({
                 "status": "error",
-                "message": "article_data 必须是字典格式的文章数据"
+                "message": error
             }, ensure_ascii=False, indent=2)
         
         logger.info(f"生成读书笔记: note_style={note_style}")
@@ -325,10 +636,8 @@ async def generate_reading_notes(article_data: dict, note_style: str = "summary"
         content = article_data.get("content", "")
         word_count = article_data.get("word_count", len(content))
         
-        # 分析关键词
-        keywords_result = await analyze_article_content(article_data, "keywords")
-        keywords_data = json.loads(keywords_result)
-        keywords = keywords_data.get("keywords", [])
+        # 分析关键词（使用缓存的分析结果）
+        keywords = analyze_content(content)["keywords"]
         
         # 根据不同风格生成笔记
         if note_style == "summary":
@@ -341,7 +650,7 @@ async def generate_reading_notes(article_data: dict, note_style: str = "summary"
             notes = _generate_key_points_notes(title, author, publish_time, content, word_count, keywords)
         elif note_style == "one_sentence":
             # 生成一句话总结
-            one_sentence = _generate_one_sentence_from_content(title, author, [kw.get("word", "") for kw in keywords[:3]], [])
+            one_sentence = _generate_one_sentence_from_content(title, author, [kw.get("word", "") for kw in keywords[:3]], content)
             notes = f"# 一句话读书笔记：{title}\n\n**{one_sentence}**\n\n---\n*生成时间：{datetime.now().strftime('%Y年%m月%d日 %H:%M')}*"
         else:
             notes = _generate_summary_notes(title, author, publish_time, content, word_count, keywords)
@@ -363,17 +672,8 @@ async def generate_reading_notes(article_data: dict, note_style: str = "summary"
 
 def _generate_summary_notes(title, author, publish_time, content, word_count, keywords):
     """生成摘要式读书笔记"""
-    # 提取文章主要段落
-    paragraphs = [p.strip() for p in content.split('\n') if p.strip() and len(p.strip()) > 20]
-    
-    # 选择关键段落（开头、中间、结尾）
-    key_paragraphs = []
-    if len(paragraphs) >= 3:
-        key_paragraphs.append(paragraphs[0])  # 开头
-        key_paragraphs.append(paragraphs[len(paragraphs)//2])  # 中间
-        key_paragraphs.append(paragraphs[-1])  # 结尾
-    else:
-        key_paragraphs = paragraphs
+    # 抽取式摘要：按 TextRank 得分选出的句子（按原文顺序）
+    key_sentences = summarize(content, max_sentences=5)
     
     # 生成关键词列表
     keyword_list = "、".join([kw.get("word", "") for kw in keywords[:8]])
@@ -393,7 +693,7 @@ def _generate_summary_notes(title, author, publish_time, content, word_count, ke
 {keyword_list}
 
 ### 主要内容
-{chr(10).join([f"{i+1}. {para[:200]}..." if len(para) > 200 else f"{i+1}. {para}" for i, para in enumerate(key_paragraphs)])}
+{chr(10).join([f"{i+1}. {sentence[:200]}..." if len(sentence) > 200 else f"{i+1}. {sentence}" for i, sentence in enumerate(key_sentences)])}
 
 ## 💡 个人思考
 - 这篇文章主要讲述了{title.replace('聊一聊我是如何学习', '').replace('的', '')}相关内容
@@ -550,9 +850,8 @@ def _generate_mind_map_notes(title, author, publish_time, content, word_count, k
 
 def _generate_key_points_notes(title, author, publish_time, content, word_count, keywords):
     """生成要点式读书笔记"""
-    # 提取关键句子
-    sentences = [s.strip() for s in content.replace('。', '。\n').split('\n') if s.strip() and len(s.strip()) > 15]
-    key_sentences = sentences[:8]  # 取前8个关键句子
+    # 抽取式摘要：得分最高的8个句子（按原文顺序）
+    key_sentences = summarize(content, max_sentences=8)
     
     notes = f"""# 要点式笔记：{title}
 
@@ -615,21 +914,23 @@ def _generate_key_points_notes(title, author, publish_time, content, word_count,
     return notes
 
 @mcp.tool()
-async def generate_one_sentence_summary(article_data: dict) -> str:
+async def generate_one_sentence_summary(article_data: dict = None, article_id: str = None) -> str:
     """
     生成文章的一句话读书笔记
     
     Args:
-        article_data: 文章数据对象，包含标题、内容等信息
+        article_data: 文章数据对象，包含标题、内容等信息（提供 article_id 时可省略）
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         一句话总结的JSON字符串
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
             return json.dumps({
                 "status": "error",
-                "message": "article_data 必须是字典格式的文章数据"
+                "message": error
             }, ensure_ascii=False, indent=2)
         
         logger.info("生成一句话读书笔记")
@@ -639,19 +940,14 @@ async def generate_one_sentence_summary(article_data: dict) -> str:
         author = article_data.get("author", "未知作者")
         content = article_data.get("content", "")
         
-        # 分析关键词
-        keywords_result = await analyze_article_content(article_data, "keywords")
-        keywords_data = json.loads(keywords_result)
-        keywords = keywords_data.get("keywords", [])
+        # 分析关键词（使用缓存的分析结果）
+        keywords = analyze_content(content)["keywords"]
         
         # 提取核心关键词（前3个）
         core_keywords = [kw.get("word", "") for kw in keywords[:3]]
         
-        # 提取文章的第一段和最后一段作为核心观点
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip() and len(p.strip()) > 20]
-        
         # 生成一句话总结
-        one_sentence = _generate_one_sentence_from_content(title, author, core_keywords, paragraphs)
+        one_sentence = _generate_one_sentence_from_content(title, author, core_keywords, content)
         
         return json.dumps({
             "status": "success",
@@ -669,8 +965,12 @@ async def generate_one_sentence_summary(article_data: dict) -> str:
             "message": f"生成失败: {str(e)}"
         }, ensure_ascii=False, indent=2)
 
-def _generate_one_sentence_from_content(title, author, keywords, paragraphs):
-    """根据文章内容生成一句话总结"""
+def _generate_one_sentence_from_content(title, author, keywords, content):
+    """根据文章内容生成一句话总结：优先取正文中 TextRank 得分最高的句子，正文没有完整句子时按标题套用模板"""
+    key_sentences = summarize(content, max_sentences=1)
+    if key_sentences:
+        sentence = key_sentences[0]
+        return sentence if len(sentence) <= 120 else f"{sentence[:120]}..."
     
     # 分析标题中的关键信息
     title_clean = title.replace('聊一聊', '').replace('我是如何', '').replace('的', '')
@@ -722,7 +1022,8 @@ def _generate_one_sentence_from_content(title, author, keywords, paragraphs):
     return summary
 
 @mcp.tool()
-async def crawl_and_create_reading_notes(url: str, note_style: str = "summary", download_images: bool = True, custom_filename: str = None) -> str:
+async def crawl_and_create_reading_notes(url: str, note_style: str = "summary", download_images: bool = True, custom_filename: str = None,
+                                         force_refresh: bool = False) -> str:
     """
     一句话完成：爬取微信文章并生成读书笔记
     
@@ -731,6 +1032,7 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
         note_style: 笔记风格：summary(摘要式), detailed(详细式), mind_map(思维导图式), key_points(要点式), one_sentence(一句话总结)
         download_images: 是否下载图片，默认为True
         custom_filename: 自定义文件名（可选）
+        force_refresh: 是否忽略缓存重新爬取文章，默认为False
     
     Returns:
         完整操作结果的JSON字符串，包含爬取结果、分析结果和笔记内容
@@ -740,36 +1042,40 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
         
         # 第一步：爬取文章
         logger.info("步骤1: 爬取微信文章...")
-        spider = WeixinSpider(download_images=download_images)
-        
-        article_data = spider.crawl_article_by_url(url)
+        article_data, save_success, saved_files, cache_status = await run_blocking(
+            _crawl_and_save, url, download_images, custom_filename, force_refresh
+        )
         if not article_data:
             return json.dumps({
                 "status": "error",
                 "message": "文章爬取失败，请检查URL是否正确"
             }, ensure_ascii=False, indent=2)
         
-        # 保存爬取的文章
-        if custom_filename:
-            save_success = spider.save_article_to_file(article_data, custom_filename)
-        else:
-            save_success = spider.save_article_to_file(article_data)
-        
         logger.info(f"文章爬取完成: 标题={article_data.get('title')}, 字数={article_data.get('word_count')}")
+        article_id = get_article_store().put(article_data, saved_files if save_success else None)
         
         # 第二步：分析文章内容
         logger.info("步骤2: 分析文章内容...")
         analysis_result = await analyze_article_content(article_data, "full")
         analysis_data = json.loads(analysis_result)
         
-        # 第三步：生成读书笔记
-        logger.info(f"步骤3: 生成{note_style}风格读书笔记...")
-        notes_result = await generate_reading_notes(article_data, note_style)
-        notes_data = json.loads(notes_result)
+        # 已保存过的文章（缓存命中或转载的近似重复文章）已有同风格的笔记时直接沿用
+        existing_notes = None if cache_status == "miss" or custom_filename else _find_saved_notes(article_id, note_style)
+        if existing_notes:
+            logger.info(f"沿用已保存的读书笔记: {existing_notes}")
+            file_path = existing_notes
+            file_size = os.path.getsize(file_path)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                notes_data = {"status": "success", "word_count": len(f.read()), "reused": True}
+        else:
+            # 第三步：生成读书笔记
+            logger.info(f"步骤3: 生成{note_style}风格读书笔记...")
+            notes_result = await generate_reading_notes(article_data, note_style)
+            notes_data = json.loads(notes_result)
         
         # 第四步：保存读书笔记到文件
-        logger.info("步骤4: 保存读书笔记...")
-        if notes_data.get("status") == "success":
+        if notes_data.get("status") == "success" and not existing_notes:
+            logger.info("步骤4: 保存读书笔记...")
             notes_content = notes_data.get("notes", "")
             
             # 确保reading_notes目录存在
@@ -791,6 +1097,7 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
             # 保存笔记文件
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(notes_content)
+            _index_saved_notes(article_data, file_path, notes_content)
             
             file_size = os.path.getsize(file_path)
             logger.info(f"读书笔记已保存到: {file_path}")
@@ -800,12 +1107,14 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
             "status": "success",
             "message": "文章爬取、分析和笔记生成完成",
             "article_info": {
+                "article_id": article_id,
                 "title": article_data.get("title"),
                 "author": article_data.get("author"),
                 "publish_time": article_data.get("publish_time"),
                 "word_count": article_data.get("word_count"),
                 "images_count": len(article_data.get("images", [])),
-                "download_success": sum(1 for img in article_data.get("images", []) if img.get("download_success", False))
+                "download_success": sum(1 for img in article_data.get("images", []) if img.get("download_success", False)),
+                "cache": cache_status
             },
             "analysis_summary": {
                 "keywords_count": len(analysis_data.get("keywords", [])) if analysis_data.get("status") == "success" else 0,
@@ -816,10 +1125,11 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
                 "style": note_style,
                 "word_count": notes_data.get("word_count", 0),
                 "file_path": file_path if notes_data.get("status") == "success" else None,
-                "file_size": file_size if notes_data.get("status") == "success" else 0
+                "file_size": file_size if notes_data.get("status") == "success" else 0,
+                "reused": bool(existing_notes)
             },
             "files_created": {
-                "article_files": spider.get_saved_files_info() if save_success else [],
+                "article_files": saved_files,
                 "notes_file": file_path if notes_data.get("status") == "success" else None
             },
             "processing_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -834,24 +1144,27 @@ async def crawl_and_create_reading_notes(url: str, note_style: str = "summary",
         }, ensure_ascii=False, indent=2)
 
 @mcp.tool()
-async def create_and_save_reading_notes(article_data: dict, note_style: str = "summary", save_to_file: bool = True, custom_filename: str = None) -> str:
+async def create_and_save_reading_notes(article_data: dict = None, note_style: str = "summary", save_to_file: bool = True, custom_filename: str = None,
+                                        article_id: str = None) -> str:
     """
     生成读书笔记并保存到文件
     
     Args:
-        article_data: 文章数据对象，包含标题、内容等信息
+        article_data: 文章数据对象，包含标题、内容等信息（提供 article_id 时可省略）
         note_style: 笔记风格：summary(摘要式), detailed(详细式), mind_map(思维导图式), key_points(要点式), one_sentence(一句话总结)
         save_to_file: 是否保存到文件，默认为True
         custom_filename: 自定义文件名（可选）
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         操作结果的JSON字符串
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
             return json.dumps({
                 "status": "error",
-                "message": "article_data 必须是字典格式的文章数据"
+                "message": error
             }, ensure_ascii=False, indent=2)
         
         logger.info(f"创建并保存读书笔记: note_style={note_style}, save_to_file={save_to_file}")
@@ -899,6 +1212,7 @@ async def create_and_save_reading_notes(article_data: dict, note_style: str = "s
             try:
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(notes_content)
+                _index_saved_notes(article_data, file_path, notes_content)
                 
                 result.update({
                     "file_saved": True,
@@ -930,29 +1244,29 @@ async def create_and_save_reading_notes(article_data: dict, note_style: str = "s
         }, ensure_ascii=False, indent=2)
 
 @mcp.tool()
-async def save_article_to_file(article_data: dict, custom_filename: str = None) -> str:
+async def save_article_to_file(article_data: dict = None, custom_filename: str = None, article_id: str = None) -> str:
     """
     将文章数据保存到文件（JSON、TXT、HTML格式）
     
     Args:
-        article_data: 文章数据对象
+        article_data: 文章数据对象（提供 article_id 时可省略）
         custom_filename: 自定义文件名（可选）
+        article_id: 爬取工具返回的文章ID（可选），提供时无需传入 article_data
     
     Returns:
         保存结果的字符串
     """
     try:
-        if not article_data or not isinstance(article_data, dict):
-            return "错误：article_data 必须是字典格式的文章数据"
-        
-        # 获取爬虫实例
-        spider = get_spider_instance()
+        article_data, error = _resolve_article(article_data, article_id)
+        if error:
+            return f"错误：{error}"
         
-        # 保存文章
-        success = spider.save_article_to_file(article_data, custom_filename)
+        # 在工作线程中保存文章（可能包含图片下载）
+        success, saved_files = await run_blocking(_save_article, article_data, custom_filename)
         
         if success:
-            return "文章保存成功！已生成 JSON、TXT、HTML 格式的文件"
+            article_id = get_article_store().put(article_data, saved_files)
+            return f"文章保存成功！已生成 JSON、TXT、HTML 格式的文件，文章ID: {article_id}"
         else:
             return "错误：文章保存失败"
             
@@ -960,15 +1274,250 @@ async def save_article_to_file(article_data: dict, custom_filename: str = None)
         logger.error(f"保存文章失败: {e}")
         return f"错误：保存失败 - {str(e)}"
 
+# =============================
+# 文章目录查询：已保存文章的元数据和全文检索索引在 SQLite 目录数据库中（见 article_catalog）
+# =============================
+def _find_saved_notes(article_id: str, note_style: str) -> Optional[str]:
+    """文章已保存的指定风格的读书笔记文件（两种笔记文件名中都有 _风格 字样）"""
+    for path in get_article_catalog().find_notes(article_id):
+        if f"_{note_style}" in os.path.basename(path) and os.path.exists(path):
+            return path
+    return None
+
+def _index_saved_notes(article_data: dict, file_path: str, notes_content: str):
+    """把保存的读书笔记加入全文检索索引（失败不影响保存结果）"""
+    try:
+        get_article_catalog().index_notes(article_data, file_path, notes_content)
+    except Exception as e:
+        logger.warning(f"读书笔记加入检索索引失败: {e}")
+
+def _crawl_time_range(since: Optional[str], until: Optional[str], days: Optional[int]):
+    """days 表示最近N天，与 since 同时提供时取 since"""
+    if days and not since:
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    return since, until
+
+@mcp.tool()
+async def find_crawled_articles(url: str = None, title: str = None, author: str = None, since: str = None,
+                                until: str = None, days: int = None, limit: int = 20) -> str:
+    """
+    查询已爬取保存的文章（按爬取时间倒序），可用于判断某个URL是否已经爬取过
+    
+    Args:
+        url: 文章URL（忽略跟踪参数，精确匹配）
+        title: 标题包含的文字
+        author: 公众号/作者名称（精确匹配）
+        since: 爬取时间下限，如 "2025-07-01" 或 "2025-07-01 08:00:00"
+        until: 爬取时间上限（不含）
+        days: 最近N天（未提供 since 时生效）
+        limit: 最多返回的条数（默认20）
+    
+    Returns:
+        文章列表的JSON字符串，其中的 article_id 可直接传给分析和笔记工具
+    """
+    try:
+        since, until = _crawl_time_range(since, until, days)
+        articles = get_article_catalog().find(url=url, title=title, author=author,
+                                              since=since, until=until, limit=limit)
+        return json.dumps({
+            "status": "success",
+            "count": len(articles),
+            "articles": articles
+        }, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        logger.error(f"查询文章目录失败: {e}")
+        return json.dumps({
+            "status": "error",
+            "message": f"查询失败: {str(e)}"
+        }, ensure_ascii=False, indent=2)
+
+@mcp.tool()
+async def search_articles(query: str, limit: int = 10, kind: str = None) -> str:
+    """
+    全文检索已保存的文章正文和读书笔记，按相关度排序并返回命中片段
+    
+    Args:
+        query: 查询词，多个词用空格分隔（须同时出现），中文按任意子串匹配
+        limit: 最多返回的条数（默认10）
+        kind: 只检索 article(文章正文) 或 notes(读书笔记)，默认都检索
+    
+    Returns:
+        检索结果的JSON字符串，其中的 article_id 可直接传给分析和笔记工具
+    """
+    try:
+        started = datetime.now()
+        # 索引查询只需几毫秒，不放进爬取线程池（批量爬取时线程可能全部被占用）
+        results = get_article_catalog().search(query, limit=limit, kind=kind)
+        return json.dumps({
+            "status": "success",
+            "query": query,
+            "count": len(results),
+            "elapsed_ms": round((datetime.now() - started).total_seconds() * 1000, 1),
+            "results": results
+        }, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        logger.error(f"全文检索失败: {e}")
+        return json.dumps({
+            "status": "error",
+            "message": f"检索失败: {str(e)}"
+        }, ensure_ascii=False, indent=2)
+
+@mcp.tool()
+async def get_crawl_statistics(since: str = None, until: str = None, days: int = None) -> str:
+    """
+    统计已爬取保存的文章：保存次数、不同文章数、总字数、总图片数和文章最多的作者
+    
+    Args:
+        since: 爬取时间下限，如 "2025-07-01"
+        until: 爬取时间上限（不含）
+        days: 最近N天（未提供 since 时生效），如 7 表示最近一周
+    
+    Returns:
+        统计结果的JSON字符串
+    """
+    try:
+        since, until = _crawl_time_range(since, until, days)
+        return json.dumps({
+            "status": "success",
+            "since": since,
+            "until": until,
+            **get_article_catalog().statistics(since=since, until=until)
+        }, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        logger.error(f"统计文章目录失败: {e}")
+        return json.dumps({
+            "status": "error",
+            "message": f"统计失败: {str(e)}"
+        }, ensure_ascii=False, indent=2)
+
+# =============================
+# MCP资源：按文章ID读取已保存的文章，正文按页读取
+# =============================
+ARTICLE_TEXT_PAGE_SIZE = int(os.getenv("ARTICLE_TEXT_PAGE_SIZE", "4000"))
+
+def _load_resource_article(article_id: str) -> dict:
+    """按ID取回文章，找不到时抛出异常（由MCP返回资源读取错误）"""
+    article_data = get_article_store().get(article_id)
+    if article_data is None:
+        raise ValueError(f"未找到文章ID: {article_id}")
+    return article_data
+
+def _text_page_offsets(content: str, page_size: int) -> List[int]:
+    """计算每页的起始位置：尽量在换行处分页，单段超过页大小时按页大小截断"""
+    offsets = [0]
+    start = 0
+    while len(content) - start > page_size:
+        newline = content.rfind("\n", start, start + page_size)
+        end = newline + 1 if newline > start else start + page_size
+        offsets.append(end)
+        start = end
+    return offsets
+
+@mcp.resource("weixin://articles", mime_type="application/json")
+def list_article_resources() -> str:
+    """最近爬取的文章列表（文章ID、标题和URL）"""
+    records = get_article_store().list_records()
+    return json.dumps([
+        {
+            "id": record["id"],
+            "title": record.get("title", ""),
+            "url": record.get("url", ""),
+            "uri": f"weixin://article/{record['id']}"
+        }
+        for record in records
+    ], ensure_ascii=False, indent=2)
+
+@mcp.resource("weixin://article/{article_id}", mime_type="application/json")
+def get_article_resource(article_id: str) -> str:
+    """文章元数据，以及正文分页、HTML、图片列表等子资源的地址"""
+    article_data = _load_resource_article(article_id)
+    content = article_data.get("content", "")
+    record = get_article_store().get_record(article_id) or {}
+    base_uri = f"weixin://article/{article_id}"
+
+    return json.dumps({
+        "id": article_id,
+        "title": article_data.get("title", ""),
+        "author": article_data.get("author", ""),
+        "publish_time": article_data.get("publish_time", ""),
+        "url": article_data.get("url", ""),
+        "word_count": article_data.get("word_count", len(content)),
+        "images_count": len(article_data.get("images", [])),
+        "text_length": len(content),
+        "text_pages": len(_text_page_offsets(content, ARTICLE_TEXT_PAGE_SIZE)),
+        "page_size": ARTICLE_TEXT_PAGE_SIZE,
+        "resources": {
+            "text": f"{base_uri}/text/{{page}}",
+            "text_range": f"{base_uri}/text/{{start}}/{{end}}",
+            "html": f"{base_uri}/html",
+            "images": f"{base_uri}/images"
+        },
+        "saved_files": record.get("saved_files", [])
+    }, ensure_ascii=False, indent=2)
+
+@mcp.resource("weixin://article/{article_id}/text", mime_type="text/plain")
+def get_article_text_resource(article_id: str) -> str:
+    """文章正文第1页（页数见文章元数据中的 text_pages）"""
+    return get_article_text_page_resource(article_id, "1")
+
+@mcp.resource("weixin://article/{article_id}/text/{page}", mime_type="text/plain")
+def get_article_text_page_resource(article_id: str, page: str) -> str:
+    """文章正文的第 page 页（从1开始），分页尽量落在段落之间"""
+    content = _load_resource_article(article_id).get("content", "")
+    offsets = _text_page_offsets(content, ARTICLE_TEXT_PAGE_SIZE)
+
+    if not page.isdigit() or not 1 <= int(page) <= len(offsets):
+        raise ValueError(f"页码无效: {page}，共 {len(offsets)} 页")
+    index = int(page) - 1
+    end = offsets[index + 1] if index + 1 < len(offsets) else len(content)
+    return content[offsets[index]:end]
+
+@mcp.resource("weixin://article/{article_id}/text/{start}/{end}", mime_type="text/plain")
+def get_article_text_range_resource(article_id: str, start: str, end: str) -> str:
+    """文章正文中 [start, end) 字符范围的片段"""
+    if not start.isdigit() or not end.isdigit() or int(start) > int(end):
+        raise ValueError(f"字符范围无效: {start}-{end}")
+    content = _load_resource_article(article_id).get("content", "")
+    return content[int(start):int(end)]
+
+@mcp.resource("weixin://article/{article_id}/html", mime_type="text/html")
+def get_article_html_resource(article_id: str) -> str:
+    """保存的HTML文件（图片为本地相对路径）；没有保存文件时返回正文HTML"""
+    record = get_article_store().get_record(article_id) or {}
+    html_path = next((item["path"] for item in record.get("saved_files", []) if item.get("type") == "html"), None)
+    if html_path and os.path.exists(html_path):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return _load_resource_article(article_id).get("content_html", "")
+
+@mcp.resource("weixin://article/{article_id}/images", mime_type="application/json")
+def get_article_images_resource(article_id: str) -> str:
+    """文章图片列表（原始地址、下载状态和本地路径）"""
+    images = _load_resource_article(article_id).get("images", [])
+    return json.dumps([
+        {
+            "index": img.get("index"),
+            "alt": img.get("alt", ""),
+            "url": img.get("url", ""),
+            "downloaded": img.get("download_success", False),
+            "local_path": img.get("local_path", "")
+        }
+        for img in images
+    ], ensure_ascii=False, indent=2)
+
 def cleanup():
     """清理资源"""
-    global spider_instance
-    if spider_instance:
+    if crawl_executor:
+        crawl_executor.shutdown(wait=False, cancel_futures=True)
+    if spider_pool:
         try:
-            spider_instance.close()
-            logger.info("爬虫实例已关闭")
+            spider_pool.close_all()
+            spider_pool.spider_kwargs["image_downloader"].close()
         except Exception as e:
-            logger.error(f"关闭爬虫实例失败: {e}")
+            logger.error(f"关闭爬虫池失败: {e}")
 
 if __name__ == "__main__":
     try:
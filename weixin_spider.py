@@ -6,6 +6,7 @@
 """
 
 import time
+import importlib.util
 import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -14,19 +15,21 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from article_extractor import extract_article, rewrite_image_urls
+from image_downloader import ImageDownloader
+from image_store import ImageStore
+from article_catalog import get_article_catalog
 import json
 import os
 import logging
 from datetime import datetime
 import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import hashlib
 from pathlib import Path
 import sys
 import shutil
 import subprocess
-import base64
 from urllib.parse import unquote
 
 # 配置日志
@@ -36,98 +39,216 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 需要浏览器执行脚本才能访问的页面特征（验证页、仅限微信客户端打开等）
+JS_GATED_MARKERS = (
+    '环境异常',
+    '完成验证后即可继续访问',
+    'wappoc_appmsgcaptcha',
+    '请在微信客户端打开链接',
+)
+
+# requests会话（以及图片下载器）使用的请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    # 未安装brotli时requests无法解码br压缩的响应，HTTP快速路径会拿到乱码
+    'Accept-Encoding': 'gzip, deflate, br' if importlib.util.find_spec('brotli') else 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# 页面就绪检测脚本（execute_async_script）：滚动到底部触发懒加载，
+# DOM在 quietMs 毫秒内没有变化即认为内容已加载完成，最多等待 maxMs 毫秒
+PAGE_READY_SCRIPT = """
+var quietMs = arguments[0], maxMs = arguments[1], done = arguments[arguments.length - 1];
+var start = Date.now(), last = start, mutations = 0;
+var observer = new MutationObserver(function (records) {
+    mutations += records.length;
+    last = Date.now();
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+window.scrollTo(0, document.body.scrollHeight);
+(function check() {
+    var now = Date.now();
+    if (now - last >= quietMs || now - start >= maxMs) {
+        observer.disconnect();
+        window.scrollTo(0, 0);
+        done({elapsed: now - start, mutations: mutations, timed_out: now - last < quietMs});
+    } else {
+        setTimeout(check, 50);
+    }
+})();
+"""
+
+# DOM静默多久（毫秒）视为页面就绪
+PAGE_READY_QUIET_MS = 300
+
+# 没有截止时间时的页面加载超时（秒），与Chrome驱动的默认值相同
+PAGE_LOAD_TIMEOUT = 300
+# 浏览器模式两次重试之间的等待（秒）
+RETRY_DELAY = 2
+
+# 浏览器资源拦截规则（Network.setBlockedURLs 的通配符URL模式）
+# 正文提取只需要DOM，字体、视频、统计上报、广告和评论组件都可以不加载
+_BLOCKED_FONTS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+_BLOCKED_MEDIA = ['*.mp4*', '*.m3u8*', '*.flv*', '*mpvideo.qpic.cn/*', '*://v.qq.com/*']
+_BLOCKED_TRACKERS = [
+    '*mp.weixin.qq.com/mp/jsmonitor*',
+    '*mp.weixin.qq.com/mp/appmsgreport*',
+    '*mp.weixin.qq.com/mp/webcommreport*',
+    '*badjs*',
+    '*://*.beacon.qq.com/*',
+    '*://pingjs.qq.com/*',
+    '*://hm.baidu.com/*',
+    '*://www.google-analytics.com/*',
+]
+_BLOCKED_ADS_AND_WIDGETS = [
+    '*mp.weixin.qq.com/mp/ad_*',
+    '*://*.gdt.qq.com/*',
+    '*mp.weixin.qq.com/mp/appmsg_comment*',
+    '*mp.weixin.qq.com/mp/getappmsgext*',
+]
+# 图片URL仍保留在DOM的 src/data-src 中供提取，只是浏览器不再下载图片内容
+_BLOCKED_IMAGES = ['*mmbiz.qpic.cn/*', '*mmbiz.qlogo.cn/*', '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp']
+
+BLOCK_POLICIES = {
+    'none': [],
+    'standard': _BLOCKED_FONTS + _BLOCKED_MEDIA + _BLOCKED_TRACKERS + _BLOCKED_ADS_AND_WIDGETS,
+    'no_images': _BLOCKED_FONTS + _BLOCKED_MEDIA + _BLOCKED_TRACKERS + _BLOCKED_ADS_AND_WIDGETS + _BLOCKED_IMAGES,
+}
+
+# 支持的抓取模式
+FETCH_MODES = ('auto', 'http', 'browser')
+
+
+def _time_left(deadline, limit):
+    """
+    一步操作可用的秒数：不超过 limit，也不超过距截止时间的剩余秒数
+    :param deadline: 截止时间（time.monotonic() 的值），为空表示不限
+    :raises TimeoutError: 已经过了截止时间
+    """
+    if deadline is None:
+        return limit
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("已超过爬取截止时间")
+    return min(limit, remaining)
+
 class WeixinSpider:
-    def __init__(self, headless=True, wait_time=10, download_images=True):
+    def __init__(self, headless=True, wait_time=10, download_images=True, fetch_mode='auto',
+                 image_downloader=None, ready_timeout=5, block_policy='no_images',
+                 extra_blocked_urls=(), catalog=None):
         """
         初始化爬虫
         :param headless: 是否使用无头模式
         :param wait_time: 页面等待时间
         :param download_images: 是否下载图片
+        :param fetch_mode: 抓取模式：auto(优先HTTP直连，必要时回退浏览器), http(仅HTTP), browser(仅浏览器)
+        :param image_downloader: 图片下载器（可在多个爬虫之间共享），为空时按需创建
+        :param ready_timeout: 浏览器模式下等待懒加载内容就绪的最长秒数
+        :param block_policy: 浏览器资源拦截策略：none(不拦截), standard(拦截字体/视频/统计/广告/评论),
+                             no_images(在standard基础上不下载图片内容，图片URL仍可提取)
+        :param extra_blocked_urls: 额外拦截的URL模式（支持 * 通配符）
+        :param catalog: 文章目录数据库（ArticleCatalog），为空时使用默认的 articles/.catalog.db
         """
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"不支持的抓取模式: {fetch_mode}，可选值: {', '.join(FETCH_MODES)}")
+        if block_policy not in BLOCK_POLICIES:
+            raise ValueError(f"不支持的资源拦截策略: {block_policy}，可选值: {', '.join(BLOCK_POLICIES)}")
+        
         self.driver = None
+        self.headless = headless
         self.wait_time = wait_time
+        self.ready_timeout = ready_timeout
+        self.block_policy = block_policy
+        self.extra_blocked_urls = extra_blocked_urls
         self.download_images = download_images
+        self.fetch_mode = fetch_mode
+        self.image_downloader = image_downloader
+        self.catalog = catalog
         self.session = requests.Session()
         self.setup_session()
-        self.setup_driver(headless)
+        # 浏览器按需启动：auto 模式下只有HTTP快速路径失败时才会启动Chrome
+        if fetch_mode == 'browser':
+            self.setup_driver(headless)
         
     def setup_session(self):
         """设置requests会话"""
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
+        
+    def _build_chrome_options(self, headless=True):
+        """构建Chrome启动参数"""
+        options = Options()
+        
+        if headless:
+            options.add_argument('--headless')
+            logger.info("使用无头模式")
+        
+        # 基本设置
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-logging')
+        options.add_argument('--disable-web-security')
+        options.add_argument('--allow-running-insecure-content')
+        options.add_argument('--disable-features=VizDisplayCompositor')
+        options.add_argument('--disable-features=TranslateUI')
+        options.add_argument('--disable-background-timer-throttling')
+        options.add_argument('--disable-backgrounding-occluded-windows')
+        options.add_argument('--disable-renderer-backgrounding')
+        options.add_argument('--disable-ipc-flooding-protection')
+        options.add_argument('--disable-hang-monitor')
+        options.add_argument('--disable-client-side-phishing-detection')
+        options.add_argument('--disable-popup-blocking')
+        options.add_argument('--disable-prompt-on-repost')
+        options.add_argument('--disable-sync')
+        options.add_argument('--no-first-run')
+        options.add_argument('--disable-default-apps')
+        options.add_argument('--disable-component-update')
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-component-extensions-with-background-pages')
+        options.add_argument('--disable-blink-features=AutomationControlled')
         
+        # 解决渲染器连接问题的关键参数
+        options.add_argument('--single-process')
+        options.add_argument('--disable-gpu-sandbox')
+        options.add_argument('--disable-software-rasterizer')
+        options.add_argument('--remote-debugging-port=0')
+        options.add_argument('--disable-dev-tools')
+        
+        # 内存和性能优化
+        options.add_argument('--memory-pressure-off')
+        options.add_argument('--max_old_space_size=4096')
+        
+        # 设置用户代理
+        options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36')
+        
+        # 排除自动化标识
+        options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+        options.add_experimental_option('useAutomationExtension', False)
+        
+        # 设置prefs以避免各种弹窗
+        prefs = {
+            "profile.default_content_setting_values": {
+                "notifications": 2,
+                "geolocation": 2,
+                "media_stream": 2,
+            },
+            "profile.default_content_settings.popups": 0,
+            "profile.managed_default_content_settings.images": 2 if not self.download_images else 1
+        }
+        options.add_experimental_option("prefs", prefs)
+        
+        return options
+
     def setup_driver(self, headless=True):
         """设置Chrome浏览器驱动"""
         try:
             logger.info("正在设置Chrome浏览器驱动...")
             
-            options = Options()
-            
-            if headless:
-                options.add_argument('--headless')
-                logger.info("使用无头模式")
-            
-            # 基本设置
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--disable-extensions')
-            options.add_argument('--disable-logging')
-            options.add_argument('--disable-web-security')
-            options.add_argument('--allow-running-insecure-content')
-            options.add_argument('--disable-features=VizDisplayCompositor')
-            options.add_argument('--disable-features=TranslateUI')
-            options.add_argument('--disable-background-timer-throttling')
-            options.add_argument('--disable-backgrounding-occluded-windows')
-            options.add_argument('--disable-renderer-backgrounding')
-            options.add_argument('--disable-ipc-flooding-protection')
-            options.add_argument('--disable-hang-monitor')
-            options.add_argument('--disable-client-side-phishing-detection')
-            options.add_argument('--disable-popup-blocking')
-            options.add_argument('--disable-prompt-on-repost')
-            options.add_argument('--disable-sync')
-            options.add_argument('--no-first-run')
-            options.add_argument('--disable-default-apps')
-            options.add_argument('--disable-component-update')
-            options.add_argument('--disable-background-networking')
-            options.add_argument('--disable-component-extensions-with-background-pages')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            
-            # 解决渲染器连接问题的关键参数
-            options.add_argument('--single-process')
-            options.add_argument('--disable-gpu-sandbox')
-            options.add_argument('--disable-software-rasterizer')
-            options.add_argument('--remote-debugging-port=0')
-            options.add_argument('--disable-dev-tools')
-            
-            # 内存和性能优化
-            options.add_argument('--memory-pressure-off')
-            options.add_argument('--max_old_space_size=4096')
-            
-            # 设置用户代理
-            options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36')
-            
-            # 排除自动化标识
-            options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-            options.add_experimental_option('useAutomationExtension', False)
-            
-            # 设置prefs以避免各种弹窗
-            prefs = {
-                "profile.default_content_setting_values": {
-                    "notifications": 2,
-                    "geolocation": 2,
-                    "media_stream": 2,
-                },
-                "profile.default_content_settings.popups": 0,
-                "profile.managed_default_content_settings.images": 2 if not self.download_images else 1
-            }
-            options.add_experimental_option("prefs", prefs)
+            options = self._build_chrome_options(headless)
             
             # 优先尝试使用系统ChromeDriver
             try:
@@ -171,84 +292,155 @@ class WeixinSpider:
             except Exception as e:
                 logger.warning(f"设置窗口大小失败: {e}")
             
+            # 拦截与正文提取无关的资源
+            self._apply_block_policy()
+            
             logger.info("Chrome浏览器驱动设置完成")
             
         except Exception as e:
             logger.error(f"设置Chrome浏览器驱动失败: {e}")
             raise
 
-    def crawl_article_by_url(self, url, retry_times=3):
+    def _apply_block_policy(self):
+        """通过Chrome DevTools协议拦截字体、视频、统计、广告等资源的请求"""
+        patterns = BLOCK_POLICIES[self.block_policy] + list(self.extra_blocked_urls)
+        if not patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            logger.info(f"已启用资源拦截策略: {self.block_policy}（{len(patterns)} 条规则）")
+        except Exception as e:
+            logger.warning(f"设置资源拦截失败: {e}")
+
+    def _ensure_driver(self):
+        """确保浏览器驱动已启动（懒加载）"""
+        if self.driver is None:
+            self.setup_driver(self.headless)
+
+    def crawl_article_by_url(self, url, retry_times=3, deadline=None):
         """
         通过URL爬取微信公众号文章
         :param url: 文章URL
         :param retry_times: 重试次数
+        :param deadline: 截止时间（time.monotonic() 的值），为空表示不限；
+                         HTTP请求、页面加载和各项等待都不会超过截止时间，到期后中止页面加载、不再重试
         :return: 文章数据字典
+        :raises TimeoutError: 超过截止时间仍未爬取成功
         """
+        if self.fetch_mode in ('auto', 'http'):
+            article_data = self._crawl_article_by_http(url, _time_left(deadline, self.wait_time))
+            if article_data:
+                return article_data
+            if self.fetch_mode == 'http':
+                logger.error(f"HTTP模式未能获取完整文章内容: {url}")
+                return None
+            logger.info("HTTP快速路径未获取到完整内容，回退到浏览器模式")
+        
         for attempt in range(retry_times):
             try:
                 logger.info(f"第{attempt + 1}次尝试爬取文章: {url}")
                 
-                # 访问文章页面
+                # 访问文章页面：页面加载超过截止时间时由浏览器中止，爬虫不会一直被占用
+                self._ensure_driver()
+                self.driver.set_page_load_timeout(_time_left(deadline, PAGE_LOAD_TIMEOUT))
                 self.driver.get(url)
                 
                 # 等待页面加载
-                WebDriverWait(self.driver, self.wait_time).until(
+                WebDriverWait(self.driver, _time_left(deadline, self.wait_time)).until(
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
                 
-                # 滚动页面确保内容加载完整
-                self._scroll_page()
+                # 等待懒加载内容就绪
+                self._wait_for_page_ready(_time_left(deadline, self.ready_timeout))
                 
                 # 提取文章内容
-                article_data = self._extract_article_content()
+                article_data = self._extract_article_content(_time_left(deadline, self.wait_time))
                 article_data['url'] = url
                 article_data['crawl_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                article_data['fetch_method'] = 'browser'
                 
                 logger.info(f"成功爬取文章: {article_data.get('title', 'Unknown')}")
                 return article_data
                 
             except Exception as e:
                 logger.error(f"第{attempt + 1}次爬取失败: {e}")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"超过截止时间，放弃爬取: {url}") from e
                 if attempt == retry_times - 1:
                     logger.error(f"所有重试都失败了，放弃爬取: {url}")
                     return None
-                time.sleep(2)  # 重试前等待
+                time.sleep(_time_left(deadline, RETRY_DELAY))  # 重试前等待
         
         return None
 
-    def _scroll_page(self):
-        """滚动页面以加载所有内容"""
+    def _crawl_article_by_http(self, url, timeout=None):
+        """
+        不启动浏览器，直接用requests会话获取文章静态HTML并解析
+        :param url: 文章URL
+        :param timeout: 请求超时秒数，默认为 wait_time
+        :return: 文章数据字典；页面需要执行脚本或缺少必要字段时返回None
+        """
         try:
-            # 获取页面总高度
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            
-            while True:
-                # 滚动到页面底部
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                
-                # 等待新内容加载
-                time.sleep(2)
-                
-                # 计算新的页面高度
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                
-                if new_height == last_height:
-                    break
-                    
-                last_height = new_height
-                
-            # 滚动回顶部
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            logger.info(f"尝试HTTP快速路径爬取文章: {url}")
+            response = self.session.get(url, timeout=timeout or self.wait_time)
+            response.raise_for_status()
             
+            # 微信页面为UTF-8编码，响应头缺少charset时requests会误判为ISO-8859-1
+            if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+                response.encoding = 'utf-8'
+            page_source = response.text
         except Exception as e:
-            logger.warning(f"滚动页面时出错: {e}")
+            logger.warning(f"HTTP快速路径请求失败: {e}")
+            return None
+        
+        if any(marker in page_source for marker in JS_GATED_MARKERS):
+            logger.info("页面需要在浏览器中执行脚本才能访问")
+            return None
+        
+        article_data = self._parse_article_html(page_source)
+        if not self._has_required_fields(article_data):
+            logger.info("静态HTML中缺少标题或正文")
+            return None
+        
+        article_data['url'] = url
+        article_data['crawl_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        article_data['fetch_method'] = 'http'
+        
+        logger.info(f"HTTP快速路径爬取成功: {article_data.get('title', 'Unknown')}")
+        return article_data
 
-    def _extract_article_content(self):
-        """提取文章内容"""
+    @staticmethod
+    def _has_required_fields(article_data):
+        """检查解析结果是否包含标题和正文"""
+        return (
+            article_data.get('title') not in ('', '未知标题', '提取失败')
+            and article_data.get('content') not in ('', '无法提取内容', '内容提取失败')
+        )
+
+    def _wait_for_page_ready(self, timeout=None):
+        """
+        等待页面内容就绪：在页面内用MutationObserver监听DOM变化，
+        DOM静默 PAGE_READY_QUIET_MS 毫秒后立即返回，最长等待 timeout 秒（默认为 ready_timeout）
+        """
+        timeout = self.ready_timeout if timeout is None else timeout
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            result = self.driver.execute_async_script(
+                PAGE_READY_SCRIPT, PAGE_READY_QUIET_MS, int(timeout * 1000)
+            )
+            logger.info(
+                f"页面就绪: 耗时{result['elapsed']}ms, DOM变化{result['mutations']}次"
+                f"{'（达到等待上限）' if result['timed_out'] else ''}"
+            )
+        except Exception as e:
+            logger.warning(f"等待页面就绪时出错: {e}")
+
+    def _extract_article_content(self, timeout=None):
+        """提取文章内容，最长等待 timeout 秒（默认为 wait_time）让正文元素出现"""
         try:
             # 等待关键元素加载
-            WebDriverWait(self.driver, self.wait_time).until(
+            WebDriverWait(self.driver, timeout or self.wait_time).until(
                 EC.any_of(
                     EC.presence_of_element_located((By.ID, "js_content")),
                     EC.presence_of_element_located((By.CLASS_NAME, "rich_media_content")),
@@ -257,269 +449,44 @@ class WeixinSpider:
             )
             
             # 获取页面HTML
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # 提取标题
-            title_selectors = [
-                '#activity-name',
-                '.rich_media_title',
-                'h1',
-                '.title'
-            ]
-            title = self._get_text_by_selectors(soup, title_selectors, "未知标题")
-            
-            # 提取作者
-            author_selectors = [
-                '#js_author_name',
-                '.rich_media_meta_text',
-                '.author',
-                '.by'
-            ]
-            author = self._get_text_by_selectors(soup, author_selectors, "未知作者")
-            
-            # 提取发布时间
-            time_selectors = [
-                '#publish_time',
-                '.rich_media_meta_text',
-                '.time',
-                '.date'
-            ]
-            publish_time = self._get_text_by_selectors(soup, time_selectors, "未知时间")
-            
-            # 提取正文内容
-            content_selectors = [
-                '#js_content',
-                '.rich_media_content',
-                '.content',
-                'article'
-            ]
-            content_element = self._get_element_by_selectors(soup, content_selectors)
-            
-            if content_element:
-                # 提取纯文本内容
-                content_text = content_element.get_text(strip=True, separator='\n')
-                
-                # 提取HTML内容
-                content_html = str(content_element)
-                
-                # 提取图片信息
-                images = self._extract_images_from_content(content_element)
-            else:
-                content_text = "无法提取内容"
-                content_html = ""
-                images = []
-            
-            # 构建文章数据
-            article_data = {
-                'title': title,
-                'author': author,
-                'publish_time': publish_time,
-                'content': content_text,
-                'content_html': content_html,
-                'images': images,
-                'word_count': len(content_text),
-                'image_count': len(images)
-            }
-            
-            return article_data
+            return self._parse_article_html(self.driver.page_source)
             
         except Exception as e:
             logger.error(f"提取文章内容失败: {e}")
-            return {
-                'title': '提取失败',
-                'author': '未知',
-                'publish_time': '未知',
-                'content': '内容提取失败',
-                'content_html': '',
-                'images': [],
-                'word_count': 0,
-                'image_count': 0
-            }
-
-    def _extract_images_from_content(self, content_element):
-        """从内容中提取图片信息"""
-        images = []
-        
-        try:
-            # 查找所有图片元素
-            img_elements = content_element.find_all('img')
-            
-            for i, img in enumerate(img_elements):
-                img_info = {
-                    'index': i + 1,
-                    'alt': img.get('alt', ''),
-                    'title': img.get('title', ''),
-                    'original_src': img.get('src', ''),
-                    'data_src': img.get('data-src', ''),
-                    'download_success': False,
-                    'local_path': '',
-                    'filename': ''
-                }
-                
-                # 确定实际的图片URL
-                img_url = img_info['data_src'] or img_info['original_src']
-                
-                if img_url:
-                    # 处理相对URL
-                    if img_url.startswith('//'):
-                        img_url = 'https:' + img_url
-                    elif img_url.startswith('/'):
-                        img_url = 'https://mp.weixin.qq.com' + img_url
-                    
-                    img_info['url'] = img_url
-                    images.append(img_info)
-                    
-        except Exception as e:
-            logger.error(f"提取图片信息失败: {e}")
-            
-        return images
+            return self._empty_article_data()
 
-    def _get_text_by_selectors(self, soup, selectors, default=""):
-        """通过选择器列表获取文本内容"""
-        for selector in selectors:
-            try:
-                element = soup.select_one(selector)
-                if element:
-                    text = element.get_text(strip=True)
-                    if text:
-                        return text
-            except Exception:
-                continue
-        return default
-
-    def _get_element_by_selectors(self, soup, selectors):
-        """通过选择器列表获取元素"""
-        for selector in selectors:
-            try:
-                element = soup.select_one(selector)
-                if element:
-                    return element
-            except Exception:
-                continue
-        return None
-
-    def _download_image(self, img_url, save_dir, filename_prefix="img"):
-        """下载单张图片"""
+    def _parse_article_html(self, page_source):
+        """从页面HTML中解析文章内容（浏览器模式和HTTP模式共用）"""
         try:
-            # 检查是否为data URL
-            if img_url.startswith('data:'):
-                return self._save_data_url_image_as_png(img_url, save_dir, filename_prefix)
-            
-            # 发起请求下载图片
-            response = self.session.get(img_url, timeout=30)
-            response.raise_for_status()
-            
-            # 获取内容类型
-            content_type = response.headers.get('content-type', '')
-            
-            # 确定文件扩展名
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                ext = '.jpg'
-            elif 'png' in content_type:
-                ext = '.png'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
-            else:
-                # 从URL推断扩展名
-                parsed_url = urlparse(img_url)
-                path = parsed_url.path.lower()
-                if path.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                    ext = os.path.splitext(path)[1]
-                else:
-                    ext = '.jpg'  # 默认为jpg
-            
-            # 生成文件名
-            timestamp = int(time.time() * 1000)
-            filename = f"{filename_prefix}_{timestamp}{ext}"
-            filepath = os.path.join(save_dir, filename)
-            
-            # 保存图片
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            logger.info(f"图片下载成功: {filename}")
-            return {
-                'success': True,
-                'filename': filename,
-                'filepath': filepath,
-                'size': len(response.content)
-            }
-            
+            return extract_article(page_source)
         except Exception as e:
-            logger.error(f"下载图片失败 {img_url}: {e}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            logger.error(f"解析文章内容失败: {e}")
+            return self._empty_article_data()
 
-    def _save_data_url_image_as_png(self, data_url, save_dir, filename_prefix="img"):
-        """保存data URL格式的图片为PNG"""
-        try:
-            # 解析data URL
-            header, data = data_url.split(',', 1)
-            
-            # 解码base64数据
-            image_data = base64.b64decode(data)
-            
-            # 生成文件名
-            timestamp = int(time.time() * 1000)
-            filename = f"{filename_prefix}_{timestamp}.png"
-            filepath = os.path.join(save_dir, filename)
-            
-            # 保存图片
-            with open(filepath, 'wb') as f:
-                f.write(image_data)
-            
-            logger.info(f"Data URL图片保存成功: {filename}")
-            return {
-                'success': True,
-                'filename': filename,
-                'filepath': filepath,
-                'size': len(image_data)
-            }
-            
-        except Exception as e:
-            logger.error(f"保存Data URL图片失败: {e}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+    @staticmethod
+    def _empty_article_data():
+        """提取失败时返回的文章数据"""
+        return {
+            'title': '提取失败',
+            'author': '未知',
+            'publish_time': '未知',
+            'content': '内容提取失败',
+            'content_html': '',
+            'images': [],
+            'word_count': 0,
+            'image_count': 0
+        }
 
-    def _download_all_images(self, images_info, save_dir):
-        """下载所有图片"""
+    def _download_all_images(self, images_info, save_dir, deadline=None):
+        """下载所有图片（并发下载，见 ImageDownloader），deadline 为截止时间（time.monotonic() 的值）"""
         if not self.download_images:
             logger.info("图片下载已禁用")
             return
         
-        # 创建保存目录
-        os.makedirs(save_dir, exist_ok=True)
-        
-        success_count = 0
-        for i, img_info in enumerate(images_info):
-            try:
-                img_url = img_info.get('url')
-                if not img_url:
-                    continue
-                
-                result = self._download_image(img_url, save_dir, f"img_{i+1}")
-                
-                if result['success']:
-                    img_info['download_success'] = True
-                    img_info['local_path'] = result['filepath']
-                    img_info['filename'] = result['filename']
-                    success_count += 1
-                else:
-                    img_info['download_success'] = False
-                    img_info['error'] = result.get('error', '未知错误')
-                    
-            except Exception as e:
-                logger.error(f"处理图片 {i+1} 时出错: {e}")
-                img_info['download_success'] = False
-                img_info['error'] = str(e)
+        if self.image_downloader is None:
+            self.image_downloader = ImageDownloader(headers=self.session.headers, store=ImageStore())
         
+        success_count = self.image_downloader.download_all(images_info, save_dir, deadline=deadline)
         logger.info(f"图片下载完成: {success_count}/{len(images_info)}")
 
     def get_saved_files_info(self):
@@ -531,44 +498,16 @@ class WeixinSpider:
     def _replace_image_urls_in_html(self, content_html, images):
         """替换HTML内容中的图片URL为本地相对路径"""
         try:
-            from bs4 import BeautifulSoup
-            
-            soup = BeautifulSoup(content_html, 'html.parser')
-            img_tags = soup.find_all('img')
-            
-            for img_tag in img_tags:
-                original_src = img_tag.get('src', '')
-                data_src = img_tag.get('data-src', '')
-                
-                # 查找对应的本地图片
-                for img_info in images:
-                    img_url = img_info.get('url', '')
-                    if (img_url == original_src or img_url == data_src) and img_info.get('download_success'):
-                        # 替换为相对路径
-                        local_filename = img_info.get('filename', '')
-                        if local_filename:
-                            img_tag['src'] = f"images/{local_filename}"
-                            # 移除data-src属性
-                            if img_tag.get('data-src'):
-                                del img_tag['data-src']
-                            # 添加alt属性
-                            if not img_tag.get('alt'):
-                                img_tag['alt'] = f"图片 {img_info.get('index', '')}"
-                            break
-                else:
-                    # 如果图片下载失败，显示占位符
-                    placeholder_div = soup.new_tag('div', **{'class': 'image-placeholder'})
-                    placeholder_div.string = f"图片加载失败: {img_tag.get('alt', '未知图片')}"
-                    img_tag.replace_with(placeholder_div)
-            
-            return str(soup)
-            
+            return rewrite_image_urls(content_html, images)
         except Exception as e:
             logger.error(f"替换图片URL失败: {e}")
             return content_html
 
-    def save_article_to_file(self, article_data, custom_filename=None):
-        """保存文章到文件"""
+    def save_article_to_file(self, article_data, custom_filename=None, deadline=None):
+        """
+        保存文章到文件
+        :param deadline: 图片下载的截止时间（time.monotonic() 的值），到期未下载完的图片记为失败，文章照常保存
+        """
         try:
             # 生成文件名
             if custom_filename:
@@ -605,7 +544,7 @@ class WeixinSpider:
             images = article_data.get('images', [])
             if images and self.download_images:
                 images_dir = os.path.join(save_dir, 'images')
-                self._download_all_images(images, images_dir)
+                self._download_all_images(images, images_dir, deadline)
                 # 更新article_data中的图片信息
                 article_data['images'] = images
             
@@ -668,6 +607,7 @@ class WeixinSpider:
                 images_dir = os.path.join(save_dir, 'images')
                 self._last_saved_files.append({"type": "images_dir", "path": images_dir})
             
+            self._record_in_catalog(article_data)
             logger.info(f"文章保存成功: {save_dir}")
             return True
             
@@ -675,6 +615,14 @@ class WeixinSpider:
             logger.error(f"保存文章失败: {e}")
             return False
 
+    def _record_in_catalog(self, article_data):
+        """把本次保存登记到文章目录数据库（失败不影响保存结果）"""
+        try:
+            catalog = self.catalog or get_article_catalog()
+            catalog.record(article_data, self._last_saved_files)
+        except Exception as e:
+            logger.warning(f"登记文章目录失败: {e}")
+
     def close(self):
         """关闭浏览器"""
         try: